@@ -0,0 +1,350 @@
+"""Двоичный архив партий шахмат и шашек с произвольным доступом через mmap.
+
+Ход занимает одно 16-битное слово (little-endian):
+    биты 0-5    клетка, откуда (y * 8 + x, как в position.Position)
+    биты 6-11   клетка, куда
+    биты 12-15  флаги: FLAG_CONTINUE — прыжок шашки, после которого серия прыжков
+                продолжается следующим словом; для шахмат — фигура превращения
+                пешки (PROMOTION_FLAGS). Рокировка и взятие на проходе флагов не
+                требуют: доска распознает их по самому ходу
+Файл устроен так:
+    заголовок   HEADER: сигнатура, версия, число партий, смещение оглавления
+    партии      для каждой: необязательная начальная позиция (64 байта Position), затем слова ходов
+    оглавление  для каждой партии INDEX_ENTRY: смещение, число слов, вариант, флаги
+Заголовок записывается при закрытии ArchiveWriter, поэтому партии пишутся потоком.
+
+GameArchive отображает файл в память; archive[i] возвращает GameRecord, ходы
+которого — memoryview на отображенный файл без копирования, и партию можно сразу
+проиграть на ChessBoard или CheckersBoard.
+
+Пример:
+    with ArchiveWriter(open('games.bin', 'wb')) as writer:
+        writer.write_game(game)
+    with GameArchive('games.bin') as archive:
+        board = archive[0].replay()
+"""
+
+import mmap
+import struct
+import sys
+import weakref
+from array import array
+
+import fin_checkers
+import fin_chess_3_piece
+import fin_chess_dasha
+from position import SIZE, Position
+
+MAGIC = b'CHGA'
+VERSION = 1
+HEADER = struct.Struct('<4sHHQQ')
+INDEX_ENTRY = struct.Struct('<QIBB2x')
+VARIANTS = ('chess', 'alice', 'checkers')
+MODULES = {
+    'chess': fin_chess_dasha,
+    'alice': fin_chess_3_piece,
+    'checkers': fin_checkers,
+}
+SQUARE_BITS = 6
+SQUARE_MASK = (1 << SQUARE_BITS) - 1
+FLAG_SHIFT = 12
+FLAG_CONTINUE = 1
+PROMOTION_FLAGS = {'Q': 2, 'R': 3, 'B': 4, 'N': 5}
+PROMOTION_LETTERS = {flag: letter for letter, flag in PROMOTION_FLAGS.items()}
+# Флаг записи в оглавлении: перед ходами записана начальная позиция
+HAS_POSITION = 1
+
+
+def encode_move(start, end, flags=0):
+    """Упаковывает ход в 16-битное слово.
+
+    Аргументы:
+        start (tuple): Клетка (x, y), откуда.
+        end (tuple): Клетка (x, y), куда.
+        flags (int, optional): Флаги хода (0-15).
+
+    Возвращает:
+        int: Слово хода.
+    """
+    return (start[1] * 8 + start[0]) | (end[1] * 8 + end[0]) << SQUARE_BITS | flags << FLAG_SHIFT
+
+
+def decode_move(word):
+    """Распаковывает слово хода в (откуда, куда, флаги); клетки — кортежи (x, y)."""
+    start = word & SQUARE_MASK
+    end = (word >> SQUARE_BITS) & SQUARE_MASK
+    return (start % 8, start // 8), (end % 8, end // 8), word >> FLAG_SHIFT
+
+
+def _variant_of(module):
+    """Возвращает название варианта по модулю доски или игры."""
+    for variant, variant_module in MODULES.items():
+        if variant_module is module:
+            return variant
+    raise ValueError(f"Неизвестный модуль игры: {module.__name__}")
+
+
+class GameRecord:
+    """Партия в архиве.
+
+    Атрибуты:
+        variant (str): 'chess', 'alice' или 'checkers'.
+        start (Position): Начальная позиция или None для обычной расстановки.
+        moves (memoryview): Слова ходов (формат 'H'), без копирования данных файла.
+    """
+
+    __slots__ = ('variant', 'start', 'moves')
+
+    def __init__(self, variant, start, moves):
+        """Создает запись партии."""
+        self.variant = variant
+        self.start = start
+        self.moves = moves
+
+    def __len__(self):
+        return len(self.moves)
+
+    def paths(self):
+        """Перебирает ходы партии: кортежи клеток пути (для шахмат — из двух клеток, без превращения)."""
+        path = ()
+        for word in self.moves:
+            start, end, flags = decode_move(word)
+            path = (path or (start,)) + (end,)
+            if not flags & FLAG_CONTINUE:
+                yield path
+                path = ()
+
+    def chess_moves(self):
+        """Перебирает ходы шахматной партии: тройки (откуда, куда, буква фигуры превращения или None)."""
+        for word in self.moves:
+            start, end, flags = decode_move(word)
+            yield start, end, PROMOTION_LETTERS.get(flags)
+
+    def board(self):
+        """Возвращает новую доску варианта в начальной позиции партии."""
+        module = MODULES[self.variant]
+        board = module.CheckersBoard() if self.variant == 'checkers' else module.ChessBoard()
+        if self.start is not None:
+            self.start.restore(board)
+        return board
+
+    def replay(self, board=None, validate=False):
+        """Проигрывает партию на доске.
+
+        Аргументы:
+            board (ChessBoard | CheckersBoard, optional): Доска в начальной позиции партии;
+                по умолчанию создается методом board().
+            validate (bool, optional): Проверять ли каждый ход правилами доски.
+
+        Возвращает:
+            ChessBoard | CheckersBoard: Доска после последнего хода.
+
+        Исключения:
+            ValueError: Если validate=True и ход недопустим.
+        """
+        if board is None:
+            board = self.board()
+        if self.variant == 'checkers':
+            for number, path in enumerate(self.paths(), 1):
+                if validate and path not in board.generate_moves(board.side_to_move):
+                    raise ValueError(f"Недопустимый ход {number}: {path}")
+                board.make_move(path)
+            return board
+        move_class = sys.modules[type(board).__module__].Move
+        for number, (start, end, promotion) in enumerate(self.chess_moves(), 1):
+            if validate and not board.is_valid_move(start, end, board.side_to_move):
+                raise ValueError(f"Недопустимый ход {number}: {(start, end)}")
+            board.make_move(move_class(start, end, promotion))
+        return board
+
+
+class ArchiveWriter:
+    """Потоковая запись партий в двоичный архив.
+
+    Атрибуты:
+        stream (file): Двоичный поток с произвольным доступом, открытый на запись.
+        index (list): Записи оглавления (смещение, число слов, вариант, флаги).
+    """
+
+    def __init__(self, stream):
+        """Инициализирует запись и резервирует место под заголовок.
+
+        Аргументы:
+            stream (file): Двоичный поток, например open(path, 'wb').
+        """
+        self.stream = stream
+        self.index = []
+        stream.write(bytes(HEADER.size))
+        self._offset = HEADER.size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, variant, paths, start=None):
+        """Записывает партию.
+
+        Аргументы:
+            variant (str): 'chess', 'alice' или 'checkers'.
+            paths (Iterable): Ходы: объекты Move (с фигурой превращения), пары клеток или пути шашек.
+            start (Position, optional): Начальная позиция, если она не обычная.
+
+        Исключения:
+            ValueError: Если вариант неизвестен.
+        """
+        if variant not in VARIANTS:
+            raise ValueError(f"Неизвестный вариант: {variant}")
+        words = []
+        for path in paths:
+            if hasattr(path, 'start'):
+                if path.promotion:
+                    words.append(encode_move(path.start, path.end, PROMOTION_FLAGS[path.promotion]))
+                    continue
+                path = (path.start, path.end)
+            last = len(path) - 2
+            words.extend(encode_move(step, following, FLAG_CONTINUE if index < last else 0)
+                         for index, (step, following) in enumerate(zip(path, path[1:])))
+        data = struct.pack(f'<{len(words)}H', *words)
+        flags = 0
+        if start is not None:
+            data = bytes(start) + data
+            flags |= HAS_POSITION
+        self.stream.write(data)
+        self.index.append((self._offset, len(words), VARIANTS.index(variant), flags))
+        self._offset += len(data)
+
+    def write_game(self, game):
+        """Записывает партию ChessGame или CheckersGame по ее move_history.
+
+        Аргументы:
+            game (ChessGame | CheckersGame): Партия из fin_chess_dasha.py, fin_chess_3_piece.py
+                или fin_checkers.py.
+        """
+        module = sys.modules[type(game).__module__]
+        variant = _variant_of(module)
+        if variant == 'checkers':
+            # В истории шашек — отдельные шаги; шаги одной серии прыжков объединяются в путь
+            replay = module.CheckersGame()
+            paths = []
+            path = ()
+            for entry in game.move_history:
+                start, end = (game.notation_to_indices(word) for word in entry.split(' -> '))
+                path = (path or (start,)) + (end,)
+                if not replay.apply(entry, check_status=False).additional_jump:
+                    paths.append(path)
+                    path = ()
+            if path:
+                paths.append(path)
+            self.write(variant, paths)
+            return
+        start = None
+        if game.start_fen is not None:
+            start = Position.from_board(module.ChessBoard(game.start_fen))
+        self.write(variant, [game.parse_move(entry) for entry in game.move_history], start)
+
+    def close(self):
+        """Дописывает оглавление и заголовок и закрывает поток."""
+        index_offset = self._offset
+        for entry in self.index:
+            self.stream.write(INDEX_ENTRY.pack(*entry))
+        self.stream.seek(0)
+        self.stream.write(HEADER.pack(MAGIC, VERSION, 0, len(self.index), index_offset))
+        self.stream.close()
+
+
+class GameArchive:
+    """Двоичный архив партий, отображенный в память.
+
+    Атрибуты:
+        path (str): Путь к файлу архива.
+    """
+
+    def __init__(self, path):
+        """Открывает архив.
+
+        Аргументы:
+            path (str): Путь к файлу.
+
+        Исключения:
+            ValueError: Если файл не является архивом партий или поврежден.
+        """
+        self.path = path
+        # Слова ходов, выданные записям GameRecord; close освобождает их
+        self._exported = weakref.WeakValueDictionary()
+        with open(path, 'rb') as stream:
+            self._map = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+        if len(self._map) < HEADER.size:
+            self.close()
+            raise ValueError(f"Файл слишком мал для архива партий: {path}")
+        magic, version, _, self._count, self._index_offset = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"Файл не является архивом партий версии {VERSION}: {path}")
+        if self._index_offset + self._count * INDEX_ENTRY.size > len(self._map):
+            self.close()
+            raise ValueError(f"Оглавление архива повреждено: {path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, number):
+        """Возвращает партию по номеру.
+
+        Исключения:
+            IndexError: Если номер вне архива.
+        """
+        if number < 0:
+            number += self._count
+        if not 0 <= number < self._count:
+            raise IndexError(f"Нет партии с номером {number}")
+        offset, words, variant, flags = INDEX_ENTRY.unpack_from(
+            self._map, self._index_offset + number * INDEX_ENTRY.size)
+        start = None
+        if flags & HAS_POSITION:
+            start = Position(self._view[offset:offset + SIZE])
+            offset += SIZE
+        moves = self._view[offset:offset + 2 * words].cast('H')
+        if sys.byteorder != 'little':
+            # Слова хранятся в little-endian; на других платформах нужна копия
+            swapped = array('H', moves)
+            swapped.byteswap()
+            moves = memoryview(swapped)
+        else:
+            self._exported[id(moves)] = moves
+        return GameRecord(VARIANTS[variant], start, moves)
+
+    def __iter__(self):
+        for number in range(self._count):
+            yield self[number]
+
+    def close(self):
+        """Закрывает отображение файла.
+
+        Слова ходов записей GameRecord, полученных из архива, освобождаются: после
+        закрытия ходы этих записей читать нельзя.
+
+        Примечания:
+            Если вызывающий код сделал из слов ходов собственные срезы, отображение
+            не может закрыться сразу и освобождается, когда срезы будут удалены.
+        """
+        for moves in list(self._exported.values()):
+            try:
+                moves.release()
+            except BufferError:
+                # На слова ходов ссылаются срезы вызывающего кода
+                pass
+        self._exported.clear()
+        self._view.release()
+        try:
+            self._map.close()
+        except BufferError:
+            pass
@@ -0,0 +1,250 @@
+"""Пакетная проверка ходов на NumPy.
+
+validate_moves_batch проверяет сразу много пар (позиция, ход) по тем же правилам,
+что ChessBoard.is_valid_move в fin_chess_dasha.py и fin_chess_3_piece.py: фигура
+принадлежит стороне, которая ходит, ход допустим для фигуры и не оставляет своего
+короля под шахом. Позиции передаются в виде position.Position (64 байта), поэтому
+вся пачка превращается в один массив uint8 формы N x 64, а правила фигур и проверка
+шаха считаются по массивам битовых масок uint64 сразу для всех позиций. Права на
+рокировку и клетка взятия на проходе берутся из старших битов байтов позиции;
+проверка битых клеток для рокировок делается только по строкам с рокировкой.
+Модулю нужен NumPy; остальная программа от него не зависит.
+
+Пример:
+    ok = validate_moves_batch([Position.from_board(board)], [Move((4, 1), (4, 3))])
+"""
+
+from itertools import chain
+
+import numpy as np
+
+import chess_state
+from bitboard import BISHOP_DIRS, DIRECTIONS, KING_ATTACKS, KNIGHT_ATTACKS, PAWN_ATTACKS, RAYS, ROOK_DIRS
+from position import PIECE_MASK, SIDE_BIT, STATE_BYTES, STATE_CODES, STATES
+
+# Роли фигур в пакетной проверке; Чеширский Кот ходит и бьет как пешка
+NONE, PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, RABBIT, APPLE = range(9)
+STATE_ROLES = {
+    'Pawn': PAWN, 'Knight': KNIGHT, 'Bishop': BISHOP, 'Rook': ROOK, 'Queen': QUEEN,
+    'King': KING, 'Whiterabbit': RABBIT, 'AppleWhite': APPLE,
+}
+# Байты белых короля и пешки; у черных на единицу больше
+WHITE_KING = 1 + 2 * STATE_CODES['King']
+WHITE_PAWN = 1 + 2 * STATE_CODES['Pawn']
+# Биты флагов нападения: каждая фигура отмечает, как она может бить клетку. Несходившая
+# Белоснежка бьет любую клетку, кроме клетки с королем, поэтому важна только для рокировки
+STRAIGHT, DIAGONAL, KNIGHTS, KINGS, PAWNS, RABBITS, APPLES = range(7)
+ATTACK_ROLES = {ROOK: (STRAIGHT,), QUEEN: (STRAIGHT, DIAGONAL), BISHOP: (DIAGONAL,),
+                KNIGHT: (KNIGHTS,), KING: (KINGS,), PAWN: (PAWNS,), RABBIT: (RABBITS,), APPLE: (APPLES,)}
+
+
+def _code_tables():
+    """Строит таблицы байт клетки -> роль фигуры и байт клетки -> цвет (0 — белые, 1 — черные)."""
+    roles = np.zeros(PIECE_MASK + 1, dtype=np.uint8)
+    colors = np.zeros(PIECE_MASK + 1, dtype=np.uint8)
+    for index, state in enumerate(STATES):
+        role = PAWN if state.startswith('KittyCheshire') else STATE_ROLES.get(state, NONE)
+        for color in (0, 1):
+            code = 1 + 2 * index + color
+            roles[code] = role
+            colors[code] = color
+    return roles, colors
+
+
+def _pair_table(masks):
+    """Превращает список масок целей в таблицу [начало, конец] -> bool."""
+    return np.array([[(mask >> end) & 1 == 1 for end in range(64)] for mask in masks])
+
+
+def _between_table():
+    """Строит маски клеток между двумя клетками одной линии (0 для остальных пар)."""
+    table = np.zeros((64, 64), dtype=np.uint64)
+    for rays in RAYS:
+        for start in range(64):
+            ray = rays[start]
+            for end in range(64):
+                if (ray >> end) & 1:
+                    table[start, end] = ray & ~rays[end] & ~(1 << end)
+    return table
+
+
+def _rabbit_tables():
+    """Строит для каждой клетки и направления бит клетки в 3 шагах и маску пути к ней."""
+    sources = np.zeros((8, 64), dtype=np.uint64)
+    paths = np.zeros((8, 64), dtype=np.uint64)
+    for d, (dx, dy) in enumerate(DIRECTIONS):
+        for square in range(64):
+            x, y = square % 8, square // 8
+            if 0 <= x + 3 * dx < 8 and 0 <= y + 3 * dy < 8:
+                sources[d, square] = 1 << ((y + 3 * dy) * 8 + x + 3 * dx)
+                paths[d, square] = (1 << ((y + dy) * 8 + x + dx)) | (1 << ((y + 2 * dy) * 8 + x + 2 * dx))
+    return sources, paths
+
+
+def _castling_tables():
+    """Строит таблицы рокировок [клетка короля, клетка назначения]: право, маска клеток,
+    которые должны быть свободны, и клетка, через которую проходит король."""
+    rights = np.zeros((64, 64), dtype=np.int64)
+    empty = np.zeros((64, 64), dtype=np.uint64)
+    passed = np.zeros((64, 64), dtype=np.int64)
+    for (start, end), (right, _, _, squares, (crossed,)) in chess_state.CASTLING_MOVES.items():
+        index = start[1] * 8 + start[0], end[1] * 8 + end[0]
+        rights[index] = right
+        empty[index] = sum(1 << (y * 8 + x) for x, y in squares)
+        passed[index] = crossed[1] * 8 + crossed[0]
+    return rights, empty, passed
+
+
+ROLES, COLORS = _code_tables()
+# Флаги нападения фигур противника: индекс — байт клетки плюс 128, если ходят черные
+ENEMY_FLAGS = np.array([sum(1 << flag for flag in ATTACK_ROLES.get(ROLES[code], ()))
+                        if code and COLORS[code] != side else 0
+                        for side in (0, 1) for code in range(PIECE_MASK + 1)], dtype=np.uint8)
+WEIGHTS = np.left_shift(np.uint64(1), np.arange(64, dtype=np.uint64))
+KNIGHT_MOVES = _pair_table(KNIGHT_ATTACKS)
+KING_MOVES = _pair_table(KING_ATTACKS)
+PAWN_CAPTURE_MOVES = np.stack([_pair_table(PAWN_ATTACKS[0]), _pair_table(PAWN_ATTACKS[1])])
+ROOK_MOVES = _pair_table([sum(RAYS[d][square] for d in ROOK_DIRS) for square in range(64)])
+BISHOP_MOVES = _pair_table([sum(RAYS[d][square] for d in BISHOP_DIRS) for square in range(64)])
+BETWEEN = _between_table()
+RABBIT_MOVES = _pair_table([sum(1 << ((square // 8 + 3 * dy) * 8 + square % 8 + 3 * dx)
+                                for dx, dy in DIRECTIONS
+                                if 0 <= square % 8 + 3 * dx < 8 and 0 <= square // 8 + 3 * dy < 8)
+                            for square in range(64)])
+RAY_MASKS = np.array(RAYS, dtype=np.uint64)
+KNIGHT_MASKS = np.array(KNIGHT_ATTACKS, dtype=np.uint64)
+KING_MASKS = np.array(KING_ATTACKS, dtype=np.uint64)
+PAWN_MASKS = np.array(PAWN_ATTACKS, dtype=np.uint64)
+RABBIT_SOURCES, RABBIT_PATHS = _rabbit_tables()
+CASTLING_RIGHTS, CASTLING_EMPTY, CASTLING_PASSED = _castling_tables()
+SIDE_RIGHTS = np.array([chess_state.COLOR_RIGHTS['white'], chess_state.COLOR_RIGHTS['black']])
+ZERO = np.uint64(0)
+
+
+def _masks(selected):
+    """Собирает битовые маски uint64 из булевой матрицы N x 64 (бит i — столбец i)."""
+    return np.packbits(selected, axis=1, bitorder='little').view('<u8').ravel().astype(np.uint64, copy=False)
+
+
+def _nearest(blockers, increasing):
+    """Оставляет в масках ближайшую к началу луча клетку (младший или старший бит)."""
+    if increasing:
+        return blockers & (~blockers + np.uint64(1))
+    for shift in (1, 2, 4, 8, 16, 32):
+        blockers = blockers | (blockers >> np.uint64(shift))
+    return blockers ^ (blockers >> np.uint64(1))
+
+
+def _attacked(square, occupied, attackers, side):
+    """Проверяет для каждой позиции, бьют ли фигуры противника клетку square.
+
+    Аргументы:
+        square (ndarray): Номера клеток.
+        occupied (ndarray): Маски занятых клеток.
+        attackers (list): Маски фигур противника по флагам нападения (STRAIGHT, DIAGONAL, ...).
+        side (ndarray): Сторона, которая ходит (0 — белые, 1 — черные).
+
+    Возвращает:
+        ndarray: Булев массив; Белоснежки (APPLES) не учитываются.
+    """
+    attacked = (KNIGHT_MASKS[square] & attackers[KNIGHTS]) != ZERO
+    attacked |= (KING_MASKS[square] & attackers[KINGS]) != ZERO
+    attacked |= (PAWN_MASKS[side, square] & attackers[PAWNS]) != ZERO
+    for d in range(8):
+        nearest = _nearest(occupied & RAY_MASKS[d, square], d < 4)
+        attacked |= (nearest & (attackers[STRAIGHT] if d in ROOK_DIRS else attackers[DIAGONAL])) != ZERO
+    for d in range(8):
+        attacked |= (((attackers[RABBITS] & RABBIT_SOURCES[d, square]) != ZERO) &
+                     ((occupied & RABBIT_PATHS[d, square]) == ZERO))
+    return attacked
+
+
+def _square_indices(moves):
+    """Возвращает массивы номеров начальных и конечных клеток ходов (Move или пары клеток)."""
+    pairs = [(move.start, move.end) for move in moves] if hasattr(moves[0], 'start') else moves
+    coords = np.fromiter(chain.from_iterable(chain.from_iterable(pairs)), dtype=np.int64,
+                         count=4 * len(pairs)).reshape(len(pairs), 2, 2)
+    inside = ((coords >= 0) & (coords < 8)).all(axis=(1, 2))
+    squares = np.where(inside[:, None], coords[:, :, 1] * 8 + coords[:, :, 0], 0)
+    return squares[:, 0], squares[:, 1], inside
+
+
+def validate_moves_batch(positions, moves):
+    """Проверяет легальность ходов в пачке позиций.
+
+    Аргументы:
+        positions (Sequence[Position | bytes]): Позиции по 64 байта (см. position.Position);
+            ходит сторона side_to_move каждой позиции.
+        moves (Sequence[Move | tuple]): Ходы той же длины: все Move или все пары ((x0, y0), (x1, y1)).
+
+    Возвращает:
+        list[bool]: Для каждой пары True, если ChessBoard.is_valid_move принял бы ход.
+
+    Исключения:
+        ValueError: Если число позиций и ходов различается.
+    """
+    if len(positions) != len(moves):
+        raise ValueError(f"Число позиций ({len(positions)}) не совпадает с числом ходов ({len(moves)})")
+    if not moves:
+        return []
+    data = np.frombuffer(b''.join(positions), dtype=np.uint8).reshape(-1, 64)
+    side = (data[:, 0] & SIDE_BIT) >> 7
+    board = data & PIECE_MASK
+    state = np.zeros(len(data), dtype=np.int64)
+    for bit, index in enumerate(STATE_BYTES):
+        state |= ((data[:, index] & SIDE_BIT) >> 7).astype(np.int64) << bit
+    rows = np.arange(len(board))
+    start, end, inside = _square_indices(moves)
+
+    occupied = board != 0
+    piece = board[rows, start]
+    target = board[rows, end]
+    role = ROLES[piece]
+    empty_target = target == 0
+    valid = inside & (piece != 0) & (COLORS[piece] == side) & (empty_target | (COLORS[target] != side))
+
+    # Правила движения фигур
+    occ = _masks(occupied)
+    clear = (occ & BETWEEN[start, end]) == ZERO
+    forward = np.where(side == 0, 8, -8)
+    home = start // 8 == np.where(side == 0, 1, 6)
+    middle_empty = board[rows, np.clip(start + forward, 0, 63)] == 0
+    # Взятие на проходе только обычной пешкой на клетку из записи состояния
+    column = (state & chess_state.EN_PASSANT_MASK) >> chess_state.EN_PASSANT_SHIFT
+    en_passant = ((piece == WHITE_PAWN + side) & (column > 0) & (end == np.where(side == 0, 40, 16) + column - 1) &
+                  PAWN_CAPTURE_MOVES[side, start, end])
+    pawn = ((end - start == forward) & empty_target |
+            (end - start == 2 * forward) & home & middle_empty & empty_target |
+            PAWN_CAPTURE_MOVES[side, start, end] & ~empty_target | en_passant)
+    castling = ((piece == WHITE_KING + side) & (CASTLING_RIGHTS[start, end] & state & SIDE_RIGHTS[side] != 0) &
+                ((occ & CASTLING_EMPTY[start, end]) == ZERO))
+    geometry = np.select(
+        [role == PAWN, role == KNIGHT, role == BISHOP, role == ROOK, role == QUEEN,
+         role == KING, role == RABBIT, role == APPLE],
+        [pawn, KNIGHT_MOVES[start, end], BISHOP_MOVES[start, end] & clear, ROOK_MOVES[start, end] & clear,
+         (ROOK_MOVES[start, end] | BISHOP_MOVES[start, end]) & clear, KING_MOVES[start, end] | castling,
+         RABBIT_MOVES[start, end] & clear, ROLES[target] != KING],
+        default=False)
+    valid &= geometry
+
+    # Шах своему королю после хода: взятая фигура (при взятии на проходе — соседняя
+    # пешка) исчезает, клетка start освобождается
+    victim_bit = WEIGHTS[np.where(en_passant, end - forward, end)]
+    occ_after = (occ & ~WEIGHTS[start] & ~victim_bit) | WEIGHTS[end]
+    kings = board == (WHITE_KING + side)[:, None]
+    king = np.where(role == KING, end, kings.argmax(axis=1))
+    has_king = kings.any(axis=1) | (role == KING)
+
+    flags = ENEMY_FLAGS[board | (side << 7)[:, None]]
+    attackers = [_masks(flags & (1 << flag) != 0) for flag in range(APPLES + 1)]
+    valid &= ~(has_king & _attacked(king, occ_after, [mask & ~victim_bit for mask in attackers], side))
+
+    # Рокировка: король не под шахом и не проходит через битую клетку
+    rows = np.flatnonzero(valid & castling)
+    if rows.size:
+        subset = [mask[rows] for mask in attackers]
+        safe = ~_attacked(start[rows], occ[rows], subset, side[rows])
+        safe &= ~_attacked(CASTLING_PASSED[start[rows], end[rows]], occ[rows], subset, side[rows])
+        safe &= subset[APPLES] == ZERO
+        valid[rows] &= safe
+    return valid.tolist()
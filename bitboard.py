@@ -0,0 +1,689 @@
+"""Битбордовое представление шахматной доски.
+
+Позиция хранится как набор 64-битных целых: по одному на каждый вид фигуры
+каждого цвета. Бит с номером y * 8 + x соответствует клетке (x, y) списочной
+доски ChessBoard. Класс BitboardChessBoard повторяет интерфейс ChessBoard
+(is_valid_move, is_check, move_piece, piece_at и т.д.) и поддерживает фигуры обоих
+вариантов: стандартные и дополнительные из fin_chess_3_piece.py. Рокировки,
+взятие на проходе и счетчик полуходов хранятся в той же записи состояния, что и
+у ChessBoard (см. chess_state).
+"""
+
+import sys
+from collections import Counter
+
+import chess_state
+import fen
+import zobrist
+
+FULL = (1 << 64) - 1
+RANK_3 = 0xFF << 16
+RANK_6 = 0xFF << 40
+# Ряды превращения пешек
+LAST_RANKS = 0xFF | 0xFF << 56
+
+COLORS = ('white', 'black')
+KINDS = ('Pawn', 'Knight', 'Bishop', 'Rook', 'Queen', 'King', 'Whiterabbit', 'KittyCheshire', 'AppleWhite')
+PAWN, KNIGHT, BISHOP, ROOK, QUEEN, KING, RABBIT, KITTY, APPLE = range(len(KINDS))
+SYMBOLS = {
+    PAWN: 'P', KNIGHT: 'N', BISHOP: 'B', ROOK: 'R', QUEEN: 'Q', KING: 'K',
+    RABBIT: 'W', KITTY: 'C', APPLE: 'A',
+}
+PROMOTION_KINDS = {'Q': QUEEN, 'R': ROOK, 'B': BISHOP, 'N': KNIGHT}
+
+# Направления лучей (dx, dy); первые четыре увеличивают номер клетки
+DIRECTIONS = ((0, 1), (1, 0), (1, 1), (-1, 1), (0, -1), (-1, 0), (-1, -1), (1, -1))
+ROOK_DIRS = (0, 1, 4, 5)
+BISHOP_DIRS = (2, 3, 6, 7)
+
+
+def _bit(x, y):
+    """Возвращает бит клетки (x, y)."""
+    return 1 << (y * 8 + x)
+
+
+def _lsb(bb):
+    """Номер младшего установленного бита."""
+    return (bb & -bb).bit_length() - 1
+
+
+def _squares(bb):
+    """Перебирает номера установленных битов от младшего к старшему."""
+    while bb:
+        low = bb & -bb
+        yield low.bit_length() - 1
+        bb ^= low
+
+
+def _leaper_table(offsets):
+    """Строит таблицу атак прыгающей фигуры: номер клетки -> битовая маска целей."""
+    table = []
+    for sq in range(64):
+        x, y = sq % 8, sq // 8
+        mask = 0
+        for dx, dy in offsets:
+            if 0 <= x + dx < 8 and 0 <= y + dy < 8:
+                mask |= _bit(x + dx, y + dy)
+        table.append(mask)
+    return table
+
+
+def _ray_tables():
+    """Строит маски лучей: RAYS[направление][клетка] без самой клетки."""
+    rays = []
+    for dx, dy in DIRECTIONS:
+        table = []
+        for sq in range(64):
+            x, y = sq % 8 + dx, sq // 8 + dy
+            mask = 0
+            while 0 <= x < 8 and 0 <= y < 8:
+                mask |= _bit(x, y)
+                x += dx
+                y += dy
+            table.append(mask)
+        rays.append(table)
+    return rays
+
+
+def _rabbit_tables():
+    """Строит прыжки Белого Кролика: для клетки кортеж пар (маска пути, бит цели)."""
+    table = []
+    for sq in range(64):
+        jumps = []
+        for dx, dy in DIRECTIONS:
+            x, y = sq % 8, sq // 8
+            if 0 <= x + 3 * dx < 8 and 0 <= y + 3 * dy < 8:
+                path = _bit(x + dx, y + dy) | _bit(x + 2 * dx, y + 2 * dy)
+                jumps.append((path, _bit(x + 3 * dx, y + 3 * dy)))
+        table.append(tuple(jumps))
+    return table
+
+
+KNIGHT_ATTACKS = _leaper_table(((1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2)))
+KING_ATTACKS = _leaper_table(DIRECTIONS)
+PAWN_ATTACKS = (_leaper_table(((-1, 1), (1, 1))), _leaper_table(((-1, -1), (1, -1))))
+RAYS = _ray_tables()
+ROOK_LINES = [RAYS[0][sq] | RAYS[1][sq] | RAYS[4][sq] | RAYS[5][sq] for sq in range(64)]
+BISHOP_LINES = [RAYS[2][sq] | RAYS[3][sq] | RAYS[6][sq] | RAYS[7][sq] for sq in range(64)]
+RABBIT_JUMPS = _rabbit_tables()
+
+
+def _promoted(move):
+    """Возвращает вид фигуры, в которую превращается пешка ходом move (по умолчанию ферзь)."""
+    return PROMOTION_KINDS[move.promotion or chess_state.PROMOTIONS[0]]
+
+
+def _slider_attacks(sq, occupied, directions):
+    """Возвращает атаки дальнобойной фигуры с клетки sq по направлениям directions.
+
+    Для каждого луча находится ближайшая занятая клетка, и часть луча за ней отсекается.
+    """
+    attacks = 0
+    for d in directions:
+        ray = RAYS[d][sq]
+        blockers = ray & occupied
+        if blockers:
+            first = _lsb(blockers) if d < 4 else blockers.bit_length() - 1
+            ray ^= RAYS[d][first]
+        attacks |= ray
+    return attacks
+
+
+class BitboardChessBoard:
+    """Класс, представляющий шахматную доску в виде битбордов.
+
+    Атрибуты:
+        pieces (list): Два списка (для белых и черных) битовых масок по видам фигур из KINDS.
+        occupied (list): Маски всех фигур белых и черных.
+        spent (int): Маска Белоснежек, которые уже сделали свой ход.
+        kitty_symbols (dict): Символы Чеширских Котов по номеру клетки.
+        move_class (type): Класс хода, объекты которого возвращает generate_legal_moves.
+        module (module): Модуль доски (fin_chess_dasha или fin_chess_3_piece); из него берутся
+            классы фигур, которые возвращает piece_at.
+        side_to_move (str): Цвет стороны, которая делает следующий ход.
+        zobrist_key (int): Ключ Зобриста позиции, совпадает с ключом ChessBoard.
+        state (int): Рокировки, взятие на проходе и счетчик полуходов, как ChessBoard.state.
+        halfmove_clock (int): Полуходы с последнего взятия или хода пешки (или Чеширского Кота).
+        position_counts (Counter): Ключ Зобриста -> сколько раз позиция встретилась в партии.
+    """
+
+    def __init__(self, board, move_class):
+        """Инициализирует битборды по позиции списочной доски.
+
+        Аргументы:
+            board (ChessBoard): Доска из fin_chess_dasha.py или fin_chess_3_piece.py.
+            move_class (type): Класс Move того же модуля.
+
+        Raises:
+            ValueError: Если на доске есть фигура неизвестного вида.
+        """
+        self.pieces = [[0] * len(KINDS), [0] * len(KINDS)]
+        self.occupied = [0, 0]
+        self.spent = 0
+        self.kitty_symbols = {}
+        self.move_class = move_class
+        self.module = sys.modules[move_class.__module__]
+        self._piece_objects = {}
+        for y in range(8):
+            for x in range(8):
+                piece = board.board[y][x]
+                if piece is None:
+                    continue
+                kind_name = type(piece).__name__
+                if kind_name not in KINDS:
+                    raise ValueError(f"Неизвестная фигура: {kind_name}")
+                kind = KINDS.index(kind_name)
+                color = COLORS.index(piece.color)
+                bit = _bit(x, y)
+                self.pieces[color][kind] |= bit
+                self.occupied[color] |= bit
+                if kind == KITTY:
+                    self.kitty_symbols[y * 8 + x] = piece.symbol
+                elif kind == APPLE and piece.has_moved:
+                    self.spent |= bit
+        self.side_to_move = board.side_to_move
+        self.zobrist_key = board.zobrist_key
+        self.state = board.state
+        self.position_counts = Counter(board.position_counts)
+
+    @property
+    def halfmove_clock(self):
+        """Полуходы с последнего взятия или хода пешки."""
+        return self.state >> chess_state.CLOCK_SHIFT
+
+    @property
+    def en_passant(self):
+        """Клетка, на которую side_to_move может взять на проходе, или None."""
+        return chess_state.en_passant_square(self.state, self.side_to_move)
+
+    def _en_passant_bit(self, color):
+        """Возвращает бит клетки, на которую сторона с индексом color может взять на проходе, или 0."""
+        target = self.en_passant
+        if target is None or COLORS[color] != self.side_to_move:
+            return 0
+        return _bit(*target)
+
+    def _piece_at(self, sq):
+        """Возвращает пару (индекс цвета, индекс вида) фигуры на клетке sq или None."""
+        bit = 1 << sq
+        for color in (0, 1):
+            if self.occupied[color] & bit:
+                for kind, bb in enumerate(self.pieces[color]):
+                    if bb & bit:
+                        return color, kind
+        return None
+
+    def piece_at(self, square):
+        """Возвращает фигуру на клетке, как ChessBoard.piece_at.
+
+        Фигуры без состояния берутся из кэша и общие для всех клеток, поэтому
+        изменять их нельзя; Чеширский Кот и Белоснежка создаются заново с символом
+        и признаком хода клетки.
+
+        Аргументы:
+            square (tuple): Кортеж (x, y) с клеткой.
+
+        Возвращает:
+            ChessPiece: Фигура модуля доски или None, если клетка пуста.
+        """
+        sq = square[1] * 8 + square[0]
+        found = self._piece_at(sq)
+        if found is None:
+            return None
+        color, kind = found
+        if kind == KITTY or kind == APPLE:
+            piece = getattr(self.module, KINDS[kind])(COLORS[color])
+            if kind == KITTY:
+                piece.symbol = self.kitty_symbols[sq]
+            else:
+                piece.has_moved = bool(self.spent & (1 << sq))
+            return piece
+        piece = self._piece_objects.get(found)
+        if piece is None:
+            piece = self._piece_objects[found] = getattr(self.module, KINDS[kind])(COLORS[color])
+        return piece
+
+    def _symbol(self, sq, color, kind):
+        """Возвращает символ фигуры для отображения."""
+        if kind == KITTY:
+            return self.kitty_symbols[sq]
+        symbol = SYMBOLS[kind]
+        return symbol if color == 0 else symbol.lower()
+
+    def _state(self, sq, kind):
+        """Возвращает вид фигуры на клетке sq с ее состоянием, как ChessPiece.zobrist_kind."""
+        if kind == KITTY:
+            return f"KittyCheshire:{self.kitty_symbols[sq]}"
+        if kind == APPLE and self.spent & (1 << sq):
+            return "AppleWhite:moved"
+        return KINDS[kind]
+
+    def _zobrist(self, sq, color, kind):
+        """Возвращает ключ Зобриста фигуры на клетке sq с учетом ее состояния."""
+        return zobrist.piece_key(self._state(sq, kind), COLORS[color], (sq % 8, sq // 8))
+
+    def to_fen(self, fullmove=1):
+        """Возвращает позицию в FEN, как ChessBoard.to_fen."""
+        states = []
+        for sq in range(64):
+            found = self._piece_at(sq)
+            states.append((self._state(sq, found[1]), COLORS[found[0]]) if found else None)
+        return fen.board_fen(states, self.side_to_move, self.state, fullmove)
+
+    def reset_history(self, halfmove_clock=0):
+        """Начинает историю партии с текущей позиции, как ChessBoard.reset_history."""
+        self.state = self.state & chess_state.FLAGS_MASK | halfmove_clock << chess_state.CLOCK_SHIFT
+        self.position_counts = Counter({self.zobrist_key: 1})
+
+    def draw_reason(self):
+        """Возвращает причину ничьей: 'repetition', 'fifty_moves' или None (см. ChessBoard.draw_reason)."""
+        if self.position_counts[self.zobrist_key] >= chess_state.REPETITION_LIMIT:
+            return 'repetition'
+        if self.halfmove_clock >= chess_state.FIFTY_MOVE_LIMIT:
+            return 'fifty_moves'
+        return None
+
+    def render(self):
+        """Возвращает изображение доски одной строкой в том же виде, что и ChessBoard.render."""
+        lines = ["  a b c d e f g h"]
+        for y in range(8):
+            symbols = []
+            for sq in range(y * 8, y * 8 + 8):
+                found = self._piece_at(sq)
+                symbols.append(self._symbol(sq, *found) if found else '.')
+            lines.append(f"{8 - y} {' '.join(symbols)} {8 - y}")
+        lines.append("  a b c d e f g h")
+        return '\n'.join(lines) + '\n'
+
+    def display_board(self):
+        """Отображает текущую доску в консоли одной записью (см. render)."""
+        sys.stdout.write(self.render())
+
+    def king_square(self, color):
+        """Возвращает позицию короля указанного цвета.
+
+        Аргументы:
+            color (str): Цвет короля ('white' или 'black').
+
+        Возвращает:
+            tuple: Кортеж (x, y) или None, если короля нет на доске.
+        """
+        kings = self.pieces[COLORS.index(color)][KING]
+        if not kings:
+            return None
+        sq = _lsb(kings)
+        return (sq % 8, sq // 8)
+
+    def _attacked(self, sq, by):
+        """Проверяет, бьет ли сторона с индексом by клетку с номером sq."""
+        pieces = self.pieces[by]
+        occupied = self.occupied[0] | self.occupied[1]
+        # Лучи считаются, только если на линиях клетки вообще есть дальнобойные фигуры
+        rooks = (pieces[ROOK] | pieces[QUEEN]) & ROOK_LINES[sq]
+        if rooks and _slider_attacks(sq, occupied, ROOK_DIRS) & rooks:
+            return True
+        bishops = (pieces[BISHOP] | pieces[QUEEN]) & BISHOP_LINES[sq]
+        if bishops and _slider_attacks(sq, occupied, BISHOP_DIRS) & bishops:
+            return True
+        if KNIGHT_ATTACKS[sq] & pieces[KNIGHT] or KING_ATTACKS[sq] & pieces[KING]:
+            return True
+        # Пешку и Чеширского Кота ищем на клетках, которые бьет пешка другого цвета
+        if PAWN_ATTACKS[1 - by][sq] & (pieces[PAWN] | pieces[KITTY]):
+            return True
+        if pieces[RABBIT]:
+            for path, target in RABBIT_JUMPS[sq]:
+                if target & pieces[RABBIT] and not path & occupied:
+                    return True
+        if pieces[APPLE] & ~self.spent & ~(1 << sq):
+            # Белоснежка не может встать на клетку с королем
+            return not (self.pieces[0][KING] | self.pieces[1][KING]) & (1 << sq)
+        return False
+
+    def is_square_attacked(self, square, by_color):
+        """Проверяет, атакована ли клетка фигурами указанного цвета.
+
+        Аргументы:
+            square (tuple): Кортеж (x, y) с проверяемой клеткой.
+            by_color (str): Цвет атакующей стороны ('white' или 'black').
+
+        Возвращает:
+            bool: True, если хотя бы одна фигура by_color бьет клетку square.
+        """
+        return self._attacked(square[1] * 8 + square[0], COLORS.index(by_color))
+
+    def is_check(self, color):
+        """Проверяет, находится ли король указанного цвета под шахом.
+
+        Аргументы:
+            color (str): Цвет короля ('white' или 'black').
+
+        Возвращает:
+            bool: True, если король под шахом, иначе False.
+        """
+        us = COLORS.index(color)
+        kings = self.pieces[us][KING]
+        return bool(kings) and self._attacked(_lsb(kings), 1 - us)
+
+    def _targets(self, sq, color, kind):
+        """Возвращает маску псевдолегальных целей фигуры на клетке sq (шах не учитывается).
+
+        Взятие на проходе входит в цели пешки; рокировки перебираются отдельно (см. _can_castle).
+        """
+        own = self.occupied[color]
+        enemy = self.occupied[1 - color]
+        occupied = own | enemy
+        if kind == PAWN or kind == KITTY:
+            bit = 1 << sq
+            if color == 0:
+                single = (bit << 8) & ~occupied & FULL
+                double = ((single & RANK_3) << 8) & ~occupied & FULL
+            else:
+                single = (bit >> 8) & ~occupied
+                double = ((single & RANK_6) >> 8) & ~occupied
+            if kind == PAWN:
+                enemy |= self._en_passant_bit(color)
+            return single | double | (PAWN_ATTACKS[color][sq] & enemy)
+        if kind == KNIGHT:
+            return KNIGHT_ATTACKS[sq] & ~own
+        if kind == KING:
+            return KING_ATTACKS[sq] & ~own
+        if kind == ROOK:
+            return _slider_attacks(sq, occupied, ROOK_DIRS) & ~own
+        if kind == BISHOP:
+            return _slider_attacks(sq, occupied, BISHOP_DIRS) & ~own
+        if kind == QUEEN:
+            return _slider_attacks(sq, occupied, range(8)) & ~own
+        if kind == RABBIT:
+            targets = 0
+            for path, target in RABBIT_JUMPS[sq]:
+                if not path & occupied:
+                    targets |= target
+            return targets & ~own
+        if kind == APPLE:
+            if self.spent & (1 << sq):
+                return 0
+            return FULL & ~own & ~self.pieces[1 - color][KING]
+        return 0
+
+    def make_move(self, move):
+        """Выполняет ход на битбордах с возможностью отмены.
+
+        Аргументы:
+            move: Объект хода с атрибутами start и end.
+
+        Возвращает:
+            tuple: Токен отмены для unmake_move; прежнее состояние позиции хранится в нем целиком.
+        """
+        start = move.start[1] * 8 + move.start[0]
+        end = move.end[1] * 8 + move.end[0]
+        color, kind = self._piece_at(start)
+        captured = self._piece_at(end)
+        state = self.state
+        token = (move, color, kind, captured, self.spent, self.kitty_symbols.get(start), self.kitty_symbols.get(end),
+                 self.zobrist_key, state)
+        start_bit, end_bit = 1 << start, 1 << end
+        key = self.zobrist_key ^ zobrist.SIDE_KEY ^ zobrist.state_key(state) ^ self._zobrist(start, color, kind)
+        if captured is not None:
+            captured_color, captured_kind = captured
+            key ^= self._zobrist(end, captured_color, captured_kind)
+            if kind == KITTY:
+                # Превращается в фигуру, которую съела
+                self.kitty_symbols[start] = self._symbol(end, captured_color, captured_kind)
+            self.pieces[captured_color][captured_kind] ^= end_bit
+            self.occupied[captured_color] ^= end_bit
+            self.spent &= ~end_bit
+            self.kitty_symbols.pop(end, None)
+        placed = kind
+        en_passant_file = None
+        if kind == PAWN:
+            if end_bit & LAST_RANKS:
+                placed = _promoted(move)
+            elif captured is None and (end - start) % 8:
+                # Взятие на проходе: пешка противника стоит рядом с начальной клеткой
+                victim = end - 8 if color == 0 else end + 8
+                self.pieces[1 - color][PAWN] ^= 1 << victim
+                self.occupied[1 - color] ^= 1 << victim
+                key ^= self._zobrist(victim, 1 - color, PAWN)
+            elif abs(end - start) == 16 and PAWN_ATTACKS[color][(start + end) // 2] & self.pieces[1 - color][PAWN]:
+                en_passant_file = start % 8
+        elif kind == KING and abs(end - start) == 2:
+            _, rook_square, rook_target, _, _ = chess_state.CASTLING_MOVES[move.start, move.end]
+            rook_from, rook_to = rook_square[1] * 8 + rook_square[0], rook_target[1] * 8 + rook_target[0]
+            self.pieces[color][ROOK] ^= (1 << rook_from) | (1 << rook_to)
+            self.occupied[color] ^= (1 << rook_from) | (1 << rook_to)
+            key ^= self._zobrist(rook_from, color, ROOK) ^ self._zobrist(rook_to, color, ROOK)
+        self.pieces[color][kind] ^= start_bit
+        self.pieces[color][placed] ^= end_bit
+        self.occupied[color] ^= start_bit | end_bit
+        if kind == KITTY:
+            self.kitty_symbols[end] = self.kitty_symbols.pop(start)
+        elif kind == APPLE:
+            self.spent |= end_bit
+        self.state = chess_state.after_move(state, move.start, move.end,
+                                            captured is not None or kind == PAWN or kind == KITTY, en_passant_file)
+        self.zobrist_key = key ^ zobrist.state_key(self.state) ^ self._zobrist(end, color, placed)
+        self.side_to_move = COLORS[1 - color]
+        return token
+
+    def unmake_move(self, token):
+        """Отменяет ход, выполненный make_move.
+
+        Аргументы:
+            token (tuple): Токен, который вернул make_move.
+        """
+        move, color, kind, captured, spent, start_symbol, end_symbol, self.zobrist_key, self.state = token
+        self.side_to_move = COLORS[color]
+        start = move.start[1] * 8 + move.start[0]
+        end = move.end[1] * 8 + move.end[0]
+        start_bit, end_bit = 1 << start, 1 << end
+        placed = kind
+        if kind == PAWN:
+            if end_bit & LAST_RANKS:
+                placed = _promoted(move)
+            elif captured is None and (end - start) % 8:
+                victim_bit = 1 << (end - 8 if color == 0 else end + 8)
+                self.pieces[1 - color][PAWN] |= victim_bit
+                self.occupied[1 - color] |= victim_bit
+        elif kind == KING and abs(end - start) == 2:
+            _, rook_square, rook_target, _, _ = chess_state.CASTLING_MOVES[move.start, move.end]
+            rook_bits = _bit(*rook_square) | _bit(*rook_target)
+            self.pieces[color][ROOK] ^= rook_bits
+            self.occupied[color] ^= rook_bits
+        self.pieces[color][kind] ^= start_bit
+        self.pieces[color][placed] ^= end_bit
+        self.occupied[color] ^= start_bit | end_bit
+        if captured is not None:
+            self.pieces[captured[0]][captured[1]] |= end_bit
+            self.occupied[captured[0]] |= end_bit
+        self.spent = spent
+        if kind == KITTY:
+            del self.kitty_symbols[end]
+            self.kitty_symbols[start] = start_symbol
+        if end_symbol is not None:
+            self.kitty_symbols[end] = end_symbol
+
+    def _is_legal(self, start, end, color, kind):
+        """Проверяет, что после хода start -> end фигурой kind король цвета color не под шахом.
+
+        Меняются только маски, нужные для проверки атаки; символы и состояние
+        Белоснежек не трогаются, поэтому пробный ход ничего не выделяет. Фигура
+        превращения стоит на end так же, как пешка, и на шах своему королю не влияет.
+        """
+        move_bits = (1 << start) | (1 << end)
+        enemy = self.pieces[1 - color]
+        victim_bit = 1 << end
+        if kind == PAWN and (end - start) % 8 and not self.occupied[1 - color] & victim_bit:
+            # Взятие на проходе снимает пешку с соседней клетки
+            victim_bit = 1 << (end - 8 if color == 0 else end + 8)
+        captured = None
+        if self.occupied[1 - color] & victim_bit:
+            for captured, bb in enumerate(enemy):
+                if bb & victim_bit:
+                    break
+            enemy[captured] ^= victim_bit
+            self.occupied[1 - color] ^= victim_bit
+        self.pieces[color][kind] ^= move_bits
+        self.occupied[color] ^= move_bits
+        kings = self.pieces[color][KING]
+        legal = not kings or not self._attacked(_lsb(kings), 1 - color)
+        self.pieces[color][kind] ^= move_bits
+        self.occupied[color] ^= move_bits
+        if captured is not None:
+            enemy[captured] ^= victim_bit
+            self.occupied[1 - color] ^= victim_bit
+        return legal
+
+    def _can_castle(self, start, end, us):
+        """Проверяет рокировку стороны с индексом us с клетки start на end (клетки — кортежи (x, y)).
+
+        Правила те же, что в ChessBoard._can_castle.
+        """
+        right, _, _, empty, passed = chess_state.CASTLING_MOVES[start, end]
+        if not self.state & right & chess_state.COLOR_RIGHTS[COLORS[us]]:
+            return False
+        occupied = self.occupied[0] | self.occupied[1]
+        if any(occupied & _bit(x, y) for x, y in empty):
+            return False
+        if self.is_check(COLORS[us]) or any(self._attacked(y * 8 + x, 1 - us) for x, y in passed):
+            return False
+        return self._is_legal(start[1] * 8 + start[0], end[1] * 8 + end[0], us, KING)
+
+    def generate_legal_moves(self, color):
+        """Перебирает все допустимые ходы игрока указанного цвета.
+
+        Аргументы:
+            color (str): Цвет игрока ('white' или 'black').
+
+        Возвращает:
+            generator: Объекты move_class. Доску нельзя менять, пока генератор не исчерпан.
+                Ход пешки на последний ряд дает по ходу на каждую фигуру превращения.
+        """
+        us = COLORS.index(color)
+        for kind, bb in enumerate(self.pieces[us]):
+            for start in _squares(bb):
+                for end in _squares(self._targets(start, us, kind)):
+                    if not self._is_legal(start, end, us, kind):
+                        continue
+                    start_square, end_square = (start % 8, start // 8), (end % 8, end // 8)
+                    if kind == PAWN and (1 << end) & LAST_RANKS:
+                        for letter in chess_state.PROMOTIONS:
+                            yield self.move_class(start_square, end_square, letter)
+                    else:
+                        yield self.move_class(start_square, end_square)
+        if self.state & chess_state.COLOR_RIGHTS[color]:
+            for start, end in chess_state.CASTLING_MOVES:
+                if self._can_castle(start, end, us):
+                    yield self.move_class(start, end)
+
+    def is_promotion(self, start, end):
+        """Проверяет, что ход start -> end — ход пешки на последний ряд (нужна фигура превращения)."""
+        found = self._piece_at(start[1] * 8 + start[0])
+        return found is not None and found[1] == PAWN and (end[1] == 0 or end[1] == 7)
+
+    def has_legal_move(self, color):
+        """Проверяет, есть ли у игрока хотя бы один допустимый ход."""
+        for _ in self.generate_legal_moves(color):
+            return True
+        return False
+
+    def is_valid_move(self, start, end, current_turn):
+        """Проверяет, является ли ход с позиции start на позицию end допустимым.
+
+        Аргументы:
+            start (tuple): Кортеж (x, y) с начальной позицией.
+            end (tuple): Кортеж (x, y) с конечной позицией.
+            current_turn (str): Цвет текущего игрока ('white' или 'black').
+
+        Возвращает:
+            bool: True, если ход допустим, иначе False.
+        """
+        sq = start[1] * 8 + start[0]
+        found = self._piece_at(sq)
+        us = COLORS.index(current_turn)
+        if found is None or found[0] != us:
+            return False
+        if found[1] == KING and (start, end) in chess_state.CASTLING_MOVES:
+            return self._can_castle(start, end, us)
+        end_sq = end[1] * 8 + end[0]
+        if not self._targets(sq, us, found[1]) & (1 << end_sq):
+            return False
+        return self._is_legal(sq, end_sq, us, found[1])
+
+    def is_checkmate(self, color):
+        """Проверяет, является ли положение мата для указанного цвета."""
+        return self.is_check(color) and not self.has_legal_move(color)
+
+    def is_stalemate(self, color):
+        """Проверяет, является ли положение пата для указанного цвета."""
+        return not self.is_check(color) and not self.has_legal_move(color)
+
+    def move_piece(self, start, end, promotion=None):
+        """Выполняет ход фигуры с позиции start на позицию end и записывает позицию в историю партии.
+
+        Аргументы:
+            start (tuple): Кортеж (x, y) с начальной позицией.
+            end (tuple): Кортеж (x, y) с конечной позицией.
+            promotion (str, optional): Буква фигуры превращения пешки (по умолчанию ферзь).
+        """
+        self.make_move(self.move_class(start, end, promotion))
+        self.position_counts[self.zobrist_key] += 1
+
+    def perft(self, depth, divide=False):
+        """Считает число позиций на заданной глубине (perft) от стороны side_to_move.
+
+        Аргументы:
+            depth (int): Глубина в полуходах.
+            divide (bool, optional): Если True, возвращает словарь {ход: число позиций}.
+
+        Возвращает:
+            int | dict: Число листьев дерева ходов или разбивку по первым ходам.
+        """
+        if depth == 0:
+            return 1
+        moves = list(self.generate_legal_moves(self.side_to_move))
+        if depth == 1 and not divide:
+            return len(moves)
+        counts = {}
+        for move in moves:
+            token = self.make_move(move)
+            counts[move] = self.perft(depth - 1)
+            self.unmake_move(token)
+        return counts if divide else sum(counts.values())
+
+
+def cross_check_backends(board, move_class, color, depth):
+    """Сравнивает допустимые ходы списочной и битбордовой доски на дереве ходов.
+
+    Аргументы:
+        board (ChessBoard): Списочная доска; после проверки позиция восстанавливается.
+        move_class (type): Класс Move модуля, которому принадлежит доска.
+        color (str): Цвет стороны, которая ходит первой.
+        depth (int): Глубина обхода в полуходах.
+
+    Возвращает:
+        int: Количество сравненных позиций.
+
+    Исключения:
+        AssertionError: Если наборы допустимых ходов, признак шаха, ключ или состояние позиции различаются.
+    """
+    bitboard = BitboardChessBoard(board, move_class)
+
+    def walk(color, depth):
+        list_moves = {(move.start, move.end, move.promotion) for move in board.generate_legal_moves(color)}
+        bit_moves = {(move.start, move.end, move.promotion) for move in bitboard.generate_legal_moves(color)}
+        assert list_moves == bit_moves, f"Ходы различаются: {sorted(list_moves ^ bit_moves)}"
+        assert board.is_check(color) == bitboard.is_check(color), "Различается признак шаха"
+        assert board.zobrist_key == bitboard.zobrist_key and board.state == bitboard.state, "Различается состояние"
+        checked = 1
+        if depth == 0:
+            return checked
+        other = 'black' if color == 'white' else 'white'
+        for move in list(board.generate_legal_moves(color)):
+            token = board.make_move(move)
+            bit_token = bitboard.make_move(move)
+            checked += walk(other, depth - 1)
+            bitboard.unmake_move(bit_token)
+            board.unmake_move(token)
+        return checked
+
+    return walk(color, depth)
@@ -0,0 +1,334 @@
+"""Книга дебютов: ходы по ключу Зобриста позиции из файла отсортированных записей.
+
+Запись занимает 16 байт (RECORD, little-endian):
+    ключ      ключ Зобриста позиции (8 байт)
+    ход       слово хода в формате archive.encode_move (2 байта)
+    вес       сколько раз ход сделан в этой позиции в исходных партиях (2 байта)
+    резерв    4 нулевых байта, чтобы ключи шли с шагом 8 байт
+Записи отсортированы по ключу, ходы одной позиции идут подряд. Перед ними стоит
+заголовок HEADER с сигнатурой, версией, вариантом игры и числом записей.
+
+OpeningBook отображает файл в память, а ключи читает через memoryview с шагом в
+одну запись, поэтому поиск позиции — двоичный поиск bisect по отображенному файлу
+без чтения и разбора всех записей. Ключи шахмат, fin_chess_3_piece.py и шашек
+считаются по разным фигурам, поэтому у каждого варианта своя книга: вариант
+записан в заголовке, и игра не принимает книгу чужого варианта.
+
+Ход шашек записывается первой и последней клеткой пути, а в флагах слова — номером
+пути среди путей generate_moves с теми же концами: разные серии взятий между двумя
+клетками различаются. Любой ход из книги проверяется правилами доски, поэтому
+совпадение ключей разных позиций не приводит к недопустимому ходу.
+
+Построение книги из PGN или двоичного архива партий (archive.py):
+    python book.py chess games.pgn chess.book --plies 16
+    python book.py checkers games.bin checkers.book
+Игра с книгой:
+    ChessGame(players={'black': SearchEngine(time_limit=2.0)}, book=OpeningBook('chess.book')).play()
+"""
+
+import argparse
+import mmap
+import random
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+
+import archive
+import pgn
+
+MAGIC = b'CHBK'
+VERSION = 1
+HEADER = struct.Struct('<4sHHQ')
+RECORD = struct.Struct('<QHH4x')
+VARIANTS = archive.VARIANTS
+# Число первых полуходов партии, которые попадают в книгу
+DEFAULT_PLIES = 20
+MAX_WEIGHT = 0xFFFF
+
+
+class BookEntry:
+    """Ход из книги.
+
+    Атрибуты:
+        move (Move | tuple): Ход: объект Move модуля доски или путь шашки.
+        weight (int): Вес хода — сколько раз он сделан в исходных партиях.
+    """
+
+    __slots__ = ('move', 'weight')
+
+    def __init__(self, move, weight):
+        """Создает ход из книги."""
+        self.move = move
+        self.weight = weight
+
+    def __repr__(self):
+        return f"BookEntry(move={self.move!r}, weight={self.weight})"
+
+
+def _same_ends(paths, start, end):
+    """Возвращает пути с первой клеткой start и последней end в порядке generate_moves."""
+    return [path for path in paths if path[0] == start and path[-1] == end]
+
+
+def encode_book_move(variant, move, board=None):
+    """Упаковывает ход в слово записи книги.
+
+    Аргументы:
+        variant (str): 'chess', 'alice' или 'checkers'.
+        move (Move | tuple): Объект Move или путь шашки (кортеж клеток).
+        board (CheckersBoard, optional): Доска перед ходом; нужна для шашек, чтобы
+            записать номер пути среди путей с теми же концами.
+
+    Возвращает:
+        int: Слово хода (см. archive.encode_move).
+
+    Исключения:
+        ValueError: Если путь шашки недопустим на доске или путей с теми же концами
+            больше, чем помещается в флаги.
+    """
+    if variant == 'checkers':
+        move = tuple(move)
+        paths = _same_ends(board.generate_moves(board.side_to_move), move[0], move[-1])
+        if move not in paths:
+            raise ValueError(f"Недопустимый ход шашки: {move}")
+        index = paths.index(move)
+        if index >> (16 - archive.FLAG_SHIFT):
+            raise ValueError(f"Слишком много путей между {move[0]} и {move[-1]}: {len(paths)}")
+        return archive.encode_move(move[0], move[-1], index)
+    flags = archive.PROMOTION_FLAGS[move.promotion] if move.promotion else 0
+    return archive.encode_move(move.start, move.end, flags)
+
+
+class OpeningBook:
+    """Книга дебютов, отображенная в память.
+
+    Атрибуты:
+        path (str): Путь к файлу книги.
+        variant (str): Вариант игры, для которого построена книга.
+        random (random.Random): Генератор для выбора хода по весам.
+    """
+
+    def __init__(self, path, seed=None):
+        """Открывает книгу.
+
+        Аргументы:
+            path (str): Путь к файлу.
+            seed (int, optional): Начальное значение генератора выбора хода.
+
+        Исключения:
+            ValueError: Если файл не является книгой дебютов или поврежден.
+        """
+        self.path = path
+        self.random = random.Random(seed)
+        with open(path, 'rb') as stream:
+            self._map = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._map)
+        if len(self._map) < HEADER.size:
+            self.close()
+            raise ValueError(f"Файл слишком мал для книги дебютов: {path}")
+        magic, version, variant, self._count = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION or variant >= len(VARIANTS):
+            self.close()
+            raise ValueError(f"Файл не является книгой дебютов версии {VERSION}: {path}")
+        if HEADER.size + self._count * RECORD.size != len(self._map):
+            self.close()
+            raise ValueError(f"Размер книги дебютов не совпадает с числом записей: {path}")
+        self.variant = VARIANTS[variant]
+        self._keys = self._view[HEADER.size:].cast('Q')[::RECORD.size // 8]
+        if sys.byteorder != 'little':
+            # Ключи хранятся в little-endian; на других платформах нужна копия
+            self._keys.release()
+            keys = array('Q', (RECORD.unpack_from(self._map, HEADER.size + number * RECORD.size)[0]
+                               for number in range(self._count)))
+            self._keys = memoryview(keys)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    def records(self, key):
+        """Возвращает сырые записи позиции: пары (слово хода, вес) для ключа Зобриста."""
+        low = bisect_left(self._keys, key)
+        high = bisect_right(self._keys, key, low)
+        return [RECORD.unpack_from(self._map, HEADER.size + number * RECORD.size)[1:] for number in range(low, high)]
+
+    def entries(self, board):
+        """Возвращает допустимые ходы книги для стороны, которая ходит на доске.
+
+        Аргументы:
+            board (ChessBoard | BitboardChessBoard | CheckersBoard): Доска варианта книги.
+
+        Возвращает:
+            list: Объекты BookEntry; пустой список, если позиции нет в книге.
+        """
+        records = self.records(board.zobrist_key)
+        if not records:
+            return []
+        color = board.side_to_move
+        entries = []
+        if self.variant == 'checkers':
+            paths = board.generate_moves(color)
+            for word, weight in records:
+                start, end, index = archive.decode_move(word)
+                matching = _same_ends(paths, start, end)
+                if index < len(matching):
+                    entries.append(BookEntry(matching[index], weight))
+            return entries
+        move_class = getattr(board, 'move_class', None) or sys.modules[type(board).__module__].Move
+        for word, weight in records:
+            start, end, flags = archive.decode_move(word)
+            promotion = archive.PROMOTION_LETTERS.get(flags)
+            if board.is_valid_move(start, end, color) and board.is_promotion(start, end) == (promotion is not None):
+                entries.append(BookEntry(move_class(start, end, promotion), weight))
+        return entries
+
+    def choose_move(self, board, best=False):
+        """Выбирает ход из книги.
+
+        Аргументы:
+            board (ChessBoard | BitboardChessBoard | CheckersBoard): Доска варианта книги.
+            best (bool, optional): Брать самый частый ход вместо случайного выбора по весам.
+
+        Возвращает:
+            Move | tuple: Ход или None, если позиции нет в книге.
+        """
+        entries = self.entries(board)
+        if not entries:
+            return None
+        if best:
+            return max(entries, key=lambda entry: entry.weight).move
+        return self.random.choices(entries, [entry.weight for entry in entries])[0].move
+
+    def close(self):
+        """Закрывает отображение файла."""
+        if hasattr(self, '_keys'):
+            self._keys.release()
+        self._view.release()
+        self._map.close()
+
+
+class BookBuilder:
+    """Построение книги дебютов: подсчет ходов в позициях первых полуходов партий.
+
+    Атрибуты:
+        variant (str): Вариант игры книги.
+        plies (int): Сколько первых полуходов каждой партии попадает в книгу.
+        counts (Counter): (ключ Зобриста, слово хода) -> сколько раз ход сделан.
+        games (int): Число добавленных партий.
+    """
+
+    def __init__(self, variant, plies=DEFAULT_PLIES):
+        """Создает пустую книгу.
+
+        Аргументы:
+            variant (str): 'chess', 'alice' или 'checkers'.
+            plies (int, optional): Число первых полуходов партии, которые попадают в книгу.
+
+        Исключения:
+            ValueError: Если вариант неизвестен.
+        """
+        if variant not in VARIANTS:
+            raise ValueError(f"Неизвестный вариант: {variant}")
+        self.variant = variant
+        self.plies = plies
+        self.counts = Counter()
+        self.games = 0
+
+    def add_game(self, board, moves):
+        """Добавляет партию.
+
+        Аргументы:
+            board (ChessBoard | CheckersBoard): Доска в начальной позиции партии; ходы делаются на ней.
+            moves (Iterable): Допустимые ходы партии: объекты Move или пути шашек.
+        """
+        for ply, move in enumerate(moves):
+            if ply >= self.plies:
+                break
+            self.counts[board.zobrist_key, encode_book_move(self.variant, move, board)] += 1
+            board.make_move(move)
+        self.games += 1
+
+    def add_pgn(self, stream, workers=None):
+        """Добавляет партии варианта книги из PGN.
+
+        Ходы проверяются pgn.validate_games в пуле процессов; из партии с ошибкой
+        берутся ходы до первой ошибки.
+
+        Аргументы:
+            stream (Iterable[str]): Текстовый поток PGN.
+            workers (int, optional): Число процессов проверки (0 — без пула).
+
+        Исключения:
+            ValueError: Если вариант книги нельзя записать в PGN (шашки).
+        """
+        if self.variant not in pgn.VARIANTS:
+            raise ValueError(f"Партии варианта {self.variant} не записываются в PGN")
+        records = (record for record in pgn.read_games(stream)
+                   if record.tags.get('Variant', 'chess').lower() == self.variant)
+        module = pgn.VARIANTS[self.variant]
+        for result in pgn.validate_games(records, workers):
+            if result.moves:
+                self.add_game(module.ChessBoard(result.tags.get('FEN')), result.moves)
+
+    def add_archive(self, game_archive):
+        """Добавляет партии варианта книги из двоичного архива.
+
+        Аргументы:
+            game_archive (GameArchive): Открытый архив партий.
+        """
+        for record in game_archive:
+            if record.variant != self.variant:
+                continue
+            board = record.board()
+            if self.variant == 'checkers':
+                self.add_game(board, record.paths())
+            else:
+                move_class = sys.modules[type(board).__module__].Move
+                self.add_game(board, (move_class(start, end, promotion)
+                                      for start, end, promotion in record.chess_moves()))
+
+    def write(self, path):
+        """Записывает книгу в файл: заголовок и записи, отсортированные по ключу.
+
+        Аргументы:
+            path (str): Путь к файлу книги.
+        """
+        records = sorted(self.counts.items())
+        with open(path, 'wb') as stream:
+            stream.write(HEADER.pack(MAGIC, VERSION, VARIANTS.index(self.variant), len(records)))
+            stream.writelines(RECORD.pack(key, word, min(count, MAX_WEIGHT)) for (key, word), count in records)
+
+
+def main(argv=None):
+    """Строит книгу дебютов из PGN или двоичного архива партий."""
+    parser = argparse.ArgumentParser(description="Построение книги дебютов.")
+    parser.add_argument('variant', choices=VARIANTS)
+    parser.add_argument('source', help="файл PGN или двоичный архив партий (archive.py)")
+    parser.add_argument('output', help="файл книги")
+    parser.add_argument('--plies', type=int, default=DEFAULT_PLIES, help="первые полуходы каждой партии")
+    parser.add_argument('--workers', type=int, help="число процессов проверки PGN")
+    args = parser.parse_args(argv)
+
+    builder = BookBuilder(args.variant, args.plies)
+    with open(args.source, 'rb') as stream:
+        is_archive = stream.read(len(archive.MAGIC)) == archive.MAGIC
+    if is_archive:
+        with archive.GameArchive(args.source) as game_archive:
+            builder.add_archive(game_archive)
+    else:
+        with open(args.source, encoding='utf-8') as stream:
+            builder.add_pgn(stream, args.workers)
+    builder.write(args.output)
+    print(f"{args.output}: {builder.games} партий, {len(builder.counts)} записей")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,78 @@
+"""Движок для шашек на основе SearchEngine из engine.py.
+
+Ход — это путь фишки (кортеж клеток), как в CheckersBoard.generate_moves: серия
+прыжков целиком считается одним ходом, а взятия обязательны. Поиск, таблица
+транспозиций, упорядочивание и лимиты времени наследуются от SearchEngine.
+
+Пример:
+    game = CheckersGame(players={'black': CheckersSearchEngine(time_limit=1.0)})
+    game.play()
+"""
+
+from engine import CENTER_BONUS, MATE, SearchEngine
+
+MAN_VALUE = 100
+KING_VALUE = 250
+ADVANCE_BONUS = 4
+BACK_ROW_BONUS = 10
+
+
+def evaluate(board):
+    """Оценивает позицию в шашках с точки зрения стороны, которая ходит.
+
+    Аргументы:
+        board (CheckersBoard): Доска.
+
+    Возвращает:
+        int: Оценка в сотых долях фишки (больше — лучше для side_to_move).
+    """
+    score = 0
+    for y, row in enumerate(board.board):
+        for x, piece in enumerate(row):
+            if piece is None:
+                continue
+            if piece.is_king:
+                value = KING_VALUE + CENTER_BONUS[y][x]
+            else:
+                # Белые идут к ряду 0, черные — к ряду 7; фишки на своем последнем
+                # ряду мешают противнику пройти в дамки.
+                advance = 7 - y if piece.color == 'white' else y
+                value = MAN_VALUE + ADVANCE_BONUS * advance + (BACK_ROW_BONUS if advance == 0 else 0)
+            score += value if piece.color == 'white' else -value
+    return score if board.side_to_move == 'white' else -score
+
+
+class CheckersSearchEngine(SearchEngine):
+    """Движок поиска лучшего хода в шашках.
+
+    Атрибуты те же, что у SearchEngine. Лучший ход — путь фишки, который можно
+    передать в CheckersBoard.make_move.
+    """
+
+    def legal_moves(self, board):
+        """Возвращает ходы стороны, которая ходит (взятия обязательны)."""
+        return board.generate_moves(board.side_to_move)
+
+    def is_capture(self, board, move):
+        """Проверяет, является ли ход серией прыжков."""
+        return abs(move[0][0] - move[1][0]) == 2
+
+    def capture_order(self, board, move):
+        """Возвращает приоритет взятия: сначала серии, снимающие больше фишек и дамок."""
+        order = 0
+        for start, end in zip(move, move[1:]):
+            captured = board.board[(start[1] + end[1]) // 2][(start[0] + end[0]) // 2]
+            order += KING_VALUE if captured is not None and captured.is_king else MAN_VALUE
+        return order
+
+    def history_key(self, move):
+        """Возвращает ключ хода в таблице истории."""
+        return move[0], move[-1]
+
+    def evaluate(self, board):
+        """Оценивает позицию с точки зрения стороны, которая ходит."""
+        return evaluate(board)
+
+    def no_moves_score(self, board, ply):
+        """Сторона без ходов в шашках проигрывает."""
+        return -MATE + ply
@@ -0,0 +1,112 @@
+"""Запись состояния позиции шахмат, которое не видно по расстановке фигур.
+
+Состояние — одно целое число:
+    биты 0-3   права на рокировку (WHITE_KINGSIDE, WHITE_QUEENSIDE, BLACK_KINGSIDE, BLACK_QUEENSIDE)
+    биты 4-7   столбец клетки взятия на проходе плюс 1 (0 — взятия на проходе нет)
+    биты 8+    полуходы с последнего взятия или хода пешки (правило 50 ходов)
+Доска хранит состояние в одном атрибуте, а make_move кладет прежнее значение в
+токен отмены, поэтому unmake_move восстанавливает рокировки, взятие на проходе и
+счетчик полуходов одним присваиванием, без просмотра истории и копирования доски.
+
+Клетки — кортежи (x, y) списочной доски: белые стоят на рядах y = 0 и 1,
+король начинает на x = 4, ладьи — на x = 0 и x = 7.
+"""
+
+WHITE_KINGSIDE = 1
+WHITE_QUEENSIDE = 2
+BLACK_KINGSIDE = 4
+BLACK_QUEENSIDE = 8
+CASTLING_MASK = 0xF
+EN_PASSANT_SHIFT = 4
+EN_PASSANT_MASK = 0xF << EN_PASSANT_SHIFT
+CLOCK_SHIFT = 8
+# Рокировки и взятие на проходе без счетчика полуходов; только эта часть входит в ключ Зобриста
+FLAGS_MASK = CASTLING_MASK | EN_PASSANT_MASK
+CASTLING_LETTERS = (('K', WHITE_KINGSIDE), ('Q', WHITE_QUEENSIDE), ('k', BLACK_KINGSIDE), ('q', BLACK_QUEENSIDE))
+COLOR_RIGHTS = {'white': WHITE_KINGSIDE | WHITE_QUEENSIDE, 'black': BLACK_KINGSIDE | BLACK_QUEENSIDE}
+# Фигуры, в которые превращается пешка, буквами FEN; первая — превращение по умолчанию
+PROMOTIONS = ('Q', 'R', 'B', 'N')
+# Ничья: позиция повторилась REPETITION_LIMIT раз или прошло FIFTY_MOVE_LIMIT полуходов без взятий и ходов пешек
+REPETITION_LIMIT = 3
+FIFTY_MOVE_LIMIT = 100
+
+
+def _castling_tables():
+    """Строит таблицы рокировок CASTLING_MOVES и CASTLING_KEEP."""
+    moves = {}
+    keep = {}
+    for y, kingside, queenside in ((0, WHITE_KINGSIDE, WHITE_QUEENSIDE), (7, BLACK_KINGSIDE, BLACK_QUEENSIDE)):
+        moves[(4, y), (6, y)] = (kingside, (7, y), (5, y), ((5, y), (6, y)), ((5, y),))
+        moves[(4, y), (2, y)] = (queenside, (0, y), (3, y), ((1, y), (2, y), (3, y)), ((3, y),))
+        keep[4, y] = CASTLING_MASK & ~(kingside | queenside)
+        keep[7, y] = CASTLING_MASK & ~kingside
+        keep[0, y] = CASTLING_MASK & ~queenside
+    return moves, keep
+
+
+# (клетка короля, клетка назначения) -> (право, клетка ладьи, куда идет ладья,
+# клетки, которые должны быть свободны, клетки, через которые проходит король);
+# клетка -> права, которые остаются после хода с нее или на нее
+CASTLING_MOVES, CASTLING_KEEP = _castling_tables()
+
+
+def castling_from_board(board):
+    """Возвращает права на рокировку, возможные при расстановке фигур.
+
+    Право есть, если король и ладья его цвета стоят на своих начальных клетках.
+
+    Аргументы:
+        board (list): Двумерный список (8x8) с фигурами или None.
+
+    Возвращает:
+        int: Биты прав на рокировку.
+    """
+    rights = 0
+    for (king_square, _), (right, rook_square, _, _, _) in CASTLING_MOVES.items():
+        color = 'white' if king_square[1] == 0 else 'black'
+        king = board[king_square[1]][king_square[0]]
+        rook = board[rook_square[1]][rook_square[0]]
+        if (type(king).__name__ == 'King' and king.color == color and
+                type(rook).__name__ == 'Rook' and rook.color == color):
+            rights |= right
+    return rights
+
+
+def after_move(state, start, end, resets_clock, en_passant_file=None):
+    """Возвращает состояние после хода start -> end.
+
+    Аргументы:
+        state (int): Состояние до хода.
+        start (tuple): Клетка (x, y), откуда.
+        end (tuple): Клетка (x, y), куда.
+        resets_clock (bool): Ход — взятие или ход пешки, счетчик полуходов обнуляется.
+        en_passant_file (int, optional): Столбец пропущенной клетки, если пешка пошла
+            на две клетки и ее можно взять на проходе.
+
+    Возвращает:
+        int: Новое состояние.
+    """
+    rights = state & CASTLING_MASK
+    if rights:
+        rights &= CASTLING_KEEP.get(start, CASTLING_MASK) & CASTLING_KEEP.get(end, CASTLING_MASK)
+    clock = 0 if resets_clock else (state >> CLOCK_SHIFT) + 1
+    en_passant = 0 if en_passant_file is None else en_passant_file + 1
+    return rights | en_passant << EN_PASSANT_SHIFT | clock << CLOCK_SHIFT
+
+
+def en_passant_square(state, side_to_move):
+    """Возвращает клетку, на которую сторона side_to_move может взять на проходе, или None."""
+    column = (state & EN_PASSANT_MASK) >> EN_PASSANT_SHIFT
+    if not column:
+        return None
+    return (column - 1, 5 if side_to_move == 'white' else 2)
+
+
+def castling_fen(state):
+    """Записывает права на рокировку полем FEN ('KQkq', 'Qk', '-' и т.п.)."""
+    return ''.join(letter for letter, right in CASTLING_LETTERS if state & right) or '-'
+
+
+def parse_castling(text):
+    """Разбирает поле рокировок FEN в биты прав (формат строки проверяет вызывающий)."""
+    return sum(right for letter, right in CASTLING_LETTERS if letter in text)
@@ -0,0 +1 @@
+"""Настройка pytest: модули игры лежат в корне репозитория и импортируются из тестов по имени."""
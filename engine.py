@@ -0,0 +1,599 @@
+"""Шахматный движок: негамакс с альфа-бета отсечением и итеративным углублением.
+
+Движок работает с ChessBoard из fin_chess_dasha.py и fin_chess_3_piece.py через
+их общий интерфейс: side_to_move, zobrist_key, en_passant, generate_legal_moves, make_move,
+unmake_move, is_check и piece_at для оценки позиции, поэтому подходит и
+BitboardChessBoard из bitboard.py. Другие игры подключаются наследованием: подкласс
+переопределяет legal_moves, is_capture, capture_order, history_key, evaluate и
+no_moves_score (см. checkers_engine.py).
+
+Пример:
+    engine = SearchEngine(time_limit=2.0)
+    result = engine.search(board)
+    print(result.best_move, result.score, result.pv, result.stats.nodes)
+
+    ChessGame(players={'black': SearchEngine(time_limit=2.0)}).play()  # игра против компьютера
+
+С таблицами эндшпилей (см. tablebase.py) позиция, материал которой есть в таблицах,
+не ищется: ход и точная оценка берутся из таблиц.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+
+MATE = 100000
+INFINITY = 10 ** 9
+MAX_PLY = 128
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# Стоимость фигур в сотых долях пешки. Белый Кролик прыгает ровно на 3 клетки
+# в 8 направлениях (не больше 8 полей, путь должен быть свободен) — это ближе к коню.
+# Чеширский Кот ходит и бьет как пешка. Несходившая Белоснежка может в любой момент
+# взять любую фигуру, кроме короля, а после своего хода только занимает клетку.
+PIECE_VALUES = {
+    'Pawn': 100,
+    'Knight': 320,
+    'Bishop': 330,
+    'Rook': 500,
+    'Queen': 900,
+    'King': 0,
+    'Whiterabbit': 300,
+    'KittyCheshire': 100,
+    'AppleWhite': 450,
+}
+SPENT_APPLE_VALUE = 50
+# Фигуры превращения пешки по буквам Move.promotion
+PROMOTION_NAMES = {'Q': 'Queen', 'R': 'Rook', 'B': 'Bishop', 'N': 'Knight'}
+KING_ORDER_VALUE = 1000
+# Бонус за близость к центру для фигур, которым это важно
+CENTER_BONUS = [[(3 - max(abs(2 * x - 7), abs(2 * y - 7)) // 2) * 5 for x in range(8)] for y in range(8)]
+CENTRALIZED = ('Knight', 'Bishop', 'Whiterabbit', 'Queen')
+PAWN_ADVANCE_BONUS = 5
+
+
+def piece_value(piece):
+    """Возвращает материальную стоимость фигуры с учетом ее состояния.
+
+    Аргументы:
+        piece (ChessPiece): Фигура.
+
+    Возвращает:
+        int: Стоимость в сотых долях пешки.
+    """
+    name = type(piece).__name__
+    if name == 'AppleWhite' and piece.has_moved:
+        return SPENT_APPLE_VALUE
+    return PIECE_VALUES.get(name, 0)
+
+
+def evaluate(board):
+    """Оценивает позицию с точки зрения стороны, которая ходит.
+
+    Аргументы:
+        board (ChessBoard | BitboardChessBoard): Доска.
+
+    Возвращает:
+        int: Оценка в сотых долях пешки (больше — лучше для side_to_move).
+    """
+    score = 0
+    piece_at = board.piece_at
+    for y in range(8):
+        for x in range(8):
+            piece = piece_at((x, y))
+            if piece is None:
+                continue
+            name = type(piece).__name__
+            value = piece_value(piece)
+            if name in CENTRALIZED:
+                value += CENTER_BONUS[y][x]
+            elif name == 'Pawn' or name == 'KittyCheshire':
+                value += PAWN_ADVANCE_BONUS * (y - 1 if piece.color == 'white' else 6 - y)
+            score += value if piece.color == 'white' else -value
+    return score if board.side_to_move == 'white' else -score
+
+
+class SearchTimeout(Exception):
+    """Исключение, которым прерывается поиск при исчерпании времени или узлов."""
+
+
+class SearchStats:
+    """Статистика поиска.
+
+    Атрибуты:
+        nodes (int): Число посещенных узлов (включая форсированный поиск).
+        quiescence_nodes (int): Число узлов форсированного поиска взятий.
+        tt_hits (int): Число найденных записей в таблице транспозиций.
+        tt_cutoffs (int): Число отсечений по таблице транспозиций.
+        beta_cutoffs (int): Число бета-отсечений.
+        depth (int): Последняя полностью просчитанная глубина.
+        elapsed (float): Время поиска в секундах.
+    """
+
+    def __init__(self):
+        """Инициализирует нулевую статистику."""
+        self.nodes = 0
+        self.quiescence_nodes = 0
+        self.tt_hits = 0
+        self.tt_cutoffs = 0
+        self.beta_cutoffs = 0
+        self.depth = 0
+        self.elapsed = 0.0
+
+    @property
+    def nodes_per_second(self):
+        """Скорость поиска в узлах в секунду."""
+        return self.nodes / self.elapsed if self.elapsed > 0 else 0.0
+
+    def __repr__(self):
+        return (f"SearchStats(nodes={self.nodes}, depth={self.depth}, "
+                f"elapsed={self.elapsed:.3f}, tt_hits={self.tt_hits})")
+
+
+class SearchResult:
+    """Результат поиска.
+
+    Атрибуты:
+        best_move (Move): Лучший найденный ход или None, если ходов нет.
+        score (int): Оценка позиции для стороны, которая ходит.
+        depth (int): Глубина, на которой получен результат.
+        pv (list): Главный вариант — список ходов, начиная с best_move.
+        stats (SearchStats): Статистика поиска.
+    """
+
+    def __init__(self, best_move, score, depth, pv, stats):
+        """Инициализирует результат поиска."""
+        self.best_move = best_move
+        self.score = score
+        self.depth = depth
+        self.pv = pv
+        self.stats = stats
+
+    def __repr__(self):
+        return f"SearchResult(best_move={self.best_move}, score={self.score}, depth={self.depth}, pv={self.pv})"
+
+
+class SearchEngine:
+    """Движок поиска лучшего хода.
+
+    Атрибуты:
+        max_depth (int): Максимальная глубина итеративного углубления.
+        time_limit (float): Ограничение времени в секундах или None.
+        node_limit (int): Ограничение числа узлов или None.
+        table_size (int): Максимальное число записей таблицы транспозиций.
+        table (dict): Таблица транспозиций: ключ Зобриста -> (глубина, оценка, тип, ход).
+        tablebase (Tablebase): Таблицы эндшпилей или None.
+    """
+
+    def __init__(self, max_depth=64, time_limit=None, node_limit=None, table_size=1 << 20, tablebase=None):
+        """Инициализирует движок.
+
+        Аргументы:
+            max_depth (int, optional): Максимальная глубина поиска.
+            time_limit (float, optional): Ограничение времени в секундах.
+            node_limit (int, optional): Ограничение числа узлов.
+            table_size (int, optional): Размер таблицы транспозиций.
+            tablebase (Tablebase, optional): Таблицы эндшпилей варианта, на котором идет поиск.
+        """
+        self.max_depth = max_depth
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.table_size = table_size
+        self.table = {}
+        self.tablebase = tablebase
+        self._deadline = None
+        self._max_nodes = None
+        self.stats = SearchStats()
+        self._killers = []
+        self._history = {}
+
+    def choose_move(self, board):
+        """Возвращает ход для игры (интерфейс игрока ChessGame).
+
+        Аргументы:
+            board (ChessBoard): Доска, на которой ходит side_to_move.
+
+        Возвращает:
+            Move: Лучший найденный ход или None, если ходов нет.
+        """
+        return self.search(board).best_move
+
+    def search(self, board, max_depth=None, time_limit=None, node_limit=None):
+        """Ищет лучший ход итеративным углублением.
+
+        Аргументы:
+            board (ChessBoard): Доска; после поиска позиция не меняется.
+            max_depth (int, optional): Переопределяет max_depth движка.
+            time_limit (float, optional): Переопределяет time_limit движка.
+            node_limit (int, optional): Переопределяет node_limit движка.
+
+        Возвращает:
+            SearchResult: Лучший ход, оценка, главный вариант и статистика.
+        """
+        max_depth = max_depth or self.max_depth
+        started = self._reset(time_limit, node_limit)
+        moves = self.legal_moves(board)
+        result = SearchResult(moves[0] if moves else None, 0, 0, moves[:1], self.stats)
+        if not moves:
+            result.score = self.no_moves_score(board, 0)
+            return result
+        probed = self.probe_tablebase(board)
+        if probed is not None:
+            self.stats.elapsed = time.perf_counter() - started
+            return probed
+        for depth in range(1, max_depth + 1):
+            try:
+                score = self._negamax(board, depth, -INFINITY, INFINITY, 0)
+            except SearchTimeout:
+                break
+            pv = self._principal_variation(board, depth)
+            if pv:
+                result = SearchResult(pv[0], score, depth, pv, self.stats)
+            self.stats.depth = depth
+            if abs(score) >= MATE - MAX_PLY:
+                break
+        self.stats.elapsed = time.perf_counter() - started
+        return result
+
+    def search_move(self, board, move, depth, time_limit=None, node_limit=None):
+        """Оценивает один корневой ход поиском на глубину depth (с учетом самого хода).
+
+        Используется параллельным поиском: каждый корневой ход считается отдельно
+        с полным окном, поэтому оценка точная и не зависит от остальных ходов.
+
+        Аргументы:
+            board (ChessBoard): Доска; после поиска позиция не меняется.
+            move (Move): Легальный ход стороны side_to_move.
+            depth (int): Глубина поиска, не меньше 1.
+            time_limit (float, optional): Переопределяет time_limit движка.
+            node_limit (int, optional): Переопределяет node_limit движка.
+
+        Возвращает:
+            SearchResult: Оценка хода для стороны, которая ходит, и главный вариант.
+
+        Исключения:
+            SearchTimeout: Если лимит времени или узлов исчерпан раньше, чем досчитана глубина.
+        """
+        started = self._reset(time_limit, node_limit)
+        token = board.make_move(move)
+        try:
+            score = -self._quiescence(board, -INFINITY, INFINITY, 1)
+            for child_depth in range(1, depth):
+                score = -self._negamax(board, child_depth, -INFINITY, INFINITY, 1)
+            pv = [move] + self._principal_variation(board, depth - 1)
+        finally:
+            board.unmake_move(token)
+        self.stats.depth = depth
+        self.stats.elapsed = time.perf_counter() - started
+        return SearchResult(move, score, depth, pv, self.stats)
+
+    def probe_tablebase(self, board):
+        """Возвращает ход и точную оценку по таблицам эндшпилей.
+
+        Возвращает:
+            SearchResult: Результат с глубиной 0 или None, если таблиц нет или позиции в них нет.
+        """
+        if self.tablebase is None:
+            return None
+        probed = self.tablebase.best_move(board)
+        if probed is None:
+            return None
+        move, outcome = probed
+        if outcome.outcome == 'draw':
+            score = 0
+        else:
+            score = MATE - outcome.dtm if outcome.outcome == 'win' else -MATE + outcome.dtm
+        return SearchResult(move, score, 0, [move], self.stats)
+
+    def legal_moves(self, board):
+        """Возвращает список легальных ходов стороны, которая ходит."""
+        return list(board.generate_legal_moves(board.side_to_move))
+
+    def is_capture(self, board, move):
+        """Проверяет, является ли ход взятием (в том числе на проходе) или превращением пешки."""
+        if board.piece_at(move.end) is not None or move.promotion is not None:
+            return True
+        return move.end == board.en_passant and type(board.piece_at(move.start)).__name__ == 'Pawn'
+
+    def capture_order(self, board, move):
+        """Возвращает приоритет взятия по MVV-LVA: ценная жертва, дешевый нападающий.
+
+        Превращение добавляет к жертве разницу стоимости новой фигуры и пешки.
+        """
+        victim = board.piece_at(move.end)
+        attacker = board.piece_at(move.start)
+        attacker_value = KING_ORDER_VALUE if type(attacker).__name__ == 'King' else piece_value(attacker)
+        if victim is not None:
+            victim_value = piece_value(victim)
+        else:
+            # Пустая клетка: взятие на проходе или превращение без взятия
+            victim_value = PIECE_VALUES['Pawn'] if move.promotion is None else 0
+        if move.promotion is not None:
+            victim_value += PIECE_VALUES[PROMOTION_NAMES[move.promotion]] - PIECE_VALUES['Pawn']
+        return 10 * victim_value - attacker_value
+
+    def history_key(self, move):
+        """Возвращает ключ хода в таблице истории."""
+        return move.start, move.end
+
+    def evaluate(self, board):
+        """Оценивает позицию с точки зрения стороны, которая ходит."""
+        return evaluate(board)
+
+    def no_moves_score(self, board, ply):
+        """Возвращает оценку позиции без легальных ходов: мат или пат."""
+        return -MATE + ply if board.is_check(board.side_to_move) else 0
+
+    def _reset(self, time_limit, node_limit):
+        """Готовит движок к новому поиску и возвращает время его начала."""
+        time_limit = time_limit if time_limit is not None else self.time_limit
+        node_limit = node_limit if node_limit is not None else self.node_limit
+        started = time.perf_counter()
+        self._deadline = started + time_limit if time_limit is not None else None
+        self._max_nodes = node_limit
+        self.stats = SearchStats()
+        self._killers = [[None, None] for _ in range(MAX_PLY + 1)]
+        self._history = {}
+        return started
+
+    def _tick(self):
+        """Учитывает узел и прерывает поиск при исчерпании лимитов."""
+        self.stats.nodes += 1
+        if self.stats.nodes & 1023 == 0:
+            if self._deadline is not None and time.perf_counter() >= self._deadline:
+                raise SearchTimeout()
+        if self._max_nodes is not None and self.stats.nodes >= self._max_nodes:
+            raise SearchTimeout()
+
+    def _store(self, key, depth, score, flag, move, ply):
+        """Сохраняет запись в таблицу транспозиций (оценки мата — относительно узла)."""
+        if score >= MATE - MAX_PLY:
+            score += ply
+        elif score <= -MATE + MAX_PLY:
+            score -= ply
+        if len(self.table) >= self.table_size and key not in self.table:
+            self.table.clear()
+        self.table[key] = (depth, score, flag, move)
+
+    def _order_moves(self, board, moves, tt_move, ply):
+        """Сортирует ходы: ход из таблицы, взятия по MVV-LVA, ходы-убийцы, история."""
+        killers = self._killers[ply]
+        history = self._history
+
+        def priority(move):
+            if move == tt_move:
+                return 10 ** 8
+            if self.is_capture(board, move):
+                return 10 ** 7 + self.capture_order(board, move)
+            if move == killers[0] or move == killers[1]:
+                return 10 ** 6
+            return history.get(self.history_key(move), 0)
+
+        return sorted(moves, key=priority, reverse=True)
+
+    def _negamax(self, board, depth, alpha, beta, ply):
+        """Негамакс с альфа-бета отсечением и таблицей транспозиций."""
+        self._tick()
+        key = board.zobrist_key
+        original_alpha = alpha
+        tt_move = None
+        entry = self.table.get(key)
+        if entry is not None:
+            self.stats.tt_hits += 1
+            entry_depth, score, flag, tt_move = entry
+            if entry_depth >= depth and ply > 0:
+                if score >= MATE - MAX_PLY:
+                    score -= ply
+                elif score <= -MATE + MAX_PLY:
+                    score += ply
+                if flag == EXACT:
+                    self.stats.tt_cutoffs += 1
+                    return score
+                if flag == LOWER:
+                    alpha = max(alpha, score)
+                else:
+                    beta = min(beta, score)
+                if alpha >= beta:
+                    self.stats.tt_cutoffs += 1
+                    return score
+        if depth <= 0 or ply >= MAX_PLY:
+            return self._quiescence(board, alpha, beta, ply)
+        moves = self.legal_moves(board)
+        if not moves:
+            return self.no_moves_score(board, ply)
+
+        best_score, best_move = -INFINITY, None
+        for move in self._order_moves(board, moves, tt_move, ply):
+            quiet = not self.is_capture(board, move)
+            token = board.make_move(move)
+            try:
+                score = -self._negamax(board, depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                board.unmake_move(token)
+            if score > best_score:
+                best_score, best_move = score, move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                self.stats.beta_cutoffs += 1
+                if quiet:
+                    killers = self._killers[ply]
+                    if move != killers[0]:
+                        killers[1], killers[0] = killers[0], move
+                    history_key = self.history_key(move)
+                    self._history[history_key] = self._history.get(history_key, 0) + depth * depth
+                break
+        if best_score <= original_alpha:
+            flag = UPPER
+        elif best_score >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self._store(key, depth, best_score, flag, best_move, ply)
+        return best_score
+
+    def _quiescence(self, board, alpha, beta, ply):
+        """Форсированный поиск взятий, чтобы не оценивать позицию посреди размена."""
+        self._tick()
+        self.stats.quiescence_nodes += 1
+        stand_pat = self.evaluate(board)
+        if stand_pat >= beta or ply >= MAX_PLY:
+            return stand_pat
+        alpha = max(alpha, stand_pat)
+        captures = [move for move in self.legal_moves(board) if self.is_capture(board, move)]
+        for move in self._order_moves(board, captures, None, ply):
+            token = board.make_move(move)
+            try:
+                score = -self._quiescence(board, -beta, -alpha, ply + 1)
+            finally:
+                board.unmake_move(token)
+            if score >= beta:
+                return score
+            alpha = max(alpha, score)
+        return alpha
+
+    def _principal_variation(self, board, depth):
+        """Восстанавливает главный вариант по таблице транспозиций."""
+        pv, tokens, seen = [], [], set()
+        while len(pv) < depth and board.zobrist_key not in seen:
+            seen.add(board.zobrist_key)
+            entry = self.table.get(board.zobrist_key)
+            if entry is None or entry[3] is None:
+                break
+            move = entry[3]
+            if move not in self.legal_moves(board):
+                break
+            pv.append(move)
+            tokens.append(board.make_move(move))
+        for token in reversed(tokens):
+            board.unmake_move(token)
+        return pv
+
+
+def _search_root_move(engine, board, move, depth, time_limit, node_limit):
+    """Задача процесса-исполнителя: оценка одного корневого хода (см. SearchEngine.search_move).
+
+    Возвращает:
+        SearchResult | None: Результат или None, если лимит исчерпан.
+    """
+    try:
+        return engine.search_move(board, move, depth, time_limit, node_limit)
+    except SearchTimeout:
+        return None
+
+
+class ParallelSearchEngine:
+    """Параллельный поиск с разделением корневых ходов между процессами.
+
+    На каждой итерации углубления все корневые ходы оцениваются независимо в
+    ProcessPoolExecutor, каждый — свежим SearchEngine с полным окном. Поэтому
+    оценки точные, а лучший ход выбирается детерминированно: максимум оценки,
+    при равенстве — ход, который раньше идет в generate_legal_moves. Результат
+    не зависит от числа процессов и порядка завершения задач.
+
+    Атрибуты:
+        workers (int): Число процессов.
+        max_depth (int): Максимальная глубина итеративного углубления.
+        time_limit (float): Ограничение времени в секундах или None.
+        node_limit (int): Ограничение числа узлов на один корневой ход или None.
+        table_size (int): Размер таблицы транспозиций каждого SearchEngine.
+        engine_class (type): Класс движка, которым оцениваются корневые ходы.
+        tablebase (Tablebase): Таблицы эндшпилей или None.
+    """
+
+    def __init__(self, workers=None, max_depth=64, time_limit=None, node_limit=None, table_size=1 << 18,
+                 engine_class=SearchEngine, tablebase=None):
+        """Инициализирует движок; процессы запускаются при первом поиске.
+
+        Аргументы:
+            workers (int, optional): Число процессов (по умолчанию — число ядер).
+            max_depth (int, optional): Максимальная глубина поиска.
+            time_limit (float, optional): Ограничение времени в секундах.
+            node_limit (int, optional): Ограничение числа узлов на один корневой ход.
+            table_size (int, optional): Размер таблицы транспозиций каждой задачи.
+            engine_class (type, optional): Класс движка для задач (SearchEngine или его подкласс).
+            tablebase (Tablebase, optional): Таблицы эндшпилей; позиция из таблиц не ищется.
+        """
+        if workers is not None and workers < 1:
+            raise ValueError(f"Число процессов должно быть положительным: {workers}")
+        self.workers = workers or os.cpu_count() or 1
+        self.max_depth = max_depth
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.table_size = table_size
+        self.engine_class = engine_class
+        self.tablebase = tablebase
+        self._executor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Останавливает процессы-исполнители."""
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    def choose_move(self, board):
+        """Возвращает ход для игры (интерфейс игрока ChessGame)."""
+        return self.search(board).best_move
+
+    def search(self, board, max_depth=None, time_limit=None):
+        """Ищет лучший ход, распределяя корневые ходы по процессам.
+
+        Аргументы:
+            board (ChessBoard): Доска; передается в процессы копией и не меняется.
+            max_depth (int, optional): Переопределяет max_depth движка.
+            time_limit (float, optional): Переопределяет time_limit движка.
+
+        Возвращает:
+            SearchResult: Лучший ход последней полностью просчитанной глубины,
+                оценка, главный вариант и суммарная статистика всех процессов.
+        """
+        max_depth = max_depth or self.max_depth
+        time_limit = time_limit if time_limit is not None else self.time_limit
+        started = time.perf_counter()
+        deadline = started + time_limit if time_limit is not None else None
+        stats = SearchStats()
+        engine = self.engine_class(table_size=self.table_size, tablebase=self.tablebase)
+        moves = engine.legal_moves(board)
+        result = SearchResult(moves[0] if moves else None, 0, 0, moves[:1], stats)
+        if not moves:
+            result.score = engine.no_moves_score(board, 0)
+            return result
+        probed = engine.probe_tablebase(board)
+        if probed is not None:
+            return probed
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+
+        for depth in range(1, max_depth + 1):
+            remaining = deadline - time.perf_counter() if deadline is not None else None
+            if remaining is not None and remaining <= 0:
+                break
+            futures = [self._executor.submit(_search_root_move, engine, board, move, depth, remaining, self.node_limit)
+                       for move in moves]
+            done, pending = wait(futures, timeout=remaining)
+            for future in pending:
+                future.cancel()
+            scored = [future.result() for future in futures if future in done]
+            for move_result in scored:
+                if move_result is not None:
+                    stats.nodes += move_result.stats.nodes
+                    stats.quiescence_nodes += move_result.stats.quiescence_nodes
+                    stats.tt_hits += move_result.stats.tt_hits
+                    stats.tt_cutoffs += move_result.stats.tt_cutoffs
+                    stats.beta_cutoffs += move_result.stats.beta_cutoffs
+            if pending or None in scored:
+                break
+            best_index = max(range(len(moves)), key=lambda index: (scored[index].score, -index))
+            best = scored[best_index]
+            result = SearchResult(best.best_move, best.score, depth, best.pv, stats)
+            stats.depth = depth
+            if abs(best.score) >= MATE - MAX_PLY:
+                break
+        stats.elapsed = time.perf_counter() - started
+        return result
@@ -0,0 +1,287 @@
+"""Запись позиции шахмат в нотации FEN (Forsyth–Edwards Notation).
+
+FEN — строка из шести полей через пробел:
+    расстановка  сторона  рокировки  взятие на проходе  полуходы  номер хода
+Расстановка перечисляет ряды с 8-го по 1-й через '/', в ряду — клетки от a до h:
+буква фигуры (заглавная — белая, строчная — черная) или число пустых клеток.
+Ряд n соответствует строке y = n - 1 списочной доски, столбец a — x = 0.
+
+Кроме стандартных букв P N B R Q K используются буквы фигур fin_chess_3_piece.py:
+    W  Белый Кролик
+    A  Белоснежка; 'A~' — Белоснежка, которая уже сделала свой ход
+    C  Чеширский Кот; 'C(q)' — Кот, принявший символ съеденной фигуры ('q')
+Рокировки и взятие на проходе читаются в запись состояния доски (см. chess_state).
+Права на рокировку без короля и ладьи на начальных клетках отбрасываются, а клетка
+взятия на проходе сохраняется, только если рядом стоит пешка, которая может бить:
+так же их ведет ChessBoard.make_move, поэтому ключ Зобриста и запись FEN позиции
+не зависят от того, получена она ходами или загружена.
+
+Разобранные ряды кэшируются, поэтому загрузка больших наборов позиций, где ряды
+часто повторяются, сводится к нескольким поискам в словаре на позицию.
+
+Пример:
+    board = ChessBoard(fen="4k3/8/8/8/8/8/4P3/4K3 w - - 0 1")
+    board.to_fen()                      # та же строка
+"""
+
+import re
+import sys
+
+import chess_state
+import zobrist
+from position import KITTY_SYMBOLS
+
+LETTERS = {
+    'Pawn': 'P', 'Knight': 'N', 'Bishop': 'B', 'Rook': 'R', 'Queen': 'Q', 'King': 'K',
+    'Whiterabbit': 'W', 'KittyCheshire': 'C', 'AppleWhite': 'A',
+}
+KINDS = {letter: kind for kind, letter in LETTERS.items()}
+MOVED_MARK = '~'
+START_FEN = {
+    'chess': 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1',
+    'alice': 'anbqkbnr/pppppcpw/8/8/8/8/WPCPPPPP/RNBQKBNA w Qk - 0 1',
+}
+# Ограничение размера кэшей разобранных рядов; при переполнении кэш очищается
+CACHE_SIZE = 1 << 16
+
+_TOKEN = re.compile(r'([1-8])|([PNBRQKWACpnbrqkwac])(?:\((.)\)|(~))?')
+_CASTLING = re.compile(r'-|K?Q?k?q?')
+_EN_PASSANT = re.compile(r'-|[a-h][36]')
+_ranks = {}
+_rows = {}
+
+
+def piece_token(state, color):
+    """Возвращает запись фигуры в расстановке FEN.
+
+    Аргументы:
+        state (str): Вид фигуры с состоянием (см. ChessPiece.zobrist_kind), например 'AppleWhite:moved'.
+        color (str): Цвет фигуры ('white' или 'black').
+
+    Возвращает:
+        str: Буква фигуры, при необходимости с отметкой состояния ('A~', 'C(q)').
+
+    Исключения:
+        ValueError: Если фигуру нельзя записать в FEN (например, шашку).
+    """
+    kind, _, detail = state.partition(':')
+    if kind not in LETTERS:
+        raise ValueError(f"Фигуру нельзя записать в FEN: {state}")
+    letter = LETTERS[kind] if color == 'white' else LETTERS[kind].lower()
+    if detail == 'moved':
+        return letter + MOVED_MARK
+    if detail and detail != letter:
+        return f"{letter}({detail})"
+    return letter
+
+
+def placement_fen(states):
+    """Записывает расстановку фигур.
+
+    Аргументы:
+        states (Sequence): 64 элемента с индексом y * 8 + x: None или пара (состояние, цвет),
+            как у Position.piece_at.
+
+    Возвращает:
+        str: Первое поле FEN.
+    """
+    ranks = []
+    for y in range(7, -1, -1):
+        rank = []
+        empty = 0
+        for cell in states[y * 8:y * 8 + 8]:
+            if cell is None:
+                empty += 1
+                continue
+            if empty:
+                rank.append(str(empty))
+                empty = 0
+            rank.append(piece_token(*cell))
+        if empty:
+            rank.append(str(empty))
+        ranks.append(''.join(rank))
+    return '/'.join(ranks)
+
+
+def board_fen(states, side_to_move, state=0, fullmove=1):
+    """Записывает позицию в FEN.
+
+    Аргументы:
+        states (Sequence): Фигуры по клеткам (см. placement_fen).
+        side_to_move (str): Цвет стороны, которая ходит.
+        state (int, optional): Рокировки, взятие на проходе и счетчик полуходов (см. chess_state).
+        fullmove (int, optional): Номер хода.
+
+    Возвращает:
+        str: Строка FEN.
+    """
+    side = 'w' if side_to_move == 'white' else 'b'
+    target = chess_state.en_passant_square(state, side_to_move)
+    en_passant = f"{chr(ord('a') + target[0])}{target[1] + 1}" if target else '-'
+    return (f"{placement_fen(states)} {side} {chess_state.castling_fen(state)} {en_passant} "
+            f"{state >> chess_state.CLOCK_SHIFT} {fullmove}")
+
+
+def _parse_rank(text):
+    """Разбирает ряд расстановки в кортеж из 8 элементов: None или (состояние, цвет)."""
+    cells = []
+    position = 0
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if match is None:
+            raise ValueError(f"Некорректный ряд FEN: {text}")
+        empty, letter, symbol, moved = match.groups()
+        position = match.end()
+        if empty:
+            cells.extend([None] * int(empty))
+            continue
+        kind = KINDS[letter.upper()]
+        color = 'white' if letter.isupper() else 'black'
+        if symbol is not None:
+            if kind != 'KittyCheshire' or symbol not in KITTY_SYMBOLS:
+                raise ValueError(f"Некорректный символ фигуры в ряду FEN: {text}")
+            cells.append((f"{kind}:{symbol}", color))
+        elif moved is not None:
+            if kind != 'AppleWhite':
+                raise ValueError(f"Отметка '{MOVED_MARK}' допустима только у Белоснежки: {text}")
+            cells.append((f"{kind}:moved", color))
+        elif kind == 'KittyCheshire':
+            cells.append((f"{kind}:{letter}", color))
+        else:
+            cells.append((kind, color))
+    if len(cells) != 8:
+        raise ValueError(f"В ряду FEN должно быть 8 клеток: {text}")
+    return tuple(cells)
+
+
+def _rank(text):
+    """Возвращает разобранный ряд из кэша."""
+    cells = _ranks.get(text)
+    if cells is None:
+        if len(_ranks) >= CACHE_SIZE:
+            _ranks.clear()
+        cells = _ranks[text] = _parse_rank(text)
+    return cells
+
+
+def _make_piece(module, state, color):
+    """Создает фигуру класса из модуля доски по ее состоянию."""
+    kind, _, detail = state.partition(':')
+    piece_class = getattr(module, kind, None)
+    if piece_class is None:
+        raise ValueError(f"Фигура {kind} не поддерживается в {module.__name__}")
+    piece = piece_class(color)
+    if kind == 'AppleWhite':
+        piece.has_moved = detail == 'moved'
+    elif kind == 'KittyCheshire':
+        piece.symbol = detail
+    return piece
+
+
+def _row(module, text, y):
+    """Возвращает заготовку строки доски для ряда FEN.
+
+    Возвращает:
+        tuple: (фигуры строки или None, если в ней есть фигуры с изменяемым состоянием,
+            разобранный ряд, вклад ряда в ключ Зобриста, столбцы королей по цвету).
+    """
+    cache_key = (module.__name__, text, y)
+    row = _rows.get(cache_key)
+    if row is not None:
+        return row
+    cells = _rank(text)
+    pieces = []
+    key = 0
+    kings = {}
+    for x, cell in enumerate(cells):
+        if cell is None:
+            pieces.append(None)
+            continue
+        state, color = cell
+        piece = _make_piece(module, state, color)
+        pieces.append(piece)
+        key ^= zobrist.piece_key(state, color, (x, y))
+        if state == 'King':
+            kings[color] = x
+    shared = all(piece is None or piece.shared for piece in pieces)
+    if len(_rows) >= CACHE_SIZE:
+        _rows.clear()
+    row = _rows[cache_key] = (pieces if shared else None, cells, key, kings)
+    return row
+
+
+def load_fen(board, fen):
+    """Расставляет позицию FEN на доске, заменяя ее содержимое.
+
+    Фигуры создаются классами из модуля доски, как в Position.restore: позицию с
+    фигурами W, C и A можно загрузить только на доску fin_chess_3_piece.py.
+    Фигуры без изменяемого состояния — общие экземпляры, поэтому строки доски для
+    повторяющихся рядов только копируются из кэша.
+
+    Аргументы:
+        board (ChessBoard): Списочная доска, которую нужно заполнить.
+        fen (str): Позиция в FEN; поля после стороны, которая ходит, необязательны.
+
+    Возвращает:
+        tuple: (полуходы, номер хода) из FEN (по умолчанию 0 и 1). Счетчик полуходов
+            в board.state не записывается: его ставит board.reset_history.
+
+    Исключения:
+        ValueError: Если строка не является корректной FEN.
+    """
+    fields = fen.split()
+    if not 2 <= len(fields) <= 6:
+        raise ValueError(f"Некорректная FEN: {fen}")
+    ranks = fields[0].split('/')
+    if len(ranks) != 8:
+        raise ValueError(f"В FEN должно быть 8 рядов: {fen}")
+    if fields[1] not in ('w', 'b'):
+        raise ValueError(f"Некорректная сторона в FEN: {fields[1]}")
+    if len(fields) > 2 and _CASTLING.fullmatch(fields[2]) is None:
+        raise ValueError(f"Некорректные рокировки в FEN: {fields[2]}")
+    if len(fields) > 3 and _EN_PASSANT.fullmatch(fields[3]) is None:
+        raise ValueError(f"Некорректное взятие на проходе в FEN: {fields[3]}")
+    counters = fields[4:]
+    if not all(counter.isdigit() for counter in counters):
+        raise ValueError(f"Некорректные счетчики ходов в FEN: {' '.join(counters)}")
+    halfmove = int(counters[0]) if counters else 0
+    fullmove = int(counters[1]) if len(counters) > 1 else 1
+    if fullmove < 1:
+        raise ValueError(f"Номер хода в FEN должен быть положительным: {fullmove}")
+
+    module = sys.modules[type(board).__module__]
+    side_to_move = 'white' if fields[1] == 'w' else 'black'
+    key = zobrist.SIDE_KEY if side_to_move == 'black' else 0
+    king_positions = {'white': None, 'black': None}
+    rows = board.board
+    for y in range(8):
+        pieces, cells, row_key, kings = _row(module, ranks[7 - y], y)
+        if pieces is not None:
+            rows[y] = pieces.copy()
+        else:
+            rows[y] = [None if cell is None else _make_piece(module, *cell) for cell in cells]
+        key ^= row_key
+        for color, x in kings.items():
+            king_positions[color] = (x, y)
+    state = chess_state.castling_from_board(rows)
+    if len(fields) > 2:
+        state &= chess_state.parse_castling(fields[2])
+    if len(fields) > 3 and fields[3] != '-':
+        column = ord(fields[3][0]) - ord('a')
+        row = int(fields[3][1]) - 1
+        if row != (5 if side_to_move == 'white' else 2):
+            raise ValueError(f"Клетка взятия на проходе {fields[3]} не соответствует стороне, которая ходит")
+        # Пешка противника, прошедшая через клетку, должна стоять за ней, а своя — рядом с ней
+        pawn_row = rows[row - 1 if side_to_move == 'white' else row + 1]
+        passed = pawn_row[column]
+        if type(passed).__name__ != 'Pawn' or passed.color == side_to_move:
+            raise ValueError(f"Нет пешки, прошедшей через клетку взятия на проходе {fields[3]}")
+        for x in (column - 1, column + 1):
+            if 0 <= x < 8 and type(pawn_row[x]).__name__ == 'Pawn' and pawn_row[x].color == side_to_move:
+                state |= (column + 1) << chess_state.EN_PASSANT_SHIFT
+                break
+    board.side_to_move = side_to_move
+    board.king_positions = king_positions
+    board.state = state
+    board.zobrist_key = key ^ zobrist.state_key(state)
+    return halfmove, fullmove
@@ -1,3 +1,15 @@
+import sys
+from collections import Counter
+
+import zobrist
+from render import FrameRenderer
+
+# Ничья: позиция повторилась REPETITION_LIMIT раз или стороны сделали KING_MOVE_LIMIT
+# полуходов подряд только дамками и без взятий (15 ходов каждой стороной)
+REPETITION_LIMIT = 3
+KING_MOVE_LIMIT = 30
+
+
 class CheckersPiece:
     """Базовый класс для фишек в шашках.
 
@@ -5,8 +17,26 @@ class CheckersPiece:
         color (str): Цвет фишки ('white' или 'black').
         is_king (bool): Флаг, указывающий, является ли фишка дамкой (по умолчанию False).
         symbol (str): Символ фишки для отображения ('K' для дамки, 'W' для белой, 'B' для черной).
+
+    Примечания:
+        Фишки неизменяемы и хранятся в одном экземпляре на цвет и статус дамки:
+        при превращении в дамку фишка на доске заменяется другим экземпляром.
     """
 
+    __slots__ = ('color', 'is_king', 'symbol')
+    _shared_instances = {}
+
+    def __new__(cls, color, is_king=False):
+        """Возвращает общий экземпляр фишки указанного цвета и статуса."""
+        piece = cls._shared_instances.get((color, is_king))
+        if piece is None:
+            piece = cls._shared_instances[color, is_king] = super().__new__(cls)
+        return piece
+
+    def __getnewargs__(self):
+        """Аргументы __new__ для pickle: фишка восстанавливается общим экземпляром."""
+        return (self.color, self.is_king)
+
     def __init__(self, color, is_king=False):
         """Инициализирует шашку с указанным цветом и статусом дамки.
 
@@ -18,6 +48,14 @@ class CheckersPiece:
         self.is_king = is_king
         self.symbol = 'K' if is_king else ('W' if color == 'white' else 'B')
 
+    def zobrist_kind(self):
+        """Возвращает вид фишки для ключа Зобриста (простая фишка или дамка).
+
+        Возвращает:
+            str: 'CheckersKing' для дамки, иначе 'CheckersMan'.
+        """
+        return 'CheckersKing' if self.is_king else 'CheckersMan'
+
     def can_move(self, board, start, end):
         """Проверяет, может ли фишка переместиться с позиции start на позицию end.
 
@@ -83,12 +121,53 @@ class CheckersBoard:
 
     Атрибуты:
         board (list): Двумерный список (8x8), содержащий фишки или None.
+        side_to_move (str): Цвет стороны, которая сейчас ходит.
+        zobrist_key (int): Ключ Зобриста позиции с учетом дамок и стороны, которая ходит.
+        quiet_king_moves (int): Полуходы подряд, сделанные дамками без взятий.
+        position_counts (Counter): Ключ Зобриста -> сколько раз позиция встретилась в партии.
     """
 
     def __init__(self):
         """Инициализирует доску с начальной расстановкой шашек."""
         self.board = [[None for _ in range(8)] for _ in range(8)]
         self.setup_board()
+        self.side_to_move = 'white'
+        self.zobrist_key = zobrist.board_key(self.board, self.side_to_move)
+        self.reset_history()
+
+    def reset_history(self, quiet_king_moves=0):
+        """Начинает историю партии с текущей позиции.
+
+        Аргументы:
+            quiet_king_moves (int, optional): Начальное значение счетчика ходов дамками.
+        """
+        self.quiet_king_moves = quiet_king_moves
+        self.position_counts = Counter({self.zobrist_key: 1})
+
+    def draw_reason(self):
+        """Возвращает причину ничьей в текущей позиции.
+
+        Возвращает:
+            str: 'repetition' (позиция повторилась трижды), 'king_moves' (KING_MOVE_LIMIT
+                полуходов только дамками без взятий) или None. Прошлые позиции не
+                просматриваются: счетчики ведут make_move и CheckersGame.
+        """
+        if self.position_counts[self.zobrist_key] >= REPETITION_LIMIT:
+            return 'repetition'
+        if self.quiet_king_moves >= KING_MOVE_LIMIT:
+            return 'king_moves'
+        return None
+
+    def piece_at(self, square):
+        """Возвращает фишку на клетке.
+
+        Аргументы:
+            square (tuple): Кортеж (x, y) с клеткой.
+
+        Возвращает:
+            CheckersPiece: Фишка или None, если клетка пуста.
+        """
+        return self.board[square[1]][square[0]]
 
     def setup_board(self):
         """Настраивает начальную позицию шашек на доске.
@@ -105,20 +184,22 @@ class CheckersBoard:
                 if (x + y) % 2 == 1:
                     self.board[y][x] = CheckersPiece('white')
 
-    def display_board(self):
-        """Отображает текущую доску в консоли.
+    def render(self):
+        """Возвращает изображение доски одной строкой.
 
         Использует нотацию с буквами (a-h) для столбцов и цифрами (1-8) для строк.
         Пустые клетки обозначаются точкой ('.'), фишки — их символами (W, B, K).
         """
-        print("  a b c d e f g h")
+        lines = ["  a b c d e f g h"]
         for y in range(8):
-            print(f"{8 - y}", end="")
-            for x in range(8):
-                piece = self.board[y][x]
-                print(piece.symbol if piece else '.', end=" ")
-            print(f"{8 - y}")
-        print("  a b c d e f g h")
+            cells = ' '.join(piece.symbol if piece else '.' for piece in self.board[y])
+            lines.append(f"{8 - y}{cells} {8 - y}")
+        lines.append("  a b c d e f g h")
+        return '\n'.join(lines) + '\n'
+
+    def display_board(self):
+        """Отображает текущую доску в консоли одной записью (см. render)."""
+        sys.stdout.write(self.render())
 
     def move_piece(self, start, end):
         """Выполняет ход фишки с позиции start на позицию end.
@@ -128,23 +209,204 @@ class CheckersBoard:
             end (tuple): Кортеж (x, y) с конечной позицией.
 
         Примечания:
-            Превращает фишку в дамку, если она достигла конца доски.
+            Заменяет фишку дамкой, если она достигла конца доски.
             Удаляет захваченную фигуру, если ход был прыжком.
         """
         start_x, start_y = start
         end_x, end_y = end
         piece = self.board[start_y][start_x]
+        self.zobrist_key ^= zobrist.piece_key(piece.zobrist_kind(), piece.color, start)
         self.board[end_y][end_x] = piece
         self.board[start_y][start_x] = None
 
-        if (piece.color == 'white' and end_y == 0) or (piece.color == 'black' and end_y == 7):
-            piece.is_king = True
-            piece.symbol = 'K'
+        if not piece.is_king and ((piece.color == 'white' and end_y == 0) or (piece.color == 'black' and end_y == 7)):
+            piece = self.board[end_y][end_x] = CheckersPiece(piece.color, True)
+        self.zobrist_key ^= zobrist.piece_key(piece.zobrist_kind(), piece.color, end)
 
         if abs(start_x - end_x) == 2:
             mid_x, mid_y = (start_x + end_x) // 2, (start_y + end_y) // 2
+            captured = self.board[mid_y][mid_x]
+            self.zobrist_key ^= zobrist.piece_key(captured.zobrist_kind(), captured.color, (mid_x, mid_y))
             self.board[mid_y][mid_x] = None
 
+    def count_quiet_move(self, piece, capture):
+        """Обновляет счетчик quiet_king_moves после хода.
+
+        Аргументы:
+            piece (CheckersPiece): Фишка, которая ходила (до превращения в дамку).
+            capture (bool): True, если ход был взятием.
+        """
+        self.quiet_king_moves = self.quiet_king_moves + 1 if piece.is_king and not capture else 0
+
+    def switch_turn(self):
+        """Передает ход другой стороне.
+
+        Примечания:
+            Вызывается игрой после завершения хода: при серии прыжков одна сторона
+            делает несколько перемещений подряд, поэтому move_piece сторону не меняет.
+        """
+        self.side_to_move = 'black' if self.side_to_move == 'white' else 'white'
+        self.zobrist_key ^= zobrist.SIDE_KEY
+
+    def _undo_step(self, start, end, piece, captured, key):
+        """Отменяет одно перемещение move_piece (простой ход или прыжок)."""
+        self.board[end[1]][end[0]] = None
+        self.board[start[1]][start[0]] = piece
+        if captured is not None:
+            self.board[(start[1] + end[1]) // 2][(start[0] + end[0]) // 2] = captured
+        self.zobrist_key = key
+
+    def _collect_jumps(self, path, sequences):
+        """Добавляет в sequences все серии прыжков, продолжающие путь path.
+
+        Прыжки пробуются прямо на доске и сразу отменяются. Серия заканчивается,
+        когда фишке больше некого бить.
+        """
+        x, y = path[-1]
+        piece = self.board[y][x]
+        extended = False
+        for dx, dy in ((2, 2), (2, -2), (-2, 2), (-2, -2)):
+            end = (x + dx, y + dy)
+            if 0 <= end[0] < 8 and 0 <= end[1] < 8 and piece.can_capture(self.board, (x, y), end):
+                captured = self.board[y + dy // 2][x + dx // 2]
+                key = self.zobrist_key
+                self.move_piece((x, y), end)
+                self._collect_jumps(path + (end,), sequences)
+                self._undo_step((x, y), end, piece, captured, key)
+                extended = True
+        if not extended and len(path) > 1:
+            sequences.append(path)
+
+    def generate_moves(self, color):
+        """Возвращает все допустимые ходы стороны указанного цвета.
+
+        Аргументы:
+            color (str): Цвет игрока ('white' или 'black').
+
+        Возвращает:
+            list: Ходы в виде кортежей клеток пути ((x0, y0), (x1, y1), ...).
+
+        Примечания:
+            Если есть хотя бы одно взятие, возвращаются только взятия. Серия прыжков
+            одной фишки считается одним ходом и продолжается, пока бить есть кого.
+        """
+        sequences = []
+        for y in range(8):
+            for x in range(8):
+                piece = self.board[y][x]
+                if piece and piece.color == color:
+                    self._collect_jumps(((x, y),), sequences)
+        if sequences:
+            return sequences
+        moves = []
+        for y in range(8):
+            for x in range(8):
+                piece = self.board[y][x]
+                if piece and piece.color == color:
+                    for dx, dy in ((1, 1), (1, -1), (-1, 1), (-1, -1)):
+                        end = (x + dx, y + dy)
+                        if (0 <= end[0] < 8 and 0 <= end[1] < 8 and self.board[end[1]][end[0]] is None and
+                                piece.can_move(self.board, (x, y), end)):
+                            moves.append(((x, y), end))
+        return moves
+
+    def make_move(self, path):
+        """Выполняет ход целиком и передает очередь другой стороне.
+
+        Аргументы:
+            path (tuple): Кортеж клеток пути, как в generate_moves.
+
+        Возвращает:
+            tuple: Токен отмены для unmake_move.
+        """
+        start_x, start_y = path[0]
+        piece = self.board[start_y][start_x]
+        captured = []
+        token = (path, piece, captured, self.zobrist_key, self.quiet_king_moves)
+        for start, end in zip(path, path[1:]):
+            if abs(start[0] - end[0]) == 2:
+                mid = ((start[0] + end[0]) // 2, (start[1] + end[1]) // 2)
+                captured.append((mid, self.board[mid[1]][mid[0]]))
+            self.move_piece(start, end)
+        self.count_quiet_move(piece, bool(captured))
+        self.switch_turn()
+        return token
+
+    def unmake_move(self, token):
+        """Отменяет ход, выполненный make_move.
+
+        Аргументы:
+            token (tuple): Токен, который вернул make_move.
+        """
+        path, piece, captured, self.zobrist_key, self.quiet_king_moves = token
+        (start_x, start_y), (end_x, end_y) = path[0], path[-1]
+        self.board[end_y][end_x] = None
+        self.board[start_y][start_x] = piece
+        for (x, y), captured_piece in captured:
+            self.board[y][x] = captured_piece
+        self.side_to_move = 'black' if self.side_to_move == 'white' else 'white'
+
+    def perft(self, depth, divide=False):
+        """Считает число позиций на заданной глубине (perft).
+
+        Аргументы:
+            depth (int): Глубина в ходах (серия прыжков — один ход).
+            divide (bool, optional): Если True, возвращает словарь {ход: число позиций}.
+
+        Возвращает:
+            int | dict: Число листьев дерева ходов или разбивку по первым ходам.
+        """
+        if depth == 0:
+            return 1
+        moves = self.generate_moves(self.side_to_move)
+        if depth == 1 and not divide:
+            return len(moves)
+        counts = {}
+        for move in moves:
+            token = self.make_move(move)
+            counts[move] = self.perft(depth - 1)
+            self.unmake_move(token)
+        return counts if divide else sum(counts.values())
+
+
+class MoveResult:
+    """Результат хода, сделанного через CheckersGame.apply (без вывода на консоль).
+
+    Атрибуты:
+        ok (bool): Выполнен ли ход.
+        turn (str): Цвет стороны, которая ходит теперь.
+        move_count (int): Число выполненных ходов в партии.
+        message (str): Причина отказа, если ход не выполнен, иначе None.
+        move (str): Выполненный ход в нотации игры (например, 'c3 -> e5 -> g7') или None.
+        additional_jump (bool): Серия прыжков не закончена, и той же фишкой нужно бить дальше.
+        mandatory_captures (list): Обязательные серии прыжков стороны turn
+            (None, если состояние не проверялось).
+        game_over (bool): У стороны turn нет ходов, и она проиграла
+            (None, если состояние не проверялось).
+        draw (str): Причина ничьей ('repetition' или 'king_moves', см. CheckersBoard.draw_reason) или None.
+    """
+
+    __slots__ = ('ok', 'turn', 'move_count', 'message', 'move', 'additional_jump', 'mandatory_captures', 'game_over',
+                 'draw')
+
+    def __init__(self, ok, turn, move_count, message=None, move=None, additional_jump=False,
+                 mandatory_captures=None, game_over=None, draw=None):
+        """Инициализирует результат хода."""
+        self.ok = ok
+        self.turn = turn
+        self.move_count = move_count
+        self.message = message
+        self.move = move
+        self.additional_jump = additional_jump
+        self.mandatory_captures = mandatory_captures
+        self.game_over = game_over
+        self.draw = draw
+
+    def __repr__(self):
+        return (f"MoveResult(ok={self.ok}, move={self.move!r}, turn={self.turn}, move_count={self.move_count}, "
+                f"additional_jump={self.additional_jump}, game_over={self.game_over}, draw={self.draw!r}, "
+                f"message={self.message!r})")
+
 
 class CheckersGame:
     """Класс, управляющий игрой в шашки.
@@ -152,67 +414,163 @@ class CheckersGame:
     Атрибуты:
         board (CheckersBoard): Объект доски.
         current_turn (str): Цвет текущего игрока ('white' или 'black').
+        move_count (int): Число выполненных ходов.
+        move_history (list): Выполненные шаги и прыжки в нотации игры (например, 'c3 -> d4').
+        players (dict): Компьютерные игроки по цвету (объекты с методом choose_move(board)).
+        jump_path (tuple): Клетки начатой, но не законченной серии прыжков или None.
+        renderer (FrameRenderer): Вывод доски в play (см. render.py).
+        book (OpeningBook): Книга дебютов компьютерных игроков или None.
     """
 
-    def __init__(self):
-        """Инициализирует игру с начальной доской и ходом белых."""
+    def __init__(self, players=None, renderer=None, book=None):
+        """Инициализирует игру с начальной доской и ходом белых.
+
+        Аргументы:
+            players (dict, optional): Цвет -> компьютерный игрок, например
+                {'black': checkers_engine.CheckersSearchEngine(time_limit=1.0)}.
+            renderer (FrameRenderer, optional): Вывод доски: FrameRenderer (по умолчанию, кадр
+                одной записью), DiffRenderer (только изменения) или NullRenderer (без вывода).
+            book (OpeningBook, optional): Книга дебютов варианта 'checkers' (см. book.py): пока позиция
+                есть в книге, компьютерные игроки ходят по ней, не запуская поиск.
+
+        Исключения:
+            ValueError: Если книга построена для другого варианта.
+        """
+        if book is not None and book.variant != 'checkers':
+            raise ValueError(f"Книга дебютов построена для варианта {book.variant}")
         self.board = CheckersBoard()
         self.current_turn = 'white'
+        self.move_count = 0
+        self.move_history = []
+        self.players = players or {}
+        self.jump_path = None
+        self.renderer = renderer or FrameRenderer()
+        self.book = book
+
+    def status(self):
+        """Возвращает состояние партии для стороны, которая ходит.
+
+        Возвращает:
+            MoveResult: Результат с ok=True, move=None, обязательными прыжками, признаком конца игры
+                и причиной ничьей.
+        """
+        draw = None
+        if self.jump_path is not None:
+            captures, game_over = self.get_mandatory_captures(), False
+        else:
+            moves = self.board.generate_moves(self.current_turn)
+            captures = [path for path in moves if abs(path[0][0] - path[1][0]) == 2]
+            game_over = not moves
+            draw = self.board.draw_reason() if moves else None
+        return MoveResult(True, self.current_turn, self.move_count, additional_jump=self.jump_path is not None,
+                          mandatory_captures=captures, game_over=game_over, draw=draw)
+
+    def apply(self, move_str, check_status=True):
+        """Делает ход без ввода и вывода на консоль.
+
+        Аргументы:
+            move_str (str): Ход в нотации игры: один шаг или прыжок ('c3 d4', 'c3 -> d4', 'c3d4')
+                либо серия прыжков целиком ('c3 e5 g7' или 'c3 -> e5 -> g7').
+            check_status (bool, optional): Проверять ли обязательные прыжки и конец игры после хода.
+                Если False, эти поля результата равны None.
+
+        Возвращает:
+            MoveResult: Результат хода; при ошибке ok=False и message с причиной.
+        """
+        words = move_str.replace('->', ' ').split()
+        if len(words) == 1 and len(words[0]) == 4:
+            words = [words[0][:2], words[0][2:]]
+        squares = [self.notation_to_indices(word) for word in words]
+        if len(squares) < 2 or None in squares:
+            return MoveResult(False, self.current_turn, self.move_count, "Некорректный ввод, попробуйте снова.")
+        if len(squares) > 2 and not any(path[:len(squares)] == tuple(squares)
+                                        for path in self.get_mandatory_captures()):
+            return MoveResult(False, self.current_turn, self.move_count, "Некорректный ход, попробуйте снова.")
+        for start, end in zip(squares, squares[1:]):
+            error = self._apply_step(start, end)
+            if error is not None:
+                return MoveResult(False, self.current_turn, self.move_count, error)
+
+        self.move_count += 1
+        result = self.status() if check_status else MoveResult(True, self.current_turn, self.move_count,
+                                                              additional_jump=self.jump_path is not None)
+        result.move = ' -> '.join(self.indices_to_notation(square) for square in squares)
+        return result
+
+    def _apply_step(self, start, end):
+        """Делает один шаг или прыжок стороны current_turn.
+
+        Возвращает:
+            str: Причина отказа или None, если шаг выполнен.
+        """
+        piece = self.board.board[start[1]][start[0]]
+        if not piece or piece.color != self.current_turn:
+            return "Некорректный ход, попробуйте снова."
+        mandatory_captures = self.get_mandatory_captures()
+        if mandatory_captures and (start, end) not in [(path[0], path[1]) for path in mandatory_captures]:
+            return "Вы должны выполнить обязательный прыжок."
+        capture = piece.can_capture(self.board.board, start, end)
+        if not capture and not (piece.can_move(self.board.board, start, end)
+                                and self.board.board[end[1]][end[0]] is None and not mandatory_captures):
+            return "Некорректный ход, попробуйте снова."
+        self.board.move_piece(start, end)
+        self.move_history.append(f"{self.indices_to_notation(start)} -> {self.indices_to_notation(end)}")
+        self.board.count_quiet_move(piece, capture)
+        if capture and self.has_additional_jump(end):
+            self.jump_path = (self.jump_path or (start,)) + (end,)
+            return None
+        self.jump_path = None
+        self.current_turn = 'black' if self.current_turn == 'white' else 'white'
+        self.board.switch_turn()
+        self.board.position_counts[self.board.zobrist_key] += 1
+        return None
 
     def play(self):
         """Запускает игровой цикл.
 
-        Игроки по очереди вводят начальную и конечную позиции.
-        Проверяет обязательные прыжки, шах и выполняет ходы.
-        Завершает игру при мате или пате (не реализовано).
+        Игроки по очереди вводят начальную и конечную позиции, серия прыжков
+        вводится по одному прыжку; ходы выполняет apply. Компьютерные игроки делают
+        ход целиком. Завершает игру, когда у стороны нет ходов, или ничьей.
         """
-        counter = 0
+        status = self.status()
         while True:
+            self.renderer.draw(self.board)
             print(f"Ход {'белых' if self.current_turn == 'white' else 'черных'}")
-            self.board.display_board()
-
-            mandatory_captures = self.get_mandatory_captures()
-            if mandatory_captures:
-                print("Обязательные прыжки:")
-                for start, end in mandatory_captures:
-                    print(f"{self.indices_to_notation(start)} -> {self.indices_to_notation(end)}")
-            
-            start = input("Введите начальную позицию (например, 'c3'): ")
-            end = input("Введите конечную позицию (например, 'd4'): ")
-            
-            start = self.notation_to_indices(start)
-            end = self.notation_to_indices(end)
-            
-            if start is None or end is None:
-                print("Некорректный ввод, попробуйте снова.")
-                continue
-            
-            piece = self.board.board[start[1]][start[0]]
-            if not piece or piece.color != self.current_turn:
-                print("Некорректный ход, попробуйте снова.")
-                continue
- 
-            if mandatory_captures and (start, end) not in mandatory_captures:
-                print("Вы должны выполнить обязательный прыжок.")
-                continue
-            
-            if piece.can_capture(self.board.board, start, end):
-                self.board.move_piece(start, end)
-                if self.has_additional_jump(end):
-                    print("Вы можете продолжить прыжок.")
-                else:
-                    self.current_turn = 'black' if self.current_turn == 'white' else 'white'
-                print("Ход выполнен")
-                counter += 1
-                print(f'Количество ходов: {counter}')
-            elif piece.can_move(self.board.board, start, end) and not mandatory_captures:
-                self.board.move_piece(start, end)
-                self.current_turn = 'black' if self.current_turn == 'white' else 'white'
+
+            if status.game_over:
+                print(f"Ходов нет! {'Белые' if self.current_turn == 'white' else 'Черные'} проиграли.")
+                break
+            if status.draw == 'repetition':
+                print("Позиция повторилась трижды. Игра окончена вничью.")
+                break
+            if status.draw == 'king_moves':
+                print(f"{KING_MOVE_LIMIT // 2} ходов только дамками без взятий. Игра окончена вничью.")
+                break
+
+            player = self.players.get(self.current_turn)
+            if player is not None and not status.additional_jump:
+                path = self.book.choose_move(self.board) if self.book is not None else None
+                path = path or player.choose_move(self.board)
+                move_str = ' -> '.join(self.indices_to_notation(square) for square in path)
+                print(f"Ход компьютера: {move_str}")
+            else:
+                if status.mandatory_captures:
+                    print("Обязательные прыжки:")
+                    for path in status.mandatory_captures:
+                        print(' -> '.join(self.indices_to_notation(square) for square in path))
+                start = input("Введите начальную позицию (например, 'c3'): ")
+                end = input("Введите конечную позицию (например, 'd4'): ")
+                move_str = f"{start} {end}"
+
+            result = self.apply(move_str)
+            if result.ok:
+                status = result
+                if result.additional_jump:
+                    print("Вы должны продолжить прыжок.")
                 print("Ход выполнен")
-                counter += 1
-                print(f'Количество ходов: {counter}')
+                print(f'Количество ходов: {result.move_count}')
             else:
-                print("Некорректный ход, попробуйте снова.")
+                print(result.message)
 
     def notation_to_indices(self, notation):
         """Преобразует нотацию (например, 'c3') в индексы (x, y).
@@ -223,7 +581,7 @@ class CheckersGame:
         Возвращает:
             tuple: Кортеж (x, y) или None, если нотация некорректна.
         """
-        if len(notation) != 2:
+        if len(notation) != 2 or notation[0] not in 'abcdefgh' or notation[1] not in '12345678':
             return None
         x = ord(notation[0]) - ord('a')
         y = 8 - int(notation[1])
@@ -266,25 +624,22 @@ class CheckersGame:
         return False
 
     def get_mandatory_captures(self):
-        """Возвращает список обязательных прыжков для текущего игрока.
+        """Возвращает обязательные серии прыжков для текущего игрока.
 
         Возвращает:
-            list: Список кортежей ((start_x, start_y), (end_x, end_y)) с возможными захватами.
+            list: Список путей ((x0, y0), (x1, y1), ...) — полных серий прыжков
+                до клетки, с которой бить уже некого.
 
         Примечания:
-            В шашках обязательны прыжки, если они возможны.
+            В шашках обязательны прыжки, если они возможны. Во время начатой серии
+            (jump_path) возвращаются только ее продолжения с текущей клетки фишки.
         """
-        captures = []
-        for y in range(8):
-            for x in range(8):
-                piece = self.board.board[y][x]
-                if piece and piece.color == self.current_turn:
-                    for dx, dy in [(2, 2), (2, -2), (-2, 2), (-2, -2)]:
-                        new_x, new_y = x + dx, y + dy
-                        if 0 <= new_x < 8 and 0 <= new_y < 8:
-                            if piece.can_capture(self.board.board, (x, y), (new_x, new_y)):
-                                captures.append(((x, y), (new_x, new_y)))
-        return captures
+        if self.jump_path is not None:
+            sequences = []
+            self.board._collect_jumps((self.jump_path[-1],), sequences)
+            return sequences
+        moves = self.board.generate_moves(self.current_turn)
+        return [path for path in moves if abs(path[0][0] - path[1][0]) == 2]
 
 if __name__ == "__main__":
     """Запускает игру в шашки."""
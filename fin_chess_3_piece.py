@@ -1,3 +1,64 @@
+import sys
+from collections import Counter
+
+import chess_state
+import fen
+import zobrist
+from bitboard import BitboardChessBoard
+from render import FrameRenderer
+from status_cache import StatusCache
+
+ROOK_DIRECTIONS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+BISHOP_DIRECTIONS = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+QUEEN_DIRECTIONS = ROOK_DIRECTIONS + BISHOP_DIRECTIONS
+KNIGHT_OFFSETS = ((1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2))
+KING_OFFSETS = QUEEN_DIRECTIONS
+SQUARES = tuple((x, y) for y in range(8) for x in range(8))
+
+
+def _jump_table(offsets):
+    """Строит словарь: клетка -> кортеж клеток доски, смещенных от нее на offsets."""
+    return {(x, y): tuple((x + dx, y + dy) for dx, dy in offsets if 0 <= x + dx < 8 and 0 <= y + dy < 8)
+            for x, y in SQUARES}
+
+
+def _ray_table(directions):
+    """Строит словарь: клетка -> кортеж лучей, каждый луч упорядочен от клетки к краю доски."""
+    table = {}
+    for x, y in SQUARES:
+        rays = []
+        for step_x, step_y in directions:
+            ray = []
+            ray_x, ray_y = x + step_x, y + step_y
+            while 0 <= ray_x < 8 and 0 <= ray_y < 8:
+                ray.append((ray_x, ray_y))
+                ray_x += step_x
+                ray_y += step_y
+            if ray:
+                rays.append(tuple(ray))
+        table[(x, y)] = tuple(rays)
+    return table
+
+
+def _path_table(ray_table):
+    """Строит словарь: (start, end) -> кортеж клеток между ними для клеток на одном луче."""
+    return {(start, ray[i]): ray[:i] for start, rays in ray_table.items() for ray in rays for i in range(len(ray))}
+
+
+# Таблицы ходов строятся один раз при импорте и используются фигурами вместо вычислений
+KNIGHT_TARGETS = _jump_table(KNIGHT_OFFSETS)
+KING_TARGETS = _jump_table(KING_OFFSETS)
+PAWN_CAPTURES = {'white': _jump_table(((-1, 1), (1, 1))), 'black': _jump_table(((-1, -1), (1, -1)))}
+ROOK_RAYS = _ray_table(ROOK_DIRECTIONS)
+BISHOP_RAYS = _ray_table(BISHOP_DIRECTIONS)
+QUEEN_RAYS = {square: ROOK_RAYS[square] + BISHOP_RAYS[square] for square in SQUARES}
+ROOK_PATHS = _path_table(ROOK_RAYS)
+BISHOP_PATHS = _path_table(BISHOP_RAYS)
+# Прыжок Белого Кролика: (конечная клетка, две клетки пути) для каждого направления
+RABBIT_TARGETS = {square: tuple((ray[2], ray[:2]) for ray in QUEEN_RAYS[square] if len(ray) >= 3) for square in SQUARES}
+RABBIT_PATHS = {(square, end): path for square in SQUARES for end, path in RABBIT_TARGETS[square]}
+
+
 class ChessPiece:
     """Базовый класс для всех фигур в шахматах.
 
@@ -6,6 +67,27 @@ class ChessPiece:
         symbol (str): Символ фигуры для отображения на доске (например, 'P' для белого пешки, 'p' для черного).
     """
 
+    __slots__ = ('color', 'symbol')
+    # Фигуры без изменяемого состояния (shared = True) хранятся в одном экземпляре
+    # на цвет: Pawn('white') всегда возвращает одну и ту же пешку.
+    shared = False
+    # Ход фигуры необратим, как ход пешки, и обнуляет счетчик полуходов
+    resets_halfmove_clock = False
+    _shared_instances = {}
+
+    def __new__(cls, color, *args):
+        """Возвращает общий экземпляр для фигур без состояния или новый объект для остальных."""
+        if not cls.shared:
+            return super().__new__(cls)
+        piece = ChessPiece._shared_instances.get((cls, color))
+        if piece is None:
+            piece = ChessPiece._shared_instances[cls, color] = super().__new__(cls)
+        return piece
+
+    def __getnewargs__(self):
+        """Аргументы __new__ для pickle: общая фигура восстанавливается тем же экземпляром."""
+        return (self.color,)
+
     def __init__(self, color, symbol):
         """Инициализирует фигуру с указанным цветом и символом.
 
@@ -29,6 +111,79 @@ class ChessPiece:
         """
         raise NotImplementedError("Subclasses should implement this method")
 
+    def zobrist_kind(self):
+        """Возвращает вид фигуры с ее состоянием для ключа Зобриста.
+
+        Возвращает:
+            str: Имя класса; фигуры с изменяемым состоянием добавляют его к имени.
+        """
+        return type(self).__name__
+
+    def on_move_applied(self, board, start, end):
+        """Обновляет состояние фигуры при выполнении ее хода.
+
+        Аргументы:
+            board (list): Двумерный список (8x8), представляющий шахматную доску.
+            start (tuple): Кортеж (x, y) с начальной позицией фигуры.
+            end (tuple): Кортеж (x, y) с конечной позицией.
+
+        Примечания:
+            Вызывается доской непосредственно перед перестановкой фигуры, поэтому
+            board[end] еще содержит взятую фигуру. can_move и possible_moves состояние
+            не меняют, так что проверки ходов можно повторять и кэшировать.
+            По умолчанию ничего не делает.
+        """
+
+    def possible_moves(self, board, start):
+        """Перебирает клетки, на которые фигура может пойти с позиции start.
+
+        Аргументы:
+            board (list): Двумерный список (8x8), представляющий шахматную доску.
+            start (tuple): Кортеж (x, y) с начальной позицией фигуры.
+
+        Возвращает:
+            generator: Кортежи (x, y) с конечными позициями. Шах своему королю не учитывается.
+
+        Примечания:
+            Базовая реализация проверяет все 64 клетки через can_move, поэтому новые фигуры
+            работают и без собственного генератора. Подклассы переопределяют метод,
+            перебирая только клетки своего шаблона хода.
+        """
+        for y in range(8):
+            for x in range(8):
+                target = board[y][x]
+                if (x, y) != start and (target is None or target.color != self.color) and self.can_move(board, start, (x, y)):
+                    yield (x, y)
+
+    def _ray_moves(self, board, rays):
+        """Перебирает клетки вдоль лучей до первой занятой клетки (включая ее, если там чужая фигура)."""
+        for ray in rays:
+            for x, y in ray:
+                target = board[y][x]
+                if target is None:
+                    yield (x, y)
+                else:
+                    if target.color != self.color:
+                        yield (x, y)
+                    break
+
+    def _offset_moves(self, board, targets):
+        """Перебирает клетки из таблицы targets, не занятые своими фигурами."""
+        for x, y in targets:
+            target = board[y][x]
+            if target is None or target.color != self.color:
+                yield (x, y)
+
+    @staticmethod
+    def _is_path_clear(board, path):
+        """Проверяет, что все клетки path (из таблицы путей) свободны."""
+        if path is None:
+            return False
+        for x, y in path:
+            if board[y][x] is not None:
+                return False
+        return True
+
 
 class Pawn(ChessPiece):
     """Класс, представляющий пешку в шахматах.
@@ -38,6 +193,10 @@ class Pawn(ChessPiece):
         symbol (str): Символ пешки ('P' для белой, 'p' для черной).
     """
 
+    __slots__ = ()
+    shared = True
+    resets_halfmove_clock = True
+
     def __init__(self, color):
         """Инициализирует пешку с указанным цветом.
 
@@ -80,6 +239,22 @@ class Pawn(ChessPiece):
         
         return False
 
+    def possible_moves(self, board, start):
+        """Перебирает ходы пешки: шаг вперед, двойной шаг с начальной позиции и взятия по диагонали."""
+        start_x, start_y = start
+        direction = 1 if self.color == 'white' else -1
+        y = start_y + direction
+        if not 0 <= y < 8:
+            return
+        if board[y][start_x] is None:
+            yield (start_x, y)
+            if (self.color == 'white' and start_y == 1) or (self.color == 'black' and start_y == 6):
+                if board[y + direction][start_x] is None:
+                    yield (start_x, y + direction)
+        for x, y in PAWN_CAPTURES[self.color][start]:
+            if board[y][x] is not None and board[y][x].color != self.color:
+                yield (x, y)
+
 
 class Rook(ChessPiece):
     """Класс, представляющий ладью в шахматах.
@@ -89,6 +264,9 @@ class Rook(ChessPiece):
         symbol (str): Символ ладьи ('R' для белой, 'r' для черной).
     """
 
+    __slots__ = ()
+    shared = True
+
     def __init__(self, color):
         """Инициализирует ладью с указанным цветом.
 
@@ -111,21 +289,11 @@ class Rook(ChessPiece):
         Примечания:
             Ладья может двигаться по вертикали или горизонтали, но путь должен быть свободен.
         """
-        start_x, start_y = start
-        end_x, end_y = end
-        if start_x != end_x and start_y != end_y:
-            return False
-        if start_x == end_x:
-            step = 1 if end_y > start_y else -1
-            for y in range(start_y + step, end_y, step):
-                if board[y][start_x] is not None:
-                    return False
-        else:
-            step = 1 if end_x > start_x else -1
-            for x in range(start_x + step, end_x, step):
-                if board[start_y][x] is not None:
-                    return False
-        return True
+        return self._is_path_clear(board, ROOK_PATHS.get((start, end)))
+
+    def possible_moves(self, board, start):
+        """Перебирает ходы ладьи по вертикалям и горизонталям."""
+        return self._ray_moves(board, ROOK_RAYS[start])
 
 
 class Knight(ChessPiece):
@@ -136,6 +304,9 @@ class Knight(ChessPiece):
         symbol (str): Символ коня ('N' для белого, 'n' для черного).
     """
 
+    __slots__ = ()
+    shared = True
+
     def __init__(self, color):
         """Инициализирует коня с указанным цветом.
 
@@ -158,8 +329,11 @@ class Knight(ChessPiece):
         Примечания:
             Конь ходит буквой "L" (на 2 клетки в одном направлении и 1 в перпендикулярном).
         """
-        dx, dy = abs(start[0] - end[0]), abs(start[1] - end[1])
-        return (dx, dy) in [(2, 1), (1, 2)]
+        return end in KNIGHT_TARGETS[start]
+
+    def possible_moves(self, board, start):
+        """Перебирает ходы коня буквой "L"."""
+        return self._offset_moves(board, KNIGHT_TARGETS[start])
 
 
 class Bishop(ChessPiece):
@@ -170,6 +344,9 @@ class Bishop(ChessPiece):
         symbol (str): Символ слона ('B' для белого, 'b' для черного).
     """
 
+    __slots__ = ()
+    shared = True
+
     def __init__(self, color):
         """Инициализирует слона с указанным цветом.
 
@@ -192,19 +369,11 @@ class Bishop(ChessPiece):
         Примечания:
             Слон движется по диагонали, путь должен быть свободен.
         """
-        start_x, start_y = start
-        end_x, end_y = end
-        if abs(start_x - end_x) != abs(start_y - end_y):
-            return False
-        step_x = 1 if end_x > start_x else -1
-        step_y = 1 if end_y > start_y else -1
-        x, y = start_x + step_x, start_y + step_y
-        while x != end_x and y != end_y:
-            if board[y][x] is not None:
-                return False
-            x += step_x
-            y += step_y
-        return True
+        return self._is_path_clear(board, BISHOP_PATHS.get((start, end)))
+
+    def possible_moves(self, board, start):
+        """Перебирает ходы слона по диагоналям."""
+        return self._ray_moves(board, BISHOP_RAYS[start])
 
 
 class Queen(ChessPiece):
@@ -215,6 +384,9 @@ class Queen(ChessPiece):
         symbol (str): Символ ферзя ('Q' для белого, 'q' для черного).
     """
 
+    __slots__ = ()
+    shared = True
+
     def __init__(self, color):
         """Инициализирует ферзя с указанным цветом.
 
@@ -239,6 +411,10 @@ class Queen(ChessPiece):
         """
         return Rook.can_move(self, board, start, end) or Bishop.can_move(self, board, start, end)
 
+    def possible_moves(self, board, start):
+        """Перебирает ходы ферзя по вертикалям, горизонталям и диагоналям."""
+        return self._ray_moves(board, QUEEN_RAYS[start])
+
 
 class King(ChessPiece):
     """Класс, представляющий короля в шахматах.
@@ -248,6 +424,9 @@ class King(ChessPiece):
         symbol (str): Символ короля ('K' для белого, 'k' для черного).
     """
 
+    __slots__ = ()
+    shared = True
+
     def __init__(self, color):
         """Инициализирует короля с указанным цветом.
 
@@ -270,8 +449,11 @@ class King(ChessPiece):
         Примечания:
             Король может двигаться на одну клетку в любом направлении.
         """
-        dx, dy = abs(start[0] - end[0]), abs(start[1] - end[1])
-        return max(dx, dy) == 1
+        return end in KING_TARGETS[start]
+
+    def possible_moves(self, board, start):
+        """Перебирает ходы короля на одну клетку в любом направлении."""
+        return self._offset_moves(board, KING_TARGETS[start])
 
 
 class Whiterabbit(ChessPiece):
@@ -282,6 +464,9 @@ class Whiterabbit(ChessPiece):
         symbol (str): Символ фигуры ('W' для белого, 'w' для черного).
     """
 
+    __slots__ = ()
+    shared = True
+
     def __init__(self, color):
         """Инициализирует Белого Кролика с указанным цветом.
 
@@ -305,24 +490,18 @@ class Whiterabbit(ChessPiece):
             Белый Кролик может двигаться ровно на 3 клетки по горизонтали, вертикали или диагонали,
             при условии, что путь свободен.
         """
-        start_x, start_y = start
-        end_x, end_y = end
-        dx = abs(start_x - end_x)
-        dy = abs(start_y - end_y)
-        
-        # Может ходить только на 3 клетки по диагонали, вертикали или горизонтали
-        if (dx == 3 and dy == 0) or (dx == 0 and dy == 3) or (dx == 3 and dy == 3):
-            # Проверка, что на пути нет фигур
-            step_x = (end_x - start_x) // 3
-            step_y = (end_y - start_y) // 3
-            x, y = start_x + step_x, start_y + step_y
-            while x != end_x or y != end_y:
-                if board[y][x] is not None:
-                    return False
-                x += step_x
-                y += step_y
-            return True
-        return False
+        # Может ходить только на 3 клетки по диагонали, вертикали или горизонтали,
+        # путь берется из таблицы прыжков
+        return self._is_path_clear(board, RABBIT_PATHS.get((start, end)))
+
+    def possible_moves(self, board, start):
+        """Перебирает прыжки Белого Кролика ровно на 3 клетки по свободному пути."""
+        for (end_x, end_y), path in RABBIT_TARGETS[start]:
+            if not self._is_path_clear(board, path):
+                continue
+            target = board[end_y][end_x]
+            if target is None or target.color != self.color:
+                yield (end_x, end_y)
 
 
 class KittyCheshire(ChessPiece):
@@ -333,6 +512,9 @@ class KittyCheshire(ChessPiece):
         symbol (str): Символ фигуры ('C' для белого, 'c' для черного, может измениться при захвате).
     """
 
+    __slots__ = ()
+    resets_halfmove_clock = True
+
     def __init__(self, color):
         """Инициализирует Чеширского Кота с указанным цветом.
 
@@ -353,7 +535,8 @@ class KittyCheshire(ChessPiece):
             bool: True, если ход возможен, иначе False.
 
         Примечания:
-            Чеширский Кот ходит как пешка, но при захвате фигуры противника принимает ее символ.
+            Чеширский Кот ходит как пешка, но при захвате фигуры противника принимает ее символ
+            (см. on_move_applied).
         """
         start_x, start_y = start
         end_x, end_y = end
@@ -371,12 +554,25 @@ class KittyCheshire(ChessPiece):
             return True
         
         if abs(start_x - end_x) == 1 and end_y == start_y + direction and board[end_y][end_x] is not None and board[end_y][end_x].color != self.color:
-            # Превращается в фигуру, которую съела
-            self.symbol = board[end_y][end_x].symbol
             return True
         
         return False
 
+    def zobrist_kind(self):
+        """Чеширский Кот с другим символом — другое состояние позиции."""
+        return f"KittyCheshire:{self.symbol}"
+
+    def on_move_applied(self, board, start, end):
+        """При взятии Чеширский Кот принимает символ съеденной фигуры."""
+        captured = board[end[1]][end[0]]
+        if captured is not None:
+            # Превращается в фигуру, которую съела
+            self.symbol = captured.symbol
+
+    def possible_moves(self, board, start):
+        """Перебирает ходы Чеширского Кота (как у пешки), не меняя его символ."""
+        return Pawn.possible_moves(self, board, start)
+
 
 class AppleWhite(ChessPiece):
     """Класс, представляющий фигуру Белоснежка в шахматах.
@@ -387,6 +583,8 @@ class AppleWhite(ChessPiece):
         has_moved (bool): Флаг, указывающий, двигалась ли фигура.
     """
 
+    __slots__ = ('has_moved',)
+
     def __init__(self, color):
         """Инициализирует Белоснежку с указанным цветом.
 
@@ -422,21 +620,166 @@ class AppleWhite(ChessPiece):
         if isinstance(target_piece, King):
             return False
         
-        self.has_moved = True
         return True
 
+    def zobrist_kind(self):
+        """Сходившая Белоснежка отличается от несходившей."""
+        return "AppleWhite:moved" if self.has_moved else "AppleWhite"
+
+    def on_move_applied(self, board, start, end):
+        """Белоснежка расходует свой единственный ход."""
+        self.has_moved = True
+
+    def possible_moves(self, board, start):
+        """Перебирает клетки для единственного хода Белоснежки, не расходуя его."""
+        if self.has_moved:
+            return
+        for y in range(8):
+            for x in range(8):
+                target = board[y][x]
+                if target is None or (target.color != self.color and not isinstance(target, King)):
+                    yield (x, y)
+
+
+# Фигуры, в которые превращается пешка, по буквам из chess_state.PROMOTIONS
+PROMOTION_PIECES = {'Q': Queen, 'R': Rook, 'B': Bishop, 'N': Knight}
+
+
+class Move:
+    """Класс, представляющий ход фигуры.
+
+    Атрибуты:
+        start (tuple): Кортеж (x, y) с начальной позицией фигуры.
+        end (tuple): Кортеж (x, y) с конечной позицией.
+        promotion (str): Буква фигуры, в которую превращается пешка ('Q', 'R', 'B' или 'N'), или None.
+    """
+
+    __slots__ = ('start', 'end', 'promotion')
+
+    def __init__(self, start, end, promotion=None):
+        """Инициализирует ход с начальной и конечной позицией.
+
+        Аргументы:
+            start (tuple): Кортеж (x, y) с начальной позицией фигуры.
+            end (tuple): Кортеж (x, y) с конечной позицией.
+            promotion (str, optional): Буква фигуры для превращения пешки на последнем ряду;
+                если не задана, пешка превращается в ферзя.
+        """
+        self.start = start
+        self.end = end
+        self.promotion = promotion
+
+    def __eq__(self, other):
+        return (isinstance(other, Move) and self.start == other.start and self.end == other.end and
+                self.promotion == other.promotion)
+
+    def __hash__(self):
+        return hash((self.start, self.end, self.promotion))
+
+    def __repr__(self):
+        if self.promotion:
+            return f"Move({self.start}, {self.end}, {self.promotion!r})"
+        return f"Move({self.start}, {self.end})"
+
 
 class ChessBoard:
     """Класс, представляющий шахматную доску.
 
     Атрибуты:
         board (list): Двумерный список (8x8), содержащий фигуры или None.
+        king_positions (dict): Текущие позиции королей по цвету ('white' и 'black').
+        side_to_move (str): Цвет стороны, которая делает следующий ход.
+        zobrist_key (int): Ключ Зобриста позиции, обновляется при каждом ходе.
+        state (int): Права на рокировку, столбец взятия на проходе и счетчик полуходов
+            одним числом (см. chess_state); прежнее значение хранится в токене отмены хода.
+        halfmove_clock (int): Полуходы с последнего взятия или хода пешки (из state).
+        en_passant (tuple): Клетка, на которую side_to_move может взять на проходе, или None.
+        position_counts (Counter): Ключ Зобриста -> сколько раз позиция встретилась в партии.
     """
 
-    def __init__(self):
-        """Инициализирует шахматную доску с начальной расстановкой фигур."""
+    def __init__(self, fen=None):
+        """Инициализирует шахматную доску с начальной расстановкой фигур.
+
+        Аргументы:
+            fen (str, optional): Позиция в FEN (см. fen.py) вместо начальной расстановки.
+
+        Исключения:
+            ValueError: Если строка FEN некорректна.
+        """
         self.board = [[None for _ in range(8)] for _ in range(8)]
+        if fen is not None:
+            self.load_fen(fen)
+            return
         self.setup_board()
+        self.king_positions = self._find_kings()
+        self.side_to_move = 'white'
+        self.state = chess_state.castling_from_board(self.board)
+        self.zobrist_key = zobrist.board_key(self.board, self.side_to_move, self.state)
+        self.reset_history()
+
+    @property
+    def halfmove_clock(self):
+        """Полуходы с последнего взятия или хода пешки."""
+        return self.state >> chess_state.CLOCK_SHIFT
+
+    @property
+    def en_passant(self):
+        """Клетка, на которую side_to_move может взять на проходе, или None."""
+        return chess_state.en_passant_square(self.state, self.side_to_move)
+
+    def reset_history(self, halfmove_clock=0):
+        """Начинает историю партии с текущей позиции.
+
+        Аргументы:
+            halfmove_clock (int, optional): Начальное значение счетчика полуходов.
+        """
+        self.state = self.state & chess_state.FLAGS_MASK | halfmove_clock << chess_state.CLOCK_SHIFT
+        self.position_counts = Counter({self.zobrist_key: 1})
+
+    def draw_reason(self):
+        """Возвращает причину ничьей в текущей позиции.
+
+        Возвращает:
+            str: 'repetition' (позиция повторилась трижды), 'fifty_moves' (правило 50 ходов)
+                или None. Проверка не просматривает прошлые позиции: счетчики ведет move_piece.
+        """
+        if self.position_counts[self.zobrist_key] >= chess_state.REPETITION_LIMIT:
+            return 'repetition'
+        if self.halfmove_clock >= chess_state.FIFTY_MOVE_LIMIT:
+            return 'fifty_moves'
+        return None
+
+    def _find_kings(self):
+        """Находит королей на доске полным просмотром (используется только при расстановке)."""
+        positions = {'white': None, 'black': None}
+        for y in range(8):
+            for x in range(8):
+                piece = self.board[y][x]
+                if isinstance(piece, King):
+                    positions[piece.color] = (x, y)
+        return positions
+
+    def king_square(self, color):
+        """Возвращает позицию короля указанного цвета.
+
+        Аргументы:
+            color (str): Цвет короля ('white' или 'black').
+
+        Возвращает:
+            tuple: Кортеж (x, y) или None, если короля нет на доске.
+        """
+        return self.king_positions[color]
+
+    def piece_at(self, square):
+        """Возвращает фигуру на клетке.
+
+        Аргументы:
+            square (tuple): Кортеж (x, y) с клеткой.
+
+        Возвращает:
+            ChessPiece: Фигура или None, если клетка пуста.
+        """
+        return self.board[square[1]][square[0]]
 
     def setup_board(self):
         """Настраивает начальную позицию фигур на доске.
@@ -458,23 +801,47 @@ class ChessBoard:
         self.board[6][5] = KittyCheshire('black')  
         self.board[7][0] = AppleWhite('black')  
 
-    def display_board(self):
-        """Отображает текущую доску в консоли.
+    def load_fen(self, text):
+        """Заменяет позицию на доске позицией из FEN.
+
+        Аргументы:
+            text (str): Позиция в FEN.
+
+        Возвращает:
+            tuple: (полуходы, номер хода) из FEN.
+
+        Исключения:
+            ValueError: Если строка FEN некорректна.
+        """
+        halfmove, fullmove = fen.load_fen(self, text)
+        self.reset_history(halfmove)
+        return halfmove, fullmove
+
+    def to_fen(self, fullmove=1):
+        """Возвращает позицию в FEN с рокировками, взятием на проходе и счетчиком полуходов из state.
+
+        Аргументы:
+            fullmove (int, optional): Номер хода.
+        """
+        states = [(piece.zobrist_kind(), piece.color) if piece else None for row in self.board for piece in row]
+        return fen.board_fen(states, self.side_to_move, self.state, fullmove)
+
+    def render(self):
+        """Возвращает изображение доски одной строкой.
 
         Использует нотацию с буквами (a-h) для столбцов и цифрами (1-8) для строк.
         Пустые клетки обозначаются точкой ('.'), фигуры — их символами.
         """
-        print("  a b c d e f g h")
+        lines = ["  a b c d e f g h"]
         for y in range(8):
-            print(f"{8 - y} ", end="")
-            for x in range(8):
-                piece = self.board[y][x]
-                if piece:
-                    print(piece.symbol, end=" ")
-                else:
-                    print(".", end=" ")
-            print(f"{8 - y}")
-        print("  a b c d e f g h")
+            cells = ' '.join(piece.symbol if piece else '.' for piece in self.board[y])
+            lines.append(f"{8 - y} {cells} {8 - y}")
+        lines.append("  a b c d e f g h")
+        return '\n'.join(lines) + '\n'
+
+    def display_board(self):
+        """Отображает текущую доску в консоли одной записью (см. render)."""
+        sys.stdout.write(self.render())
 
     def is_valid_move(self, start, end, current_turn):
         """Проверяет, является ли ход с позиции start на позицию end допустимым.
@@ -489,49 +856,188 @@ class ChessBoard:
 
         Примечания:
             Учитывает принадлежность фигуры текущему игроку, правила движения и шах после хода.
+            Рокировка и взятие на проходе зависят от состояния позиции, а не только от
+            расстановки, поэтому проверяются доской, а не can_move фигуры.
         """
         piece = self.board[start[1]][start[0]]
         if not piece or piece.color != current_turn:
             return False
-        if not piece.can_move(self.board, start, end):
+        if isinstance(piece, King) and (start, end) in chess_state.CASTLING_MOVES:
+            return self._can_castle(start, end, current_turn)
+        target = self.board[end[1]][end[0]]
+        if target is not None and target.color == current_turn:
             return False
-        # Проверка на шах после хода
-        temp_board = [row[:] for row in self.board]
-        temp_board[end[1]][end[0]] = temp_board[start[1]][start[0]]
-        temp_board[start[1]][start[0]] = None
-        if self.is_check(current_turn, temp_board):
+        if not piece.can_move(self.board, start, end) and not self._is_en_passant(piece, start, end):
             return False
-        return True
+        return not self._leaves_king_in_check(Move(start, end), current_turn)
+
+    def _is_en_passant(self, piece, start, end):
+        """Проверяет, что ход start -> end — взятие на проходе пешкой piece стороны side_to_move."""
+        return (isinstance(piece, Pawn) and piece.color == self.side_to_move and end == self.en_passant and
+                end in PAWN_CAPTURES[piece.color][start])
+
+    def _can_castle(self, start, end, color):
+        """Проверяет рокировку короля color с клетки start на end.
+
+        Право на рокировку не потеряно, клетки между королем и ладьей свободны, король
+        не под шахом, не проходит через битую клетку и не встает под шах.
+        """
+        right, _, _, empty, passed = chess_state.CASTLING_MOVES[start, end]
+        if not self.state & right & chess_state.COLOR_RIGHTS[color]:
+            return False
+        for x, y in empty:
+            if self.board[y][x] is not None:
+                return False
+        other = 'black' if color == 'white' else 'white'
+        if self.is_check(color) or any(self.is_square_attacked(square, other) for square in passed):
+            return False
+        return not self._leaves_king_in_check(Move(start, end), color)
+
+    def _leaves_king_in_check(self, move, color):
+        """Проверяет, останется ли король цвета color под шахом после хода move.
 
-    def is_check(self, color, board=None):
+        Ход делается прямо на доске и сразу отменяется, копия доски не создается.
+        """
+        token = self.make_move(move)
+        in_check = self.is_check(color)
+        self.unmake_move(token)
+        return in_check
+
+    def generate_legal_moves(self, color):
+        """Перебирает все допустимые ходы игрока указанного цвета.
+
+        Аргументы:
+            color (str): Цвет игрока ('white' или 'black').
+
+        Возвращает:
+            generator: Объекты Move в порядке обхода доски.
+
+        Примечания:
+            Кандидаты берутся из possible_moves каждой фигуры (лучи, смещения, ходы пешки),
+            а не из перебора всех 64x64 пар клеток. Ходы вычисляются лениво, поэтому
+            доску нельзя менять, пока генератор не исчерпан. Ход пешки на последний ряд
+            дает по ходу на каждую фигуру превращения; взятия на проходе и рокировки
+            перебираются в конце.
+        """
+        for y in range(8):
+            for x in range(8):
+                piece = self.board[y][x]
+                if piece and piece.color == color:
+                    for end in piece.possible_moves(self.board, (x, y)):
+                        move = Move((x, y), end)
+                        if self._leaves_king_in_check(move, color):
+                            continue
+                        if isinstance(piece, Pawn) and (end[1] == 0 or end[1] == 7):
+                            for letter in chess_state.PROMOTIONS:
+                                yield Move((x, y), end, letter)
+                        else:
+                            yield move
+        yield from self._special_moves(color)
+
+    def _special_moves(self, color):
+        """Перебирает допустимые взятия на проходе и рокировки игрока color."""
+        target = self.en_passant if color == self.side_to_move else None
+        if target is not None:
+            # Своя пешка стоит на клетке, которую с target била бы пешка другого цвета
+            for x, y in PAWN_CAPTURES['black' if color == 'white' else 'white'][target]:
+                piece = self.board[y][x]
+                if isinstance(piece, Pawn) and piece.color == color:
+                    move = Move((x, y), target)
+                    if not self._leaves_king_in_check(move, color):
+                        yield move
+        if self.state & chess_state.COLOR_RIGHTS[color]:
+            for start, end in chess_state.CASTLING_MOVES:
+                if self._can_castle(start, end, color):
+                    yield Move(start, end)
+
+    def is_promotion(self, start, end):
+        """Проверяет, что ход start -> end — ход пешки на последний ряд (нужна фигура превращения)."""
+        return isinstance(self.board[start[1]][start[0]], Pawn) and (end[1] == 0 or end[1] == 7)
+
+    def has_legal_move(self, color):
+        """Проверяет, есть ли у игрока хотя бы один допустимый ход.
+
+        Аргументы:
+            color (str): Цвет игрока ('white' или 'black').
+
+        Возвращает:
+            bool: True, если ход есть. Перебор останавливается на первом найденном ходе.
+        """
+        for _ in self.generate_legal_moves(color):
+            return True
+        return False
+
+    def is_square_attacked(self, square, by_color, board=None):
+        """Проверяет, атакована ли клетка фигурами указанного цвета.
+
+        Аргументы:
+            square (tuple): Кортеж (x, y) с проверяемой клеткой.
+            by_color (str): Цвет атакующей стороны ('white' или 'black').
+            board (list, optional): Двумерный список доски. Если None, используется текущая доска.
+
+        Возвращает:
+            bool: True, если хотя бы одна фигура by_color бьет клетку square.
+
+        Примечания:
+            Лучи и смещения коня, короля и пешки расходятся от самой клетки, поэтому
+            проверка занимает ограниченное число шагов и не зависит от числа фигур.
+            Чеширский Кот бьет как пешка. Белоснежка не может встать на клетку с королем,
+            поэтому для шаха ее телепорт не проверяется; для остальных клеток
+            ищется ее несходившая копия.
+        """
+        if board is None:
+            board = self.board
+        for rays, attackers in ((ROOK_RAYS[square], (Rook, Queen)), (BISHOP_RAYS[square], (Bishop, Queen))):
+            for ray in rays:
+                for x, y in ray:
+                    piece = board[y][x]
+                    if piece is not None:
+                        if piece.color == by_color and isinstance(piece, attackers):
+                            return True
+                        break
+        for targets, attacker in ((KNIGHT_TARGETS[square], Knight), (KING_TARGETS[square], King)):
+            for x, y in targets:
+                piece = board[y][x]
+                if piece is not None and piece.color == by_color and isinstance(piece, attacker):
+                    return True
+        # Пешка бьет по диагонали вперед, значит стоит на клетке, которую бьет пешка другого цвета
+        for x, y in PAWN_CAPTURES['black' if by_color == 'white' else 'white'][square]:
+            piece = board[y][x]
+            if piece is not None and piece.color == by_color and isinstance(piece, (Pawn, KittyCheshire)):
+                return True
+        # Белый Кролик прыгает ровно на 3 клетки через две пустые
+        for (x, y), path in RABBIT_TARGETS[square]:
+            piece = board[y][x]
+            if piece is not None and piece.color == by_color and isinstance(piece, Whiterabbit) and ChessPiece._is_path_clear(board, path):
+                return True
+        # Белоснежка может переместиться на любую клетку, кроме клетки с королем
+        if not isinstance(board[square[1]][square[0]], King):
+            for y in range(8):
+                for x in range(8):
+                    piece = board[y][x]
+                    if isinstance(piece, AppleWhite) and piece.color == by_color and not piece.has_moved and (x, y) != square:
+                        return True
+        return False
+
+    def is_check(self, color, board=None, king_pos=None):
         """Проверяет, находится ли король указанного цвета под шахом.
 
         Аргументы:
             color (str): Цвет короля ('white' или 'black').
             board (list, optional): Двумерный список доски. Если None, используется текущая доска.
+            king_pos (tuple, optional): Позиция короля на board. Если None, берется
+                отслеживаемая позиция короля (поиск по доске не выполняется).
 
         Возвращает:
             bool: True, если король под шахом, иначе False.
         """
         if board is None:
             board = self.board
-        king_pos = None
-        for y in range(8):
-            for x in range(8):
-                piece = board[y][x]
-                if isinstance(piece, King) and piece.color == color:
-                    king_pos = (x, y)
-                    break
-            if king_pos:
-                break
+        if king_pos is None:
+            king_pos = self.king_positions[color]
         if not king_pos:
             return False
-        for y in range(8):
-            for x in range(8):
-                piece = board[y][x]
-                if piece and piece.color != color and piece.can_move(board, (x, y), king_pos):
-                    return True
-        return False
+        return self.is_square_attacked(king_pos, 'black' if color == 'white' else 'white', board)
 
     def is_checkmate(self, color):
         """Проверяет, является ли положение мата для указанного цвета.
@@ -548,20 +1054,7 @@ class ChessBoard:
         if not self.is_check(color):
             return False
         # Проверка, есть ли ходы, чтобы уйти от шаха
-        for y in range(8):
-            for x in range(8):
-                piece = self.board[y][x]
-                if piece and piece.color == color:
-                    for dy in range(8):
-                        for dx in range(8):
-                            if self.is_valid_move((x, y), (dx, dy), color):
-                                # Проверяем, уходит ли король из-под шаха
-                                temp_board = [row[:] for row in self.board]
-                                temp_board[dy][dx] = temp_board[y][x]
-                                temp_board[y][x] = None
-                                if not self.is_check(color, temp_board):
-                                    return False
-        return True
+        return not self.has_legal_move(color)
 
     def is_stalemate(self, color):
         """Проверяет, является ли положение пата для указанного цвета.
@@ -577,90 +1070,358 @@ class ChessBoard:
         """
         if self.is_check(color):
             return False
-        for y in range(8):
-            for x in range(8):
-                piece = self.board[y][x]
-                if piece and piece.color == color:
-                    for dy in range(8):
-                        for dx in range(8):
-                            if self.is_valid_move((x, y), (dx, dy), color):
-                                return False
-        return True
+        return not self.has_legal_move(color)
 
-    def move_piece(self, start, end):
-        """Выполняет ход фигуры с позиции start на позицию end.
+    def move_piece(self, start, end, promotion=None):
+        """Выполняет ход фигуры с позиции start на позицию end и записывает позицию в историю партии.
 
         Аргументы:
             start (tuple): Кортеж (x, y) с начальной позицией.
             end (tuple): Кортеж (x, y) с конечной позицией.
+            promotion (str, optional): Буква фигуры превращения пешки (по умолчанию ферзь).
         """
-        start_x, start_y = start
-        end_x, end_y = end
+        self.make_move(Move(start, end, promotion))
+        self.position_counts[self.zobrist_key] += 1
+
+    def make_move(self, move):
+        """Выполняет ход на доске с возможностью отмены.
+
+        Аргументы:
+            move (Move): Выполняемый ход.
+
+        Возвращает:
+            tuple: Токен отмены (ход, фигура, взятая фигура, прежнее состояние фигуры,
+                прежние ключ Зобриста и состояние позиции) для unmake_move.
+
+        Примечания:
+            Доска изменяется на месте. Вместе с ходом вызывается on_move_applied фигуры
+            (Чеширский Кот принимает символ взятой фигуры, Белоснежка расходует свой
+            единственный ход); unmake_move возвращает прежнее состояние.
+            Ключ Зобриста обновляется по XOR: фигура снимается со start, взятая
+            фигура — с end, фигура в новом состоянии (или фигура превращения) ставится
+            на end, меняются сторона и состояние позиции. Взятие на проходе,
+            превращение и рокировка — правила обычных пешек и короля: Чеширский Кот
+            ходит как пешка, но не превращается и не берет на проходе.
+        """
+        start_x, start_y = move.start
+        end_x, end_y = move.end
         piece = self.board[start_y][start_x]
-        self.board[end_y][end_x] = piece
+        captured = self.board[end_y][end_x]
+        state = self.state
+        token = (move, piece, captured, (piece.symbol, getattr(piece, 'has_moved', None)), self.zobrist_key, state)
+        key = self.zobrist_key ^ zobrist.SIDE_KEY ^ zobrist.piece_key(piece.zobrist_kind(), piece.color, move.start)
+        if captured is not None:
+            key ^= zobrist.piece_key(captured.zobrist_kind(), captured.color, move.end)
+        placed = piece
+        en_passant_file = None
+        if isinstance(piece, Pawn):
+            if end_y == 0 or end_y == 7:
+                placed = PROMOTION_PIECES[move.promotion or chess_state.PROMOTIONS[0]](piece.color)
+            elif start_x != end_x and captured is None:
+                # Взятие на проходе: пешка противника стоит рядом с начальной клеткой
+                captured = self.board[start_y][end_x]
+                self.board[start_y][end_x] = None
+                key ^= zobrist.piece_key(captured.zobrist_kind(), captured.color, (end_x, start_y))
+            elif abs(end_y - start_y) == 2:
+                middle = (start_x, (start_y + end_y) // 2)
+                for x, y in PAWN_CAPTURES[piece.color][middle]:
+                    neighbour = self.board[y][x]
+                    if isinstance(neighbour, Pawn) and neighbour.color != piece.color:
+                        en_passant_file = start_x
+                        break
+        elif isinstance(piece, King) and abs(end_x - start_x) == 2:
+            _, (rook_x, rook_y), (to_x, to_y), _, _ = chess_state.CASTLING_MOVES[move.start, move.end]
+            rook = self.board[rook_y][rook_x]
+            self.board[to_y][to_x] = rook
+            self.board[rook_y][rook_x] = None
+            key ^= (zobrist.piece_key(rook.zobrist_kind(), rook.color, (rook_x, rook_y)) ^
+                    zobrist.piece_key(rook.zobrist_kind(), rook.color, (to_x, to_y)))
+        piece.on_move_applied(self.board, move.start, move.end)
+        self.state = chess_state.after_move(state, move.start, move.end,
+                                            captured is not None or piece.resets_halfmove_clock, en_passant_file)
+        self.zobrist_key = (key ^ zobrist.state_key(state) ^ zobrist.state_key(self.state) ^
+                            zobrist.piece_key(placed.zobrist_kind(), placed.color, move.end))
+        self.side_to_move = 'black' if self.side_to_move == 'white' else 'white'
+        self.board[end_y][end_x] = placed
         self.board[start_y][start_x] = None
+        if isinstance(piece, King):
+            self.king_positions[piece.color] = move.end
+        return token
+
+    def unmake_move(self, token):
+        """Отменяет ход, выполненный make_move.
+
+        Аргументы:
+            token (tuple): Токен, который вернул make_move.
+        """
+        move, piece, captured, (symbol, has_moved), self.zobrist_key, self.state = token
+        self.side_to_move = 'black' if self.side_to_move == 'white' else 'white'
+        start_x, start_y = move.start
+        end_x, end_y = move.end
+        self.board[start_y][start_x] = piece
+        self.board[end_y][end_x] = captured
+        if isinstance(piece, Pawn):
+            if captured is None and start_x != end_x:
+                # Взятие на проходе: пешки без состояния общие, поэтому взятую не нужно хранить в токене
+                self.board[start_y][end_x] = Pawn('black' if piece.color == 'white' else 'white')
+        elif isinstance(piece, King) and abs(end_x - start_x) == 2:
+            _, (rook_x, rook_y), (to_x, to_y), _, _ = chess_state.CASTLING_MOVES[move.start, move.end]
+            self.board[rook_y][rook_x] = self.board[to_y][to_x]
+            self.board[to_y][to_x] = None
+        piece.symbol = symbol
+        if has_moved is not None:
+            piece.has_moved = has_moved
+        if isinstance(piece, King):
+            self.king_positions[piece.color] = move.start
+
+    def perft(self, depth, divide=False):
+        """Считает число позиций на заданной глубине (perft) от стороны side_to_move.
+
+        Аргументы:
+            depth (int): Глубина в полуходах.
+            divide (bool, optional): Если True, возвращает словарь {ход: число позиций}.
+
+        Возвращает:
+            int | dict: Число листьев дерева ходов или разбивку по первым ходам.
+        """
+        if depth == 0:
+            return 1
+        moves = list(self.generate_legal_moves(self.side_to_move))
+        if depth == 1 and not divide:
+            return len(moves)
+        counts = {}
+        for move in moves:
+            token = self.make_move(move)
+            counts[move] = self.perft(depth - 1)
+            self.unmake_move(token)
+        return counts if divide else sum(counts.values())
+
+
+class MoveResult:
+    """Результат хода, сделанного через ChessGame.apply (без вывода на консоль).
+
+    Атрибуты:
+        ok (bool): Выполнен ли ход.
+        turn (str): Цвет стороны, которая ходит теперь.
+        move_count (int): Число выполненных ходов в партии.
+        message (str): Причина отказа, если ход не выполнен, иначе None.
+        move (str): Выполненный ход в нотации игры (например, 'a2 -> a4') или None.
+        check (bool): Шах стороне turn (None, если состояние не проверялось).
+        checkmate (bool): Мат стороне turn (None, если состояние не проверялось).
+        stalemate (bool): Пат стороне turn (None, если состояние не проверялось).
+        draw (str): Причина ничьей ('repetition' или 'fifty_moves', см. ChessBoard.draw_reason) или None.
+    """
+
+    __slots__ = ('ok', 'turn', 'move_count', 'message', 'move', 'check', 'checkmate', 'stalemate', 'draw')
+
+    def __init__(self, ok, turn, move_count, message=None, move=None, check=None, checkmate=None, stalemate=None,
+                 draw=None):
+        """Инициализирует результат хода."""
+        self.ok = ok
+        self.turn = turn
+        self.move_count = move_count
+        self.message = message
+        self.move = move
+        self.check = check
+        self.checkmate = checkmate
+        self.stalemate = stalemate
+        self.draw = draw
+
+    @property
+    def game_over(self):
+        """True, если после хода партия окончена матом, патом или ничьей."""
+        return bool(self.checkmate or self.stalemate or self.draw)
+
+    def __repr__(self):
+        return (f"MoveResult(ok={self.ok}, move={self.move!r}, turn={self.turn}, move_count={self.move_count}, "
+                f"check={self.check}, checkmate={self.checkmate}, stalemate={self.stalemate}, "
+                f"draw={self.draw!r}, message={self.message!r})")
 
 
 class ChessGame:
     """Класс, управляющий игрой в шахматы.
 
     Атрибуты:
-        board (ChessBoard): Объект доски.
+        board (ChessBoard | BitboardChessBoard): Объект доски.
         current_turn (str): Цвет текущего игрока ('white' или 'black').
-        move_history (list): Список ходов в формате нотации (например, 'a2 -> a4').
+        move_history (list): Список ходов в формате нотации (например, 'a2 -> a4' или 'a7 -> a8=Q').
+        move_count (int): Число выполненных ходов.
+        players (dict): Компьютерные игроки по цвету (объекты с методом choose_move(board)).
+        renderer (FrameRenderer): Вывод доски в play (см. render.py).
+        start_fen (str): Начальная позиция в FEN или None для обычной расстановки.
+        book (OpeningBook): Книга дебютов компьютерных игроков или None.
+        status_cache (StatusCache): Кэш шаха, мата и пата по позициям партии (см. status_cache.py).
     """
 
-    def __init__(self):
-        """Инициализирует игру с начальной доской и ходом белых."""
+    def __init__(self, backend='list', players=None, renderer=None, fen=None, book=None, status_cache=None):
+        """Инициализирует игру с начальной доской и ходом белых или с позицией из FEN.
+
+        Аргументы:
+            backend (str, optional): Представление доски: 'list' (ChessBoard, по умолчанию)
+                или 'bitboard' (BitboardChessBoard с тем же интерфейсом).
+            players (dict, optional): Цвет -> компьютерный игрок, например
+                {'black': engine.SearchEngine(time_limit=2.0)}. Остальные цвета вводят ходы с клавиатуры.
+            renderer (FrameRenderer, optional): Вывод доски: FrameRenderer (по умолчанию, кадр
+                одной записью), DiffRenderer (только изменения) или NullRenderer (без вывода).
+            fen (str, optional): Начальная позиция в FEN; ход и номер хода берутся из нее.
+            book (OpeningBook, optional): Книга дебютов варианта 'alice' (см. book.py): пока позиция
+                есть в книге, компьютерные игроки ходят по ней, не запуская поиск.
+            status_cache (StatusCache, optional): Кэш состояний позиций; один кэш можно передать
+                нескольким партиям. По умолчанию у партии свой кэш.
+
+        Исключения:
+            ValueError: Если представление доски неизвестно, строка FEN некорректна или
+                книга построена для другого варианта.
+        """
+        if backend not in ('list', 'bitboard'):
+            raise ValueError(f"Неизвестное представление доски: {backend}")
+        if book is not None and book.variant != 'alice':
+            raise ValueError(f"Книга дебютов построена для варианта {book.variant}")
         self.board = ChessBoard()
-        self.current_turn = 'white'
+        self.move_count = 0
+        if fen is not None:
+            _, fullmove = self.board.load_fen(fen)
+            self.move_count = 2 * (fullmove - 1) + (self.board.side_to_move == 'black')
+        if backend == 'bitboard':
+            self.board = BitboardChessBoard(self.board, Move)
+        self.current_turn = self.board.side_to_move
         self.move_history = []
+        self.start_fen = fen
+        self.players = players or {}
+        self.renderer = renderer or FrameRenderer()
+        self.book = book
+        self.status_cache = status_cache if status_cache is not None else StatusCache()
+
+    def status(self):
+        """Возвращает состояние партии для стороны, которая ходит.
+
+        Возвращает:
+            MoveResult: Результат с ok=True, move=None, флагами шаха, мата и пата и причиной ничьей.
+                Мат и пат важнее ничьей по повторению или правилу 50 ходов.
+
+        Примечания:
+            Шах, мат и пат берутся из status_cache; причина ничьей зависит от истории
+            партии и считается каждый раз.
+        """
+        status = self.status_cache.lookup(self.board, self.current_turn)
+        return MoveResult(True, self.current_turn, self.move_count,
+                          check=status.check, checkmate=status.checkmate, stalemate=status.stalemate,
+                          draw=self.board.draw_reason() if status.legal_moves else None)
+
+    def to_fen(self):
+        """Возвращает текущую позицию партии в FEN (номер хода считается по move_count)."""
+        return self.board.to_fen(self.move_count // 2 + 1)
+
+    def parse_move(self, move_str):
+        """Разбирает ход в нотации игры.
+
+        Аргументы:
+            move_str (str): Ход: 'a2 a4', 'a2 -> a4' или 'a2a4'; при превращении пешки после
+                клеток указывается буква фигуры: 'a7 a8 q', 'a7 -> a8=Q' или 'a7a8q'.
+
+        Возвращает:
+            Move: Ход (promotion — заглавная буква или None) или None, если ввод некорректен.
+        """
+        words = move_str.replace('->', ' ').replace('=', ' ').split()
+        if len(words) == 1:
+            words = [words[0][:2], words[0][2:4]] + ([words[0][4:]] if len(words[0]) > 4 else [])
+        if len(words) not in (2, 3):
+            return None
+        promotion = words[2].upper() if len(words) == 3 else None
+        if promotion is not None and promotion not in chess_state.PROMOTIONS:
+            return None
+        start = self.notation_to_indices(words[0])
+        end = self.notation_to_indices(words[1])
+        if start is None or end is None:
+            return None
+        return Move(start, end, promotion)
+
+    def move_to_notation(self, move):
+        """Записывает ход в нотации игры, например 'a2 -> a4' или 'a7 -> a8=Q'."""
+        text = f"{self.indices_to_notation(move.start)} -> {self.indices_to_notation(move.end)}"
+        return f"{text}={move.promotion}" if move.promotion else text
+
+    def apply(self, move_str, check_status=True):
+        """Делает ход без ввода и вывода на консоль.
+
+        Аргументы:
+            move_str (str): Ход в нотации игры (см. parse_move). Если пешка идет на последний
+                ряд, а фигура превращения не указана, пешка превращается в ферзя.
+            check_status (bool, optional): Проверять ли шах, мат и пат после хода.
+                Если False, эти поля результата равны None (проверку можно сделать позже
+                вызовом status(), например в другом процессе).
+
+        Возвращает:
+            MoveResult: Результат хода; при ошибке ok=False и message с причиной.
+        """
+        parsed = self.parse_move(move_str)
+        if parsed is None:
+            return MoveResult(False, self.current_turn, self.move_count, "Некорректный ввод, попробуйте снова.")
+        start, end, promotion = parsed.start, parsed.end, parsed.promotion
+        if not self.board.is_valid_move(start, end, self.current_turn):
+            return MoveResult(False, self.current_turn, self.move_count, "Некорректный ход, попробуйте снова.")
+        if self.board.is_promotion(start, end):
+            promotion = promotion or chess_state.PROMOTIONS[0]
+        elif promotion is not None:
+            return MoveResult(False, self.current_turn, self.move_count,
+                              "Превращение возможно только для пешки на последнем ряду.")
+
+        self.board.move_piece(start, end, promotion)
+        move = self.move_to_notation(Move(start, end, promotion))
+        self.move_history.append(move)
+        self.current_turn = 'black' if self.current_turn == 'white' else 'white'
+        self.move_count += 1
+        result = self.status() if check_status else MoveResult(True, self.current_turn, self.move_count)
+        result.move = move
+        return result
 
     def play(self):
         """Запускает игровой цикл.
 
-        Игроки по очереди вводят начальную и конечную позиции.
-        Проверяет шах, мат, пат и выполняет ходы.
-        Завершает игру при мате или пате.
+        Игроки по очереди вводят начальную и конечную позиции (и фигуру превращения,
+        если пешка идет на последний ряд); ходы выполняет apply.
+        Сообщает о шахе и завершает игру при мате, пате или ничьей (повторение, правило 50 ходов).
         """
-        counter = 0
+        status = self.status()
         while True:
+            self.renderer.draw(self.board)
             print(f"Ход {'белых' if self.current_turn == 'white' else 'черных'}")
-            self.board.display_board()
             
-            # Проверка на шах
-            if self.board.is_check(self.current_turn):
+            if status.check:
                 print(f"ШАХ! Король {'белых' if self.current_turn == 'white' else 'черных'} под угрозой.")
-            
-            # Проверка на мат
-            if self.board.is_checkmate(self.current_turn):
+            if status.checkmate:
                 print(f"МАТ! {'Белые' if self.current_turn == 'white' else 'Черные'} проиграли.")
                 break
-            
-            # Проверка на пат
-            if self.board.is_stalemate(self.current_turn):
+            if status.stalemate:
                 print("Пат! Игра окончена вничью.")
                 break
+            if status.draw == 'repetition':
+                print("Позиция повторилась трижды. Игра окончена вничью.")
+                break
+            if status.draw == 'fifty_moves':
+                print("50 ходов без взятий и ходов пешек. Игра окончена вничью.")
+                break
             
-            start = input("Введите начальную позицию (например, 'a2'): ")
-            end = input("Введите конечную позицию (например, 'a4'): ")
-            
-            start = self.notation_to_indices(start)
-            end = self.notation_to_indices(end)
-            
-            if start is None or end is None:
-                print("Некорректный ввод, попробуйте снова.")
-                continue
-            
-            if self.board.is_valid_move(start, end, self.current_turn):
-                self.board.move_piece(start, end)
-                self.move_history.append(f"{self.indices_to_notation(start)} -> {self.indices_to_notation(end)}")
-                self.current_turn = 'black' if self.current_turn == 'white' else 'white'
+            player = self.players.get(self.current_turn)
+            if player is not None:
+                move = self.book.choose_move(self.board) if self.book is not None else None
+                move_str = self.move_to_notation(move or player.choose_move(self.board))
+                print(f"Ход компьютера: {move_str}")
+            else:
+                start = input("Введите начальную позицию (например, 'a2'): ")
+                end = input("Введите конечную позицию (например, 'a4'): ")
+                move_str = f"{start} {end}"
+                move = self.parse_move(move_str)
+                if move is not None and self.board.is_promotion(move.start, move.end):
+                    move_str += " " + input("Выберите фигуру для превращения (Q, R, B, N, по умолчанию Q): ")
+
+            result = self.apply(move_str)
+            if result.ok:
+                status = result
                 print("Ход выполнен")
-                counter += 1
-                print(f'Количество ходов: {counter}')
+                print(f'Количество ходов: {result.move_count}')
             else:
-                print("Некорректный ход, попробуйте снова.")
+                print(result.message)
 
     def notation_to_indices(self, notation):
         """Преобразует нотацию (например, 'a2') в индексы (x, y).
@@ -671,7 +1432,7 @@ class ChessGame:
         Возвращает:
             tuple: Кортеж (x, y) или None, если нотация некорректна.
         """
-        if len(notation) != 2:
+        if len(notation) != 2 or notation[0] not in 'abcdefgh' or notation[1] not in '12345678':
             return None
         x = ord(notation[0]) - ord('a')
         y = 8 - int(notation[1])
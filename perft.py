@@ -0,0 +1,206 @@
+"""Perft: подсчет позиций дерева ходов для проверки и замера генератора ходов.
+
+Запуск из консоли:
+    python perft.py chess 4                 # стандартные шахматы, глубина 4
+    python perft.py alice 3 --divide        # шахматы с новыми фигурами, разбивка по первым ходам
+    python perft.py chess 4 --backend bitboard
+    python perft.py checkers 7
+    python perft.py chess 3 --fen "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1"
+    python perft.py --verify                # сверка со всеми известными значениями
+    python perft.py --cross-check           # сверка ходов списочной и битбордовой доски
+
+Клетки в разбивке печатаются в стандартной нотации: белые начинают на 1-2 рядах
+(ряд = y + 1), поэтому вывод можно сравнивать с другими шахматными программами.
+"""
+
+import argparse
+import time
+
+import fin_checkers
+import fin_chess_3_piece
+import fin_chess_dasha
+from bitboard import BitboardChessBoard, cross_check_backends
+
+VARIANTS = {
+    'chess': fin_chess_dasha,
+    'alice': fin_chess_3_piece,
+    'checkers': fin_checkers,
+}
+
+# Позиции для проверки, кроме начальной, в FEN (см. fen.py)
+POSITIONS = {
+    'chess': {
+        # Позиции 2-5 из общеизвестного набора perft: рокировки, взятия на проходе, превращения
+        'kiwipete': 'r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1',
+        'position3': '8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1',
+        'position4': 'r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1',
+        'position5': 'rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8',
+    },
+    'alice': {
+        'endgame': '4k3/1w6/8/8/8/8/1C4A1/4K3 w - - 0 1',
+    },
+}
+
+# Для стандартных шахмат — общеизвестные эталонные значения, для варианта с новыми
+# фигурами и для шашек — значения, записанные по этой реализации правил.
+REFERENCE_COUNTS = {
+    'chess': {
+        'start': {1: 20, 2: 400, 3: 8902, 4: 197281},
+        'kiwipete': {1: 48, 2: 2039, 3: 97862},
+        'position3': {1: 14, 2: 191, 3: 2812, 4: 43238},
+        'position4': {1: 6, 2: 264, 3: 9467},
+        'position5': {1: 44, 2: 1486, 3: 62379},
+    },
+    'alice': {
+        'start': {1: 67, 2: 4439, 3: 150775},
+        'endgame': {1: 67, 2: 527, 3: 6562},
+    },
+    'checkers': {'start': {1: 7, 2: 49, 3: 302, 4: 1469, 5: 7482, 6: 37986, 7: 190146}},
+}
+
+# Позиции и глубины, на которых списочная и битбордовая доски сверяются ход в ход
+CROSS_CHECK_DEPTHS = {
+    'chess': {'start': 3, 'kiwipete': 2},
+    'alice': {'start': 2, 'endgame': 3},
+}
+
+
+def make_board(variant, backend='list', fen=None):
+    """Создает доску с начальной позицией или с позицией из FEN.
+
+    Аргументы:
+        variant (str): 'chess', 'alice' или 'checkers'.
+        backend (str, optional): 'list' или 'bitboard' (только для шахмат).
+        fen (str, optional): Позиция в FEN (только для шахмат).
+
+    Возвращает:
+        ChessBoard | BitboardChessBoard | CheckersBoard: Новая доска.
+
+    Исключения:
+        ValueError: Если FEN задана для шашек или некорректна.
+    """
+    module = VARIANTS[variant]
+    if variant == 'checkers':
+        if fen is not None:
+            raise ValueError("FEN поддерживается только для шахмат")
+        return module.CheckersBoard()
+    board = module.ChessBoard(fen)
+    if backend == 'bitboard':
+        return BitboardChessBoard(board, module.Move)
+    return board
+
+
+def square_name(square):
+    """Возвращает имя клетки (x, y) в стандартной нотации, например 'e2'."""
+    return f"{'abcdefgh'[square[0]]}{square[1] + 1}"
+
+
+def move_name(move):
+    """Возвращает запись хода для разбивки: 'e2e4' или 'e7e8q' для шахмат, 'c3-e5-c7' для шашек."""
+    if isinstance(move, tuple):
+        return '-'.join(square_name(square) for square in move)
+    return square_name(move.start) + square_name(move.end) + (move.promotion or '').lower()
+
+
+def run_perft(board, depth, divide=False):
+    """Запускает perft и измеряет время.
+
+    Аргументы:
+        board: Доска с методом perft.
+        depth (int): Глубина.
+        divide (bool, optional): Печатать ли число позиций после каждого первого хода.
+
+    Возвращает:
+        tuple: (число позиций, время в секундах).
+    """
+    started = time.perf_counter()
+    result = board.perft(depth, divide)
+    elapsed = time.perf_counter() - started
+    if divide:
+        for move, count in sorted(result.items(), key=lambda item: move_name(item[0])):
+            print(f"{move_name(move)}: {count}")
+        result = sum(result.values())
+    return result, elapsed
+
+
+def verify(max_depth=None, backend='list'):
+    """Сверяет perft со всеми известными значениями из REFERENCE_COUNTS.
+
+    Аргументы:
+        max_depth (int, optional): Пропускать значения глубже этой.
+        backend (str, optional): Представление шахматной доски.
+
+    Возвращает:
+        bool: True, если все значения совпали.
+    """
+    ok = True
+    for variant, positions in REFERENCE_COUNTS.items():
+        for position, counts in positions.items():
+            for depth, expected in sorted(counts.items()):
+                if max_depth is not None and depth > max_depth:
+                    continue
+                fen = POSITIONS.get(variant, {}).get(position)
+                nodes, elapsed = run_perft(make_board(variant, backend, fen), depth)
+                status = 'OK' if nodes == expected else f'ОШИБКА (ожидалось {expected})'
+                ok = ok and nodes == expected
+                print(f"{variant} {position} глубина {depth}: {nodes} {status} "
+                      f"({nodes / max(elapsed, 1e-9):,.0f} поз/с)")
+    return ok
+
+
+def cross_check(max_depth=None):
+    """Сверяет списочную и битбордовую доски на позициях CROSS_CHECK_DEPTHS (см. cross_check_backends).
+
+    Аргументы:
+        max_depth (int, optional): Ограничение глубины обхода.
+
+    Возвращает:
+        bool: True, если в каждой позиции дерева совпали ходы, шах, ключ и состояние.
+    """
+    ok = True
+    for variant, positions in CROSS_CHECK_DEPTHS.items():
+        module = VARIANTS[variant]
+        for position, depth in positions.items():
+            if max_depth is not None:
+                depth = min(depth, max_depth)
+            board = make_board(variant, fen=POSITIONS.get(variant, {}).get(position))
+            started = time.perf_counter()
+            try:
+                checked = cross_check_backends(board, module.Move, board.side_to_move, depth)
+            except AssertionError as error:
+                ok = False
+                print(f"{variant} {position} глубина {depth}: ОШИБКА {error}")
+                continue
+            print(f"{variant} {position} глубина {depth}: {checked} позиций OK "
+                  f"({time.perf_counter() - started:.2f} с)")
+    return ok
+
+
+def main(argv=None):
+    """Разбирает аргументы командной строки и запускает perft."""
+    parser = argparse.ArgumentParser(description="Perft для шахмат, шахмат с новыми фигурами и шашек.")
+    parser.add_argument('variant', nargs='?', choices=sorted(VARIANTS), default='chess')
+    parser.add_argument('depth', nargs='?', type=int, default=3)
+    parser.add_argument('--divide', action='store_true', help="разбивка по первым ходам")
+    parser.add_argument('--backend', choices=('list', 'bitboard'), default='list')
+    parser.add_argument('--fen', help="позиция в FEN вместо начальной (только для шахмат)")
+    parser.add_argument('--verify', action='store_true', help="сверка с известными значениями")
+    parser.add_argument('--cross-check', action='store_true', help="сверка списочной и битбордовой доски")
+    parser.add_argument('--max-depth', type=int, help="ограничение глубины для --verify и --cross-check")
+    args = parser.parse_args(argv)
+    if args.verify:
+        return 0 if verify(args.max_depth, args.backend) else 1
+    if args.cross_check:
+        return 0 if cross_check(args.max_depth) else 1
+    try:
+        board = make_board(args.variant, args.backend, args.fen)
+    except ValueError as error:
+        parser.error(str(error))
+    nodes, elapsed = run_perft(board, args.depth, args.divide)
+    print(f"Глубина {args.depth}: {nodes} позиций за {elapsed:.2f} с "
+          f"({nodes / max(elapsed, 1e-9):,.0f} поз/с)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,455 @@
+"""Запись и чтение партий в формате PGN.
+
+Ходы записываются в короткой алгебраической нотации (SAN) со стандартными
+клетками: белые начинают на 1-2 рядах (ряд = y + 1), как в perft.py и fen.py.
+Фигуры fin_chess_3_piece.py обозначаются буквами W, C и A (см. fen.py), а партия
+этого варианта получает тег [Variant "alice"]. Партия из нестандартной позиции
+записывается с тегами [SetUp "1"] и [FEN "..."]. Рокировки записываются как O-O и
+O-O-O, превращение пешки — буквой фигуры после клетки: e8=Q.
+
+Чтение потоковое: read_games читает файл построчно и держит в памяти только
+текущую партию, поэтому архив любого размера обрабатывается с ограниченной
+памятью. replay_game проверяет каждый ход правилами ChessBoard, а validate_games
+раздает партии пачками в пул процессов и выдает результаты в порядке партий.
+
+Пример:
+    with open('games.pgn', 'w') as stream:
+        PGNWriter(stream).write_game(game, {'White': 'Даша'})
+    with open('games.pgn') as stream:
+        for result in validate_games(read_games(stream), workers=4):
+            print(result.tags.get('White'), result.ok, result.error)
+"""
+
+import os
+import re
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import fin_chess_3_piece
+import fin_chess_dasha
+from chess_state import PROMOTIONS
+from fen import KINDS, LETTERS
+
+VARIANTS = {
+    'chess': fin_chess_dasha,
+    'alice': fin_chess_3_piece,
+}
+RESULTS = ('1-0', '0-1', '1/2-1/2', '*')
+# Порядок обязательных тегов (Seven Tag Roster)
+TAG_ORDER = ('Event', 'Site', 'Date', 'Round', 'White', 'Black', 'Result')
+LINE_WIDTH = 80
+BATCH_SIZE = 64
+
+_TAG = re.compile(r'\[(\w+)\s+"((?:[^"\\]|\\.)*)"\]')
+_TOKEN = re.compile(r'\{[^}]*\}?|;.*|\$\d+|\(|\)|[^\s{}();]+')
+_MOVE_NUMBER = re.compile(r'\d+\.+')
+_SAN = re.compile(r'([NBRQKWCA])?([a-h])?([1-8])?(x)?([a-h][1-8])(?:=?([QRBN]))?')
+# Рокировки в SAN -> столбец, на который встает король; допускается запись нулями
+_CASTLING = {'O-O': 6, 'O-O-O': 2, '0-0': 6, '0-0-0': 2}
+
+
+def square_name(square):
+    """Возвращает имя клетки (x, y) в стандартной нотации, например 'e2'."""
+    return f"{'abcdefgh'[square[0]]}{square[1] + 1}"
+
+
+def parse_square(name):
+    """Возвращает клетку (x, y) по имени в стандартной нотации."""
+    return ord(name[0]) - ord('a'), int(name[1]) - 1
+
+
+def move_san(board, move):
+    """Записывает ход в SAN.
+
+    Аргументы:
+        board (ChessBoard | BitboardChessBoard): Доска до хода; ход должен быть допустим.
+        move (Move): Ход.
+
+    Возвращает:
+        str: Запись хода, например 'e4', 'Nxf7+', 'Cxd5', 'exd6', 'e8=Q', 'O-O' или 'Ah5#'.
+    """
+    (start_x, start_y), (end_x, end_y) = move.start, move.end
+    piece = board.piece_at(move.start)
+    capture = board.piece_at(move.end) is not None
+    letter = LETTERS[type(piece).__name__]
+    castling = letter == 'K' and abs(end_x - start_x) == 2
+    if castling:
+        san = 'O-O' if end_x > start_x else 'O-O-O'
+    elif letter == 'P':
+        # Пешка ходит по диагонали только со взятием, в том числе на проходе
+        san = f"{'abcdefgh'[start_x]}x" if start_x != end_x else ''
+    else:
+        san = letter
+        rivals = [(x, y) for y in range(8) for x in range(8)
+                  if (x, y) != move.start and type(board.piece_at((x, y))) is type(piece)
+                  and board.piece_at((x, y)).color == piece.color
+                  and board.is_valid_move((x, y), move.end, piece.color)]
+        if rivals:
+            if all(x != start_x for x, _ in rivals):
+                san += 'abcdefgh'[start_x]
+            elif all(y != start_y for _, y in rivals):
+                san += str(start_y + 1)
+            else:
+                san += square_name(move.start)
+        if capture:
+            san += 'x'
+    if not castling:
+        san += square_name(move.end)
+        if board.is_promotion(move.start, move.end):
+            san += f"={move.promotion or PROMOTIONS[0]}"
+
+    token = board.make_move(move)
+    try:
+        opponent = board.side_to_move
+        if board.is_check(opponent):
+            san += '+' if board.has_legal_move(opponent) else '#'
+    finally:
+        board.unmake_move(token)
+    return san
+
+
+def parse_san(board, san):
+    """Находит допустимый ход стороны side_to_move по записи SAN.
+
+    Аргументы:
+        board (ChessBoard | BitboardChessBoard): Доска, на которой делается ход.
+        san (str): Запись хода; знаки '+', '#', '!' и '?' в конце не учитываются.
+
+    Возвращает:
+        Move: Ход модуля доски.
+
+    Исключения:
+        ValueError: Если запись некорректна, ход недопустим или неоднозначен.
+    """
+    text = san.rstrip('+#!?')
+    move_class = getattr(board, 'move_class', None) or sys.modules[type(board).__module__].Move
+    color = board.side_to_move
+    if text in _CASTLING:
+        row = 0 if color == 'white' else 7
+        start, end = (4, row), (_CASTLING[text], row)
+        if type(board.piece_at((4, row))).__name__ != 'King' or not board.is_valid_move(start, end, color):
+            raise ValueError(f"Недопустимый ход: {san}")
+        return move_class(start, end)
+    match = _SAN.fullmatch(text)
+    if match is None:
+        raise ValueError(f"Ход не поддерживается или записан некорректно: {san}")
+    letter, file, rank, _, target, promotion = match.groups()
+    kind = KINDS[letter or 'P']
+    end = parse_square(target)
+    candidates = []
+    for y in range(8):
+        if rank is not None and y != int(rank) - 1:
+            continue
+        for x in range(8):
+            if file is not None and x != ord(file) - ord('a'):
+                continue
+            piece = board.piece_at((x, y))
+            if (piece is not None and piece.color == color and type(piece).__name__ == kind
+                    and board.is_valid_move((x, y), end, color)):
+                candidates.append((x, y))
+    if not candidates:
+        raise ValueError(f"Недопустимый ход: {san}")
+    if len(candidates) > 1:
+        raise ValueError(f"Неоднозначный ход: {san}")
+    if board.is_promotion(candidates[0], end) != (promotion is not None):
+        raise ValueError(f"Фигура превращения указана неверно: {san}")
+    return move_class(candidates[0], end, promotion)
+
+
+class PGNGame:
+    """Партия, прочитанная из PGN.
+
+    Атрибуты:
+        tags (dict): Теги партии (Event, White, FEN и т.д.).
+        moves (list): Ходы в SAN без номеров, комментариев и вариантов.
+        result (str): Результат из текста ходов ('1-0', '0-1', '1/2-1/2' или '*').
+    """
+
+    __slots__ = ('tags', 'moves', 'result')
+
+    def __init__(self, tags, moves, result='*'):
+        """Создает партию.
+
+        Аргументы:
+            tags (dict): Теги партии.
+            moves (list): Ходы в SAN.
+            result (str, optional): Результат партии.
+        """
+        self.tags = tags
+        self.moves = moves
+        self.result = result
+
+    def __repr__(self):
+        return f"PGNGame(tags={self.tags!r}, moves={len(self.moves)}, result={self.result!r})"
+
+
+class ReplayResult:
+    """Результат проверки партии.
+
+    Атрибуты:
+        tags (dict): Теги партии.
+        moves (list): Проверенные ходы (объекты Move модуля доски).
+        fen (str): Позиция после последнего проверенного хода.
+        error (str): Причина ошибки или None, если все ходы допустимы.
+    """
+
+    __slots__ = ('tags', 'moves', 'fen', 'error')
+
+    def __init__(self, tags, moves, fen, error=None):
+        """Создает результат проверки партии."""
+        self.tags = tags
+        self.moves = moves
+        self.fen = fen
+        self.error = error
+
+    @property
+    def ok(self):
+        """True, если все ходы партии допустимы."""
+        return self.error is None
+
+    def __repr__(self):
+        return f"ReplayResult(moves={len(self.moves)}, fen={self.fen!r}, error={self.error!r})"
+
+
+def _quote(value):
+    """Экранирует значение тега."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"')
+
+
+def _game_result(game):
+    """Возвращает результат партии ChessGame по текущей позиции."""
+    status = game.status()
+    if status.checkmate:
+        return '0-1' if game.current_turn == 'white' else '1-0'
+    if status.stalemate or status.draw:
+        return '1/2-1/2'
+    return '*'
+
+
+class PGNWriter:
+    """Потоковая запись партий в PGN.
+
+    Атрибуты:
+        stream (file): Текстовый поток, в который записываются партии.
+        games (int): Число записанных партий.
+    """
+
+    def __init__(self, stream):
+        """Инициализирует запись.
+
+        Аргументы:
+            stream (file): Текстовый поток, открытый на запись.
+        """
+        self.stream = stream
+        self.games = 0
+
+    def write_game(self, game, tags=None):
+        """Записывает партию ChessGame из fin_chess_dasha.py или fin_chess_3_piece.py.
+
+        Ходы берутся из game.move_history и заново проверяются на доске, начиная с
+        game.start_fen, поэтому запись не зависит от представления доски партии.
+
+        Аргументы:
+            game (ChessGame): Партия.
+            tags (dict, optional): Дополнительные теги; Result по умолчанию берется из позиции.
+
+        Исключения:
+            ValueError: Если ход из истории недопустим.
+        """
+        module = sys.modules[type(game).__module__]
+        board = module.ChessBoard(game.start_fen)
+        moves = []
+        for entry in game.move_history:
+            move = game.parse_move(entry)
+            if not board.is_valid_move(move.start, move.end, board.side_to_move):
+                raise ValueError(f"Недопустимый ход в истории партии: {entry}")
+            moves.append(move_san(board, move))
+            board.make_move(move)
+
+        tags = dict(tags or {})
+        tags.setdefault('Result', _game_result(game))
+        if module is fin_chess_3_piece:
+            tags.setdefault('Variant', 'alice')
+        first_move, black_first = 1, False
+        if game.start_fen is not None:
+            tags.setdefault('SetUp', '1')
+            tags.setdefault('FEN', game.start_fen)
+            fields = game.start_fen.split()
+            black_first = fields[1] == 'b'
+            first_move = int(fields[5]) if len(fields) > 5 else 1
+        self.write(tags, moves, first_move, black_first)
+
+    def write(self, tags, moves, first_move=1, black_first=False):
+        """Записывает партию по тегам и ходам в SAN.
+
+        Аргументы:
+            tags (dict): Теги; недостающие теги Seven Tag Roster записываются как '?'.
+            moves (list): Ходы в SAN.
+            first_move (int, optional): Номер первого хода.
+            black_first (bool, optional): True, если первый ход делают черные.
+        """
+        result = tags.get('Result', '*')
+        lines = [f'[{name} "{_quote(tags.get(name, "?"))}"]' for name in TAG_ORDER]
+        lines += [f'[{name} "{_quote(value)}"]' for name, value in tags.items() if name not in TAG_ORDER]
+        lines.append('')
+
+        words = []
+        number = first_move
+        for index, san in enumerate(moves):
+            white = (index % 2 == 0) != black_first
+            if white:
+                words.append(f"{number}.")
+            elif index == 0:
+                words.append(f"{number}...")
+            words.append(san)
+            if not white:
+                number += 1
+        words.append(result)
+        line = ''
+        for word in words:
+            if line and len(line) + 1 + len(word) > LINE_WIDTH:
+                lines.append(line)
+                line = word
+            else:
+                line = f"{line} {word}" if line else word
+        lines.append(line)
+        if self.games:
+            self.stream.write('\n')
+        self.stream.write('\n'.join(lines) + '\n')
+        self.games += 1
+
+
+def read_games(stream):
+    """Читает партии из PGN по одной.
+
+    Комментарии, варианты в скобках, NAG ($1) и номера ходов пропускаются.
+
+    Аргументы:
+        stream (Iterable[str]): Текстовый поток или любой итератор строк.
+
+    Возвращает:
+        generator: Объекты PGNGame в порядке файла.
+    """
+    tags = {}
+    moves = []
+    result = '*'
+    depth = 0
+    comment = False
+    in_moves = False
+    for line in stream:
+        if comment:
+            if '}' not in line:
+                continue
+            line = line[line.index('}') + 1:]
+            comment = False
+        stripped = line.strip()
+        if not stripped or stripped.startswith('%'):
+            continue
+        if stripped.startswith('[') and depth == 0:
+            if in_moves:
+                yield PGNGame(tags, moves, result)
+                tags, moves, result, in_moves = {}, [], '*', False
+            match = _TAG.match(stripped)
+            if match:
+                tags[match.group(1)] = re.sub(r'\\(.)', r'\1', match.group(2))
+            continue
+        in_moves = True
+        for token in _TOKEN.findall(stripped):
+            if token.startswith('{'):
+                comment = not token.endswith('}')
+            elif token == '(':
+                depth += 1
+            elif token == ')':
+                depth = max(depth - 1, 0)
+            elif depth or token.startswith((';', '$')):
+                continue
+            elif token in RESULTS:
+                result = token
+                yield PGNGame(tags, moves, result)
+                tags, moves, result, in_moves = {}, [], '*', False
+            else:
+                token = _MOVE_NUMBER.sub('', token, count=1) if token[0].isdigit() else token
+                if token:
+                    moves.append(token)
+    if in_moves or tags:
+        yield PGNGame(tags, moves, result)
+
+
+def replay_game(record):
+    """Проверяет ходы партии правилами ChessBoard.
+
+    Аргументы:
+        record (PGNGame): Партия; вариант берется из тега Variant, начальная позиция — из FEN.
+
+    Возвращает:
+        ReplayResult: Проверенные ходы, итоговая позиция и первая ошибка, если она есть.
+    """
+    variant = record.tags.get('Variant', 'chess').lower()
+    if variant not in VARIANTS:
+        return ReplayResult(record.tags, [], None, f"Неизвестный вариант: {variant}")
+    board = VARIANTS[variant].ChessBoard()
+    fullmove = 1
+    if 'FEN' in record.tags:
+        try:
+            _, fullmove = board.load_fen(record.tags['FEN'])
+        except ValueError as error:
+            return ReplayResult(record.tags, [], None, str(error))
+    # Полуходы от начала партии, как ChessGame.move_count
+    first_ply = 2 * (fullmove - 1) + (board.side_to_move == 'black')
+    moves = []
+    for san in record.moves:
+        ply = first_ply + len(moves)
+        try:
+            move = parse_san(board, san)
+        except ValueError as error:
+            return ReplayResult(record.tags, moves, board.to_fen(ply // 2 + 1), f"Ход {ply // 2 + 1}: {error}")
+        board.make_move(move)
+        moves.append(move)
+    return ReplayResult(record.tags, moves, board.to_fen((first_ply + len(moves)) // 2 + 1))
+
+
+def _replay_batch(records):
+    """Проверяет пачку партий (выполняется в процессе пула)."""
+    return [replay_game(record) for record in records]
+
+
+def _batches(records, size):
+    """Группирует партии в списки по size штук."""
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def validate_games(records, workers=None, batch_size=BATCH_SIZE):
+    """Проверяет партии в пуле процессов.
+
+    Партии отправляются пачками, и в работе одновременно не больше двух пачек на
+    процесс, поэтому память не зависит от размера архива.
+
+    Аргументы:
+        records (Iterable[PGNGame]): Партии, например read_games(stream).
+        workers (int, optional): Число процессов (по умолчанию — число ядер); 0 — без пула.
+        batch_size (int, optional): Число партий в одной пачке.
+
+    Возвращает:
+        generator: Объекты ReplayResult в порядке партий.
+    """
+    if workers == 0:
+        for record in records:
+            yield replay_game(record)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        limit = 2 * (workers or os.cpu_count() or 1)
+        pending = deque()
+        for batch in _batches(records, batch_size):
+            pending.append(executor.submit(_replay_batch, batch))
+            if len(pending) >= limit:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
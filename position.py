@@ -0,0 +1,169 @@
+"""Компактное неизменяемое представление позиции для кэшей и баз позиций.
+
+Position — это bytes длиной 64: по байту на клетку с индексом y * 8 + x.
+Байт клетки равен 0 для пустой клетки, иначе 1 + 2 * номер состояния + цвет
+(0 — белые, 1 — черные), где состояние — вид фигуры вместе с ее изменяемым
+состоянием, как в ChessPiece.zobrist_kind и CheckersPiece.zobrist_kind.
+Коды фигур занимают 7 младших битов, а старшие биты байтов хранят остальное:
+    байт 0       сторона, которая ходит
+    байты 1-4    права на рокировку (биты 0-3 записи состояния, см. chess_state)
+    байты 5-8    столбец взятия на проходе плюс 1 (биты 4-7 записи состояния)
+Счетчик полуходов в позицию не входит, как и в ключ Зобриста.
+
+Пример:
+    position = Position.from_board(board)
+    cache[position] = score               # хешируется и сравнивается как bytes
+    position.restore(other_board)         # та же позиция на другой доске
+"""
+
+import sys
+
+import zobrist
+
+SIZE = 64
+SIDE_BIT = 0x80
+PIECE_MASK = 0x7F
+# Байты, старшие биты которых хранят рокировки и взятие на проходе (по биту состояния на байт)
+STATE_BYTES = range(1, 9)
+# Символы, которые может принять Чеширский Кот (свой или съеденной фигуры)
+KITTY_SYMBOLS = 'CPNBRQKWAcpnbrqkwa'
+STATES = (
+    'Pawn', 'Knight', 'Bishop', 'Rook', 'Queen', 'King', 'Whiterabbit',
+    'AppleWhite', 'AppleWhite:moved', 'CheckersMan', 'CheckersKing',
+) + tuple(f"KittyCheshire:{symbol}" for symbol in KITTY_SYMBOLS)
+STATE_CODES = {state: index for index, state in enumerate(STATES)}
+
+
+def encode_piece(piece):
+    """Возвращает байт клетки для фигуры.
+
+    Аргументы:
+        piece (ChessPiece | CheckersPiece): Фигура.
+
+    Возвращает:
+        int: Код от 1 до 127.
+
+    Исключения:
+        ValueError: Если состояние фигуры нельзя упаковать.
+    """
+    state = piece.zobrist_kind()
+    if state not in STATE_CODES:
+        raise ValueError(f"Неизвестное состояние фигуры: {state}")
+    return 1 + 2 * STATE_CODES[state] + (piece.color == 'black')
+
+
+def decode_piece(code):
+    """Возвращает (состояние, цвет) по байту клетки или None для пустой клетки."""
+    code &= PIECE_MASK
+    if code == 0:
+        return None
+    return STATES[(code - 1) // 2], 'black' if (code - 1) % 2 else 'white'
+
+
+class Position(bytes):
+    """Неизменяемая позиция шахмат или шашек, упакованная в 64 байта.
+
+    Атрибуты:
+        side_to_move (str): Цвет стороны, которая ходит.
+        state (int): Рокировки и взятие на проходе (запись состояния без счетчика полуходов).
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, data):
+        """Создает позицию из 64 байтов.
+
+        Аргументы:
+            data (bytes | bytearray): Упакованная позиция.
+
+        Исключения:
+            ValueError: Если длина данных не равна 64.
+        """
+        if len(data) != SIZE:
+            raise ValueError(f"Позиция должна занимать {SIZE} байта, получено {len(data)}")
+        return super().__new__(cls, data)
+
+    @classmethod
+    def from_board(cls, board):
+        """Упаковывает позицию доски.
+
+        Аргументы:
+            board (ChessBoard | CheckersBoard): Доска со списочным представлением board и side_to_move
+                (и state у шахматной доски).
+
+        Возвращает:
+            Position: Упакованная позиция.
+        """
+        data = bytearray(SIZE)
+        for y, row in enumerate(board.board):
+            for x, piece in enumerate(row):
+                if piece is not None:
+                    data[y * 8 + x] = encode_piece(piece)
+        if board.side_to_move == 'black':
+            data[0] |= SIDE_BIT
+        state = getattr(board, 'state', 0)
+        for bit, index in enumerate(STATE_BYTES):
+            if state >> bit & 1:
+                data[index] |= SIDE_BIT
+        return cls(data)
+
+    @property
+    def side_to_move(self):
+        """Цвет стороны, которая ходит."""
+        return 'black' if self[0] & SIDE_BIT else 'white'
+
+    @property
+    def state(self):
+        """Рокировки и взятие на проходе в виде записи состояния (см. chess_state)."""
+        return sum(1 << bit for bit, index in enumerate(STATE_BYTES) if self[index] & SIDE_BIT)
+
+    def piece_at(self, square):
+        """Возвращает (состояние, цвет) фигуры на клетке или None.
+
+        Аргументы:
+            square (tuple): Кортеж (x, y) с позицией клетки.
+        """
+        return decode_piece(self[square[1] * 8 + square[0]])
+
+    def restore(self, board):
+        """Расставляет позицию на доске, заменяя ее содержимое.
+
+        Фигуры создаются классами из модуля доски, поэтому одна и та же позиция
+        восстанавливается на ChessBoard из fin_chess_dasha.py, fin_chess_3_piece.py
+        или на CheckersBoard.
+
+        Аргументы:
+            board (ChessBoard | CheckersBoard): Доска, которую нужно заполнить.
+        """
+        module = sys.modules[type(board).__module__]
+        kings = {'white': None, 'black': None}
+        for y in range(8):
+            for x in range(8):
+                decoded = self.piece_at((x, y))
+                if decoded is None:
+                    board.board[y][x] = None
+                    continue
+                state, color = decoded
+                kind, _, detail = state.partition(':')
+                if kind.startswith('Checkers'):
+                    piece = module.CheckersPiece(color, kind == 'CheckersKing')
+                else:
+                    piece = getattr(module, kind)(color)
+                    if kind == 'AppleWhite':
+                        piece.has_moved = detail == 'moved'
+                    elif kind == 'KittyCheshire':
+                        piece.symbol = detail
+                    elif kind == 'King':
+                        kings[color] = (x, y)
+                board.board[y][x] = piece
+        board.side_to_move = self.side_to_move
+        if hasattr(board, 'king_positions'):
+            board.king_positions = kings
+        if hasattr(board, 'state'):
+            board.state = self.state
+        board.zobrist_key = zobrist.board_key(board.board, board.side_to_move, self.state)
+        if hasattr(board, 'reset_history'):
+            board.reset_history()
+
+    def __repr__(self):
+        return f"Position({self.hex()})"
@@ -0,0 +1,124 @@
+"""Вывод доски на терминал.
+
+Доски строят кадр методом render() (строка целиком), а вывод выбирается
+объектом-рисовальщиком, который передается игре:
+    FrameRenderer — весь кадр одной записью (по умолчанию);
+    DiffRenderer  — первый кадр целиком, дальше ANSI-последовательностями
+                    перерисовываются только изменившиеся клетки;
+    NullRenderer  — ничего не выводит (для пакетных прогонов).
+
+Пример:
+    ChessGame(renderer=DiffRenderer()).play()
+"""
+
+import sys
+
+CLEAR_SCREEN = "\x1b[2J\x1b[H"
+CLEAR_BELOW = "\x1b[J"
+
+
+def move_cursor(row, column):
+    """Возвращает ANSI-последовательность перемещения курсора (строки и столбцы с 0)."""
+    return f"\x1b[{row + 1};{column + 1}H"
+
+
+class FrameRenderer:
+    """Выводит кадр доски одной записью в поток.
+
+    Атрибуты:
+        stream (file): Поток вывода; None — текущий sys.stdout.
+    """
+
+    def __init__(self, stream=None):
+        """Инициализирует рисовальщика.
+
+        Аргументы:
+            stream (file, optional): Поток вывода, по умолчанию sys.stdout.
+        """
+        self.stream = stream
+
+    def _write(self, text):
+        """Записывает текст в поток одним вызовом write."""
+        stream = self.stream or sys.stdout
+        stream.write(text)
+        stream.flush()
+
+    def draw(self, board):
+        """Выводит доску.
+
+        Аргументы:
+            board: Доска с методом render().
+        """
+        self._write(board.render())
+
+
+class DiffRenderer(FrameRenderer):
+    """Перерисовывает только изменившиеся символы кадра с помощью ANSI-последовательностей.
+
+    Доска рисуется в верхнем левом углу экрана, текст игры выводится под ней:
+    после каждой перерисовки курсор ставится под кадр, а экран ниже очищается.
+    """
+
+    def __init__(self, stream=None):
+        """Инициализирует рисовальщика; первый кадр будет выведен целиком."""
+        super().__init__(stream)
+        self._frame = None
+
+    def reset(self):
+        """Сбрасывает запомненный кадр: следующий вывод очистит экран и нарисует доску заново."""
+        self._frame = None
+
+    def draw(self, board):
+        """Выводит изменения доски по сравнению с предыдущим кадром одной записью."""
+        frame = board.render().splitlines()
+        previous = self._frame
+        if previous is None or len(previous) != len(frame):
+            parts = [CLEAR_SCREEN, '\n'.join(frame)]
+        else:
+            parts = []
+            for row, (old, new) in enumerate(zip(previous, frame)):
+                if old == new:
+                    continue
+                if len(old) != len(new):
+                    parts.append(move_cursor(row, 0) + new + "\x1b[K")
+                    continue
+                column = 0
+                while column < len(new):
+                    if old[column] == new[column]:
+                        column += 1
+                        continue
+                    end = column
+                    while end < len(new) and old[end] != new[end]:
+                        end += 1
+                    parts.append(move_cursor(row, column) + new[column:end])
+                    column = end
+        parts.append(move_cursor(len(frame), 0) + CLEAR_BELOW)
+        self._frame = frame
+        self._write(''.join(parts))
+
+
+class NullRenderer(FrameRenderer):
+    """Ничего не выводит."""
+
+    def draw(self, board):
+        """Пропускает вывод доски."""
+
+
+RENDERERS = {'full': FrameRenderer, 'diff': DiffRenderer, 'off': NullRenderer}
+
+
+def make_renderer(mode):
+    """Создает рисовальщика по названию режима.
+
+    Аргументы:
+        mode (str): 'full', 'diff' или 'off'.
+
+    Возвращает:
+        FrameRenderer: Рисовальщик.
+
+    Исключения:
+        ValueError: Если режим неизвестен.
+    """
+    if mode not in RENDERERS:
+        raise ValueError(f"Неизвестный режим вывода: {mode}")
+    return RENDERERS[mode]()
@@ -0,0 +1,289 @@
+"""Игровой сервер: много партий шахмат и шашек в одном цикле событий asyncio.
+
+Клиенты подключаются по TCP и обмениваются строками UTF-8. Команды:
+    NEW chess|alice|checkers       создать партию и подключиться к ней -> OK <номер>
+    JOIN <номер> [white|black]     подключиться к партии (и занять цвет)
+    MOVE <откуда> <куда> [фигура]  сделать ход, например MOVE e2 e4 (в нотации доски партии);
+                                   фигура превращения пешки — Q, R, B или N (по умолчанию Q)
+    BOARD                          доска партии, строки до END
+    STATUS                         STATUS <номер> <чей ход> <состояние>
+    QUIT                           отключиться
+Ответы начинаются с OK или ERR. Остальные клиенты партии получают строку
+EVENT <номер> MOVE <откуда> <куда> [фигура] и новый STATUS.
+
+Ходы выполняются через ChessGame.apply и CheckersGame.apply. Поиск мата,
+пата и отсутствия ходов выполняется в пуле процессов: позиция передается туда в
+виде position.Position (64 байта), поэтому тяжелая проверка одной партии не
+задерживает остальные.
+
+Запуск:
+    python server.py --port 8765 --workers 4
+"""
+
+import argparse
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+
+import fin_checkers
+import fin_chess_3_piece
+import fin_chess_dasha
+from position import Position
+from status_cache import StatusCache
+
+VARIANTS = {
+    'chess': fin_chess_dasha,
+    'alice': fin_chess_3_piece,
+    'checkers': fin_checkers,
+}
+COLORS = ('white', 'black')
+# Кэши состояний шахматных позиций в процессе пула, по варианту: процессы живут, пока
+# работает сервер, поэтому повторяющиеся позиции разных партий считаются один раз
+_status_caches = {'chess': StatusCache(), 'alice': StatusCache()}
+
+
+def position_status(variant, position):
+    """Определяет состояние позиции (выполняется в процессе пула).
+
+    Аргументы:
+        variant (str): 'chess', 'alice' или 'checkers'.
+        position (Position): Позиция; ходит ее side_to_move.
+
+    Возвращает:
+        str: 'play', 'check', 'checkmate', 'stalemate' или 'no_moves' (для шашек).
+    """
+    module = VARIANTS[variant]
+    color = position.side_to_move
+    if variant == 'checkers':
+        board = module.CheckersBoard()
+        position.restore(board)
+        return 'play' if board.generate_moves(color) else 'no_moves'
+    board = module.ChessBoard()
+    position.restore(board)
+    status = _status_caches[variant].lookup(board, color)
+    if status.checkmate:
+        return 'checkmate'
+    if status.stalemate:
+        return 'stalemate'
+    return 'check' if status.check else 'play'
+
+
+class GameSession:
+    """Партия на сервере.
+
+    Атрибуты:
+        session_id (int): Номер партии.
+        variant (str): 'chess', 'alice' или 'checkers'.
+        game (ChessGame | CheckersGame): Игра; ее доска и очередь хода.
+        status (str): Состояние после последнего хода (см. position_status) или 'draw'.
+        owners (dict): Цвет -> клиент, занявший этот цвет.
+        clients (set): Подключенные клиенты (asyncio.StreamWriter).
+        lock (asyncio.Lock): Не дает двум ходам одной партии выполняться одновременно.
+    """
+
+    def __init__(self, session_id, variant):
+        """Создает партию в начальной позиции.
+
+        Аргументы:
+            session_id (int): Номер партии.
+            variant (str): 'chess', 'alice' или 'checkers'.
+
+        Исключения:
+            ValueError: Если вариант игры неизвестен.
+        """
+        if variant not in VARIANTS:
+            raise ValueError(f"Неизвестная игра: {variant}")
+        module = VARIANTS[variant]
+        self.session_id = session_id
+        self.variant = variant
+        self.game = module.CheckersGame() if variant == 'checkers' else module.ChessGame()
+        self.status = 'play'
+        self.owners = {}
+        self.clients = set()
+        self.lock = asyncio.Lock()
+
+    @property
+    def finished(self):
+        """True, если партия окончена."""
+        return self.status in ('checkmate', 'stalemate', 'no_moves', 'draw')
+
+    def render(self):
+        """Возвращает доску в виде текста."""
+        return self.game.board.render()
+
+    def status_line(self):
+        """Возвращает строку STATUS для клиентов."""
+        return f"STATUS {self.session_id} {self.game.current_turn} {self.status}"
+
+    def apply_move(self, start_text, end_text, promotion=None):
+        """Проверяет и делает ход стороны current_turn через headless API игры.
+
+        Состояние после хода (мат, пат, конец игры) не проверяется: сервер
+        считает его в пуле процессов.
+
+        Аргументы:
+            start_text (str): Начальная клетка в нотации партии.
+            end_text (str): Конечная клетка в нотации партии.
+            promotion (str, optional): Буква фигуры превращения пешки (только для шахмат).
+
+        Исключения:
+            ValueError: Если ход некорректен; текст исключения объясняет причину.
+        """
+        if promotion is not None and self.variant == 'checkers':
+            raise ValueError("В шашках нет превращения в фигуру")
+        move_str = f"{start_text} {end_text}" if promotion is None else f"{start_text} {end_text} {promotion}"
+        result = self.game.apply(move_str, check_status=False)
+        if not result.ok:
+            raise ValueError(result.message)
+
+
+class GameServer:
+    """TCP-сервер партий.
+
+    Атрибуты:
+        sessions (dict): Номер -> GameSession.
+        executor (ProcessPoolExecutor): Пул процессов для проверки мата и пата.
+    """
+
+    def __init__(self, workers=None):
+        """Инициализирует сервер.
+
+        Аргументы:
+            workers (int, optional): Число процессов пула (по умолчанию — число ядер).
+        """
+        self.sessions = {}
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+        self._next_id = 1
+
+    async def serve(self, host='127.0.0.1', port=8765):
+        """Запускает сервер и обслуживает клиентов до отмены."""
+        server = await asyncio.start_server(self.handle_client, host, port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.executor.shutdown(cancel_futures=True)
+
+    def create_session(self, variant):
+        """Создает партию и возвращает ее."""
+        session = GameSession(self._next_id, variant)
+        self.sessions[session.session_id] = session
+        self._next_id += 1
+        return session
+
+    async def handle_client(self, reader, writer):
+        """Обслуживает одно подключение: читает команды и отвечает на них."""
+        state = {'session': None}
+        try:
+            while not reader.at_eof():
+                line = await reader.readline()
+                if not line:
+                    break
+                words = line.decode('utf-8', 'replace').split()
+                if not words:
+                    continue
+                if words[0].upper() == 'QUIT':
+                    writer.write(b"OK\n")
+                    break
+                try:
+                    reply = await self.handle_command(state, writer, words[0].upper(), words[1:])
+                except ValueError as error:
+                    reply = f"ERR {error}"
+                writer.write(reply.encode() + b"\n")
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            session = state['session']
+            if session is not None:
+                self._leave(session, writer)
+            writer.close()
+
+    async def handle_command(self, state, writer, command, args):
+        """Выполняет команду клиента и возвращает ответ.
+
+        Исключения:
+            ValueError: Если команда или ее аргументы некорректны.
+        """
+        session = state['session']
+        if command == 'NEW':
+            if len(args) != 1:
+                raise ValueError("Использование: NEW chess|alice|checkers")
+            if session is not None:
+                self._leave(session, writer)
+            session = state['session'] = self.create_session(args[0])
+            session.clients.add(writer)
+            return f"OK {session.session_id}"
+        if command == 'JOIN':
+            if not 1 <= len(args) <= 2 or not args[0].isdigit() or int(args[0]) not in self.sessions:
+                raise ValueError("Использование: JOIN <номер> [white|black]")
+            target = self.sessions[int(args[0])]
+            if len(args) == 2:
+                if args[1] not in COLORS:
+                    raise ValueError(f"Неизвестный цвет: {args[1]}")
+                if target.owners.get(args[1], writer) is not writer:
+                    raise ValueError("Цвет уже занят")
+                target.owners[args[1]] = writer
+            if session is not None and session is not target:
+                self._leave(session, writer)
+            state['session'] = target
+            target.clients.add(writer)
+            return f"OK {target.session_id}"
+        if session is None:
+            raise ValueError("Сначала создайте партию (NEW) или подключитесь к ней (JOIN)")
+        if command == 'BOARD':
+            return session.render() + "END"
+        if command == 'STATUS':
+            return session.status_line()
+        if command == 'MOVE':
+            if len(args) not in (2, 3):
+                raise ValueError("Использование: MOVE <откуда> <куда> [фигура превращения]")
+            return await self.move(session, writer, *args)
+        raise ValueError(f"Неизвестная команда: {command}")
+
+    async def move(self, session, writer, start_text, end_text, promotion=None):
+        """Делает ход в партии, проверяет ее состояние в пуле и оповещает клиентов."""
+        async with session.lock:
+            if session.finished:
+                raise ValueError("Партия окончена")
+            owner = session.owners.get(session.game.current_turn)
+            if owner is not None and owner is not writer:
+                raise ValueError("Сейчас ход другого игрока")
+            session.apply_move(start_text, end_text, promotion)
+            position = Position.from_board(session.game.board)
+            loop = asyncio.get_running_loop()
+            session.status = await loop.run_in_executor(self.executor, position_status, session.variant, position)
+            if session.status in ('play', 'check') and session.game.board.draw_reason() is not None:
+                # Повторения и счетчик ходов есть только в доске партии, а не в Position
+                session.status = 'draw'
+            move_text = f"{start_text} {end_text}" if promotion is None else f"{start_text} {end_text} {promotion}"
+            event = f"EVENT {session.session_id} MOVE {move_text}\n{session.status_line()}\n".encode()
+            for client in session.clients:
+                if client is not writer:
+                    client.write(event)
+            return f"OK\n{session.status_line()}"
+
+    def _leave(self, session, writer):
+        """Отключает клиента от партии и освобождает его цвета."""
+        session.clients.discard(writer)
+        for color in [color for color, owner in session.owners.items() if owner is writer]:
+            del session.owners[color]
+        if not session.clients:
+            del self.sessions[session.session_id]
+
+
+def main(argv=None):
+    """Разбирает аргументы командной строки и запускает сервер."""
+    parser = argparse.ArgumentParser(description="Сервер партий шахмат и шашек.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, help="число процессов для проверки мата")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(GameServer(args.workers).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,124 @@
+"""Состояние шахматной позиции (шах, мат, пат, число ходов) с кэшем LRU.
+
+evaluate_status считает все состояние одним проходом: одна проверка шаха и один
+перебор легальных ходов вместо отдельных is_check, is_checkmate и is_stalemate,
+каждый из которых заново проверяет шах и ищет ходы.
+
+StatusCache хранит результаты по ключу (ключ Зобриста, цвет). Ключ Зобриста
+учитывает рокировки и взятие на проходе, поэтому разные по правилам позиции не
+смешиваются. При переполнении вытесняется позиция, к которой дольше всего не
+обращались. Один кэш можно передать нескольким партиям, например при разборе
+архива, где одни и те же дебютные позиции встречаются во многих партиях.
+
+Пример:
+    cache = StatusCache(size=1 << 16)
+    game = ChessGame(status_cache=cache)
+    ...
+    print(cache.hits, cache.misses)
+"""
+
+from collections import OrderedDict
+
+DEFAULT_SIZE = 1 << 16
+
+
+class PositionStatus:
+    """Состояние позиции для стороны color.
+
+    Атрибуты:
+        check (bool): Король стороны под шахом.
+        legal_moves (int): Число легальных ходов стороны.
+    """
+
+    __slots__ = ('check', 'legal_moves')
+
+    def __init__(self, check, legal_moves):
+        """Создает состояние позиции."""
+        self.check = check
+        self.legal_moves = legal_moves
+
+    @property
+    def checkmate(self):
+        """True, если стороне мат."""
+        return self.check and not self.legal_moves
+
+    @property
+    def stalemate(self):
+        """True, если стороне пат."""
+        return not self.check and not self.legal_moves
+
+    def __repr__(self):
+        return f"PositionStatus(check={self.check}, legal_moves={self.legal_moves})"
+
+
+def evaluate_status(board, color):
+    """Считает состояние позиции одной проверкой шаха и одним перебором ходов.
+
+    Аргументы:
+        board (ChessBoard | BitboardChessBoard): Доска.
+        color (str): Цвет стороны ('white' или 'black').
+
+    Возвращает:
+        PositionStatus: Шах и число легальных ходов.
+    """
+    return PositionStatus(board.is_check(color), sum(1 for _ in board.generate_legal_moves(color)))
+
+
+class StatusCache:
+    """Кэш состояний позиций с вытеснением давно не использованных (LRU).
+
+    Атрибуты:
+        size (int): Наибольшее число позиций в кэше.
+        hits (int): Число запросов, на которые ответ взят из кэша.
+        misses (int): Число запросов, для которых состояние считалось.
+    """
+
+    def __init__(self, size=DEFAULT_SIZE):
+        """Создает пустой кэш.
+
+        Аргументы:
+            size (int, optional): Наибольшее число позиций.
+
+        Исключения:
+            ValueError: Если размер не положителен.
+        """
+        if size < 1:
+            raise ValueError(f"Размер кэша должен быть положительным: {size}")
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, board, color):
+        """Возвращает состояние позиции доски для стороны color, считая его при промахе.
+
+        Аргументы:
+            board (ChessBoard | BitboardChessBoard): Доска.
+            color (str): Цвет стороны ('white' или 'black').
+
+        Возвращает:
+            PositionStatus: Состояние позиции.
+        """
+        key = (board.zobrist_key, color)
+        status = self._entries.get(key)
+        if status is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return status
+        self.misses += 1
+        status = self._entries[key] = evaluate_status(board, color)
+        if len(self._entries) > self.size:
+            self._entries.popitem(last=False)
+        return status
+
+    def clear(self):
+        """Очищает кэш и счетчики."""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self):
+        return f"StatusCache(size={self.size}, entries={len(self._entries)}, hits={self.hits}, misses={self.misses})"
@@ -0,0 +1,585 @@
+"""Таблицы эндшпилей: точные результаты позиций с малым числом фигур.
+
+Таблица строится ретроградным анализом для одного набора фигур (материала),
+например KQvK (король и ферзь против короля), KWvK, KA~vK (сходившая
+Белоснежка) или KMvK в шашках (дамка и простая против дамки). Буквы — как в FEN
+(см. fen.py), '~' — сходившая Белоснежка; в шашках K — дамка, M — простая фишка.
+Белые фигуры записываются до 'v', черные — после. Фигур не больше MAX_PIECES.
+Пешки и Чеширский Кот не поддерживаются. Позиции с правами на рокировку
+в таблицы не входят.
+
+Построение идет в два шага:
+    1. Процессы пула делят позиции таблицы на части и для каждой позиции делают
+       ходы по правилам ChessBoard или CheckersBoard. Ход, после которого материал
+       не меняется, ведет в позицию той же таблицы. Взятие, ход Белоснежки и
+       превращение в дамку меняют материал и ведут в уже построенную меньшую
+       таблицу. Такие таблицы строятся заранее.
+    2. От матов (в шашках — от позиций без ходов) результаты распространяются
+       назад по обратным ребрам, уровень за уровнем по числу полуходов. Позиция
+       выиграна, если есть ход в проигранную позицию противника. Она проиграна,
+       если все ходы ведут в выигранные. Остальные позиции — ничья.
+
+Файл таблицы — заголовок HEADER и по одному байту на позицию:
+    0       ничья или невозможная позиция
+    d + 1   результат за d полуходов до мата; d нечетно — выигрывает сторона,
+            которая ходит, четно — она проигрывает (0 — ей уже мат)
+Номер позиции — сторона и клетки фигур в порядке материала, в системе счисления
+по числу клеток (64 в шахматах, 32 черные клетки в шашках). Поэтому Tablebase
+отвечает на запрос одним чтением байта из файла, отображенного в память.
+Таблица из 4 шахматных фигур — 32 Мб, но при построении ребра ходов всех ее
+позиций держатся в памяти (несколько гигабайт).
+
+Построение:
+    python tablebase.py chess KQvK KRvK --dir tables --workers 4
+    python tablebase.py alice KWvK KAvK --dir tables
+    python tablebase.py checkers KKvK KMvK --dir tables
+Игра:
+    SearchEngine(tablebase=Tablebase('tables', 'chess'))
+"""
+
+import argparse
+import mmap
+import os
+import re
+import struct
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+
+import numpy as np
+
+import fin_checkers
+import fin_chess_3_piece
+import fin_chess_dasha
+from chess_state import CASTLING_MASK
+
+MAGIC = b'CHTB'
+VERSION = 1
+HEADER = struct.Struct('<4sHH16s')
+VARIANTS = ('chess', 'alice', 'checkers')
+MODULES = {
+    'chess': fin_chess_dasha,
+    'alice': fin_chess_3_piece,
+    'checkers': fin_checkers,
+}
+# Буква материала -> вид фигуры (ChessPiece.zobrist_kind); порядок букв — порядок фигур в материале
+TOKENS = {
+    'chess': {'K': 'King', 'Q': 'Queen', 'R': 'Rook', 'B': 'Bishop', 'N': 'Knight'},
+    'alice': {'K': 'King', 'Q': 'Queen', 'R': 'Rook', 'B': 'Bishop', 'N': 'Knight',
+              'W': 'Whiterabbit', 'A': 'AppleWhite', 'A~': 'AppleWhite:moved'},
+    'checkers': {'K': 'CheckersKing', 'M': 'CheckersMan'},
+}
+# Фигура, которая меняет вид без взятия: Белоснежка делает свой ход, простая становится дамкой
+TRANSFORMS = {'A': 'A~', 'M': 'K'}
+MAX_PIECES = 4
+MAX_DTM = 254
+COLORS = ('white', 'black')
+CHESS_SQUARES = tuple((x, y) for y in range(8) for x in range(8))
+CHECKERS_SQUARES = tuple((x, y) for y in range(8) for x in range(8) if (x + y) % 2 == 1)
+# Ряд, на котором простая фишка становится дамкой
+PROMOTION_ROWS = {'white': 0, 'black': 7}
+# Позиций в одной задаче пула
+CHUNK_SIZE = 1 << 15
+# Нет выигрыша через другую таблицу / нет такого уровня
+NONE = np.iinfo(np.int32).max
+
+_TOKEN = re.compile(r'A~|[A-Z]')
+
+
+class TableResult:
+    """Результат позиции по таблице.
+
+    Атрибуты:
+        outcome (str): 'win', 'loss' или 'draw' для стороны, которая ходит.
+        dtm (int): Полуходов до мата при лучшей игре обеих сторон (для ничьей — None).
+    """
+
+    __slots__ = ('outcome', 'dtm')
+
+    def __init__(self, outcome, dtm=None):
+        """Создает результат позиции."""
+        self.outcome = outcome
+        self.dtm = dtm
+
+    @classmethod
+    def from_byte(cls, value):
+        """Разбирает байт таблицы."""
+        if value == 0:
+            return cls('draw')
+        dtm = value - 1
+        return cls('win' if dtm % 2 else 'loss', dtm)
+
+    def after_move(self):
+        """Возвращает результат для стороны, сделавшей ход в позицию с этим результатом."""
+        if self.outcome == 'draw':
+            return TableResult('draw')
+        return TableResult('loss' if self.outcome == 'win' else 'win', self.dtm + 1)
+
+    def __eq__(self, other):
+        return isinstance(other, TableResult) and (self.outcome, self.dtm) == (other.outcome, other.dtm)
+
+    def __repr__(self):
+        return f"TableResult(outcome={self.outcome!r}, dtm={self.dtm})"
+
+
+class Material:
+    """Набор фигур таблицы.
+
+    Атрибуты:
+        variant (str): 'chess', 'alice' или 'checkers'.
+        pieces (tuple): Пары (буква, цвет) в каноническом порядке: белые, затем черные.
+        name (str): Запись материала, например 'KQvK'.
+        squares (tuple): Клетки (x, y), на которых могут стоять фигуры.
+        size (int): Число позиций таблицы (обе стороны хода).
+    """
+
+    __slots__ = ('variant', 'pieces', 'name', 'squares', 'size')
+
+    def __init__(self, variant, pieces):
+        """Создает материал и приводит порядок фигур к каноническому.
+
+        Аргументы:
+            variant (str): Вариант игры.
+            pieces (Iterable): Пары (буква, цвет).
+
+        Исключения:
+            ValueError: Если вариант неизвестен, фигур слишком много, у стороны нет
+                фигур или (в шахматах) у стороны не ровно один король.
+        """
+        if variant not in VARIANTS:
+            raise ValueError(f"Неизвестный вариант: {variant}")
+        order = list(TOKENS[variant])
+        self.variant = variant
+        self.pieces = tuple(sorted(pieces, key=lambda piece: (COLORS.index(piece[1]), order.index(piece[0]))))
+        sides = [[token for token, color in self.pieces if color == side] for side in COLORS]
+        self.name = 'v'.join(''.join(tokens) for tokens in sides)
+        if len(self.pieces) > MAX_PIECES:
+            raise ValueError(f"В таблице не больше {MAX_PIECES} фигур: {self.name}")
+        if not all(sides):
+            raise ValueError(f"У каждой стороны должна быть фигура: {self.name}")
+        if variant != 'checkers' and any(tokens.count('K') != 1 for tokens in sides):
+            raise ValueError(f"У каждой стороны должен быть один король: {self.name}")
+        self.squares = CHECKERS_SQUARES if variant == 'checkers' else CHESS_SQUARES
+        self.size = 2 * len(self.squares) ** len(self.pieces)
+
+    @classmethod
+    def parse(cls, variant, name):
+        """Разбирает запись материала ('KQvK', 'KA~vK', 'KMvK').
+
+        Исключения:
+            ValueError: Если запись некорректна или фигура не поддерживается вариантом.
+        """
+        if variant not in VARIANTS:
+            raise ValueError(f"Неизвестный вариант: {variant}")
+        sides = name.split('v')
+        if len(sides) != 2:
+            raise ValueError(f"Материал записывается как <белые>v<черные>: {name}")
+        pieces = []
+        for color, text in zip(COLORS, sides):
+            tokens = _TOKEN.findall(text)
+            if ''.join(tokens) != text or any(token not in TOKENS[variant] for token in tokens):
+                raise ValueError(f"Неизвестные фигуры в материале {name} для варианта {variant}")
+            pieces.extend((token, color) for token in tokens)
+        return cls(variant, pieces)
+
+    def submaterials(self):
+        """Возвращает материалы, в которые ведут взятия и превращения фигур этого материала.
+
+        Короли шахмат не снимаются. Материалы шашек, где у стороны не осталось
+        фишек, не нужны: сторона без фишек проиграла.
+        """
+        options = []
+        for token, color in self.pieces:
+            choices = [(token, color)]
+            if self.variant == 'checkers' or token != 'K':
+                choices.append(None)
+            if token in TRANSFORMS and TRANSFORMS[token] in TOKENS[self.variant]:
+                choices.append((TRANSFORMS[token], color))
+            options.append(choices)
+        result = {}
+        for choice in product(*options):
+            pieces = [piece for piece in choice if piece is not None]
+            if pieces == list(self.pieces) or {color for _, color in pieces} != set(COLORS):
+                continue
+            material = Material(self.variant, pieces)
+            result[material.name] = material
+        return list(result.values())
+
+    def index(self, side, squares):
+        """Возвращает номер позиции: сторона и номера клеток фигур в порядке материала."""
+        index = side
+        base = len(self.squares)
+        for square in squares:
+            index = index * base + square
+        return index
+
+    def decode(self, index):
+        """Разбирает номер позиции в (сторона, номера клеток фигур)."""
+        base = len(self.squares)
+        squares = []
+        for _ in self.pieces:
+            index, square = divmod(index, base)
+            squares.append(square)
+        squares.reverse()
+        return index, squares
+
+
+def table_path(directory, variant, name):
+    """Возвращает путь к файлу таблицы."""
+    return os.path.join(directory, f"{variant}-{name}.tb")
+
+
+def _make_piece(module, variant, kind, color):
+    """Создает фигуру модуля доски по виду."""
+    if variant == 'checkers':
+        return module.CheckersPiece(color, kind == 'CheckersKing')
+    kind, _, detail = kind.partition(':')
+    piece = getattr(module, kind)(color)
+    if kind == 'AppleWhite':
+        piece.has_moved = detail == 'moved'
+    return piece
+
+
+def _empty_board(variant):
+    """Создает пустую доску варианта без прав на рокировку."""
+    module = MODULES[variant]
+    if variant == 'checkers':
+        board = module.CheckersBoard()
+    else:
+        board = module.ChessBoard()
+        board.state = 0
+    board.board = [[None] * 8 for _ in range(8)]
+    return board
+
+
+def _scan_chunk(variant, name, directory, first, last):
+    """Делает все ходы из позиций first..last-1 таблицы (выполняется в процессе пула).
+
+    Возвращает:
+        tuple: Массивы по позициям части: допустима ли позиция, мат (нет ходов и
+            проигрыш), число ходов внутри таблицы, лучший выигрыш и худший проигрыш
+            через другие таблицы, есть ли ничья через другую таблицу; и номера
+            позиций, в которые ведут ходы внутри таблицы (подряд по позициям).
+    """
+    material = Material.parse(variant, name)
+    module = MODULES[variant]
+    kinds = TOKENS[variant]
+    board = _empty_board(variant)
+    tables = Tablebase(directory, variant)
+    squares = material.squares
+    numbers = {square: number for number, square in enumerate(squares)}
+    pieces = [_make_piece(module, variant, kinds[token], color) for token, color in material.pieces]
+    kind_of = [kinds[token] for token, _ in material.pieces]
+    weights = [len(squares) ** (len(pieces) - 1 - slot) for slot in range(len(pieces))]
+    half = material.size // 2
+    count = last - first
+
+    legal = np.zeros(count, dtype=bool)
+    mated = np.zeros(count, dtype=bool)
+    moves_inside = np.zeros(count, dtype=np.int32)
+    exit_win = np.full(count, NONE, dtype=np.int32)
+    exit_loss = np.full(count, -1, dtype=np.int32)
+    exit_draw = np.zeros(count, dtype=bool)
+    targets = array('i')
+    for offset in range(count):
+        side, placement = material.decode(first + offset)
+        if len(set(placement)) < len(placement):
+            continue
+        color = COLORS[side]
+        slots = {}
+        for slot, number in enumerate(placement):
+            x, y = squares[number]
+            board.board[y][x] = pieces[slot]
+            slots[number] = slot
+        board.side_to_move = color
+        if variant == 'checkers':
+            # Простая фишка не может стоять на ряду, где она становится дамкой
+            valid = all(kind_of[slot] == 'CheckersKing' or squares[number][1] != PROMOTION_ROWS[material.pieces[slot][1]]
+                        for number, slot in slots.items())
+            moves = board.generate_moves(color) if valid else []
+        else:
+            board.king_positions = {piece_color: squares[placement[slot]]
+                                    for slot, (token, piece_color) in enumerate(material.pieces) if token == 'K'}
+            valid = not board.is_check(COLORS[1 - side])
+            moves = list(board.generate_legal_moves(color)) if valid else []
+        if valid:
+            legal[offset] = True
+            if not moves:
+                mated[offset] = variant == 'checkers' or board.is_check(color)
+            rest = first + offset - side * half
+            for move in moves:
+                if variant == 'checkers':
+                    start, end = move[0], move[-1]
+                    capture = abs(move[0][0] - move[1][0]) == 2
+                else:
+                    start, end = move.start, move.end
+                    capture = board.board[end[1]][end[0]] is not None
+                token = board.make_move(move)
+                slot = slots[numbers[start]]
+                if not capture and board.board[end[1]][end[0]].zobrist_kind() == kind_of[slot]:
+                    targets.append((1 - side) * half + rest + (numbers[end] - numbers[start]) * weights[slot])
+                    moves_inside[offset] += 1
+                else:
+                    result = tables.probe(board)
+                    if result is None:
+                        raise ValueError(f"Нет таблицы для позиции после хода {move!r} из {name}")
+                    result = result.after_move()
+                    if result.outcome == 'win':
+                        exit_win[offset] = min(exit_win[offset], result.dtm)
+                    elif result.outcome == 'loss':
+                        exit_loss[offset] = max(exit_loss[offset], result.dtm)
+                    else:
+                        exit_draw[offset] = True
+                board.unmake_move(token)
+        for number in placement:
+            x, y = squares[number]
+            board.board[y][x] = None
+    tables.close()
+    return legal, mated, moves_inside, exit_win, exit_loss, exit_draw, np.frombuffer(targets, dtype=np.int32)
+
+
+def _gather(offsets, values, nodes):
+    """Собирает подряд элементы values[offsets[n]:offsets[n + 1]] для всех n из nodes."""
+    starts = offsets[nodes]
+    lengths = offsets[nodes + 1] - starts
+    total = int(lengths.sum())
+    if not total:
+        return np.zeros(0, dtype=values.dtype)
+    shifts = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return values[shifts + np.arange(total)]
+
+
+def _retrograde(legal, mated, moves_inside, exit_win, exit_loss, exit_draw, targets):
+    """Вычисляет байты таблицы по ходам позиций (см. _scan_chunk).
+
+    Исключения:
+        ValueError: Если мат длиннее MAX_DTM полуходов.
+    """
+    size = len(legal)
+    # Обратные ребра: для каждой позиции — позиции, из которых в нее ведет ход
+    sources = np.repeat(np.arange(size, dtype=np.int32), moves_inside)
+    order = np.argsort(targets, kind='stable')
+    predecessors = sources[order]
+    offsets = np.searchsorted(targets[order], np.arange(size + 1, dtype=np.int64))
+
+    values = np.zeros(size, dtype=np.uint8)
+    known = np.zeros(size, dtype=bool)
+    remaining = moves_inside.astype(np.int32)
+    # Самый долгий выигрыш противника после хода (в его полуходах); проигрыш на полуход дольше
+    longest = exit_loss - 1
+    # Позиция с выигрышем или ничьей через другую таблицу проигранной не бывает
+    blocked = exit_draw | (exit_win != NONE)
+    win_at = exit_win.copy()
+    loss_at = np.full(size, NONE, dtype=np.int32)
+    loss_at[mated] = 0
+    only_exits = legal & ~mated & (moves_inside == 0) & ~blocked & (exit_loss >= 0)
+    loss_at[only_exits] = exit_loss[only_exits]
+
+    level = 0
+    while True:
+        scheduled = np.where(known, NONE, np.minimum(win_at, loss_at))
+        level = int(scheduled.min())
+        if level == NONE:
+            return values
+        if level > MAX_DTM:
+            raise ValueError(f"Мат длиннее {MAX_DTM} полуходов не помещается в таблицу")
+        nodes = np.flatnonzero(scheduled == level)
+        values[nodes] = level + 1
+        known[nodes] = True
+        parents = _gather(offsets, predecessors, nodes)
+        parents = parents[~known[parents]]
+        if level % 2 == 0:
+            # Противник проигрывает: ход в эту позицию выигрывает
+            win_at[parents] = np.minimum(win_at[parents], level + 1)
+        else:
+            np.subtract.at(remaining, parents, 1)
+            np.maximum.at(longest, parents, level)
+            parents = np.unique(parents)
+            lost = parents[(remaining[parents] == 0) & ~blocked[parents]]
+            loss_at[lost] = longest[lost] + 1
+
+
+def generate(variant, name, directory='.', workers=None):
+    """Строит таблицу материала и все меньшие таблицы, которые ей нужны.
+
+    Готовые таблицы не пересчитываются.
+
+    Аргументы:
+        variant (str): 'chess', 'alice' или 'checkers'.
+        name (str): Материал, например 'KQvK'.
+        directory (str, optional): Каталог таблиц.
+        workers (int, optional): Число процессов (по умолчанию — число ядер); 0 — без пула.
+
+    Возвращает:
+        str: Путь к файлу таблицы.
+
+    Исключения:
+        ValueError: Если материал некорректен.
+    """
+    material = Material.parse(variant, name)
+    path = table_path(directory, variant, material.name)
+    if os.path.exists(path):
+        return path
+    for submaterial in material.submaterials():
+        generate(variant, submaterial.name, directory, workers)
+    os.makedirs(directory, exist_ok=True)
+    chunks = [(variant, material.name, directory, first, min(first + CHUNK_SIZE, material.size))
+              for first in range(0, material.size, CHUNK_SIZE)]
+    if workers == 0:
+        parts = [_scan_chunk(*chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            parts = list(executor.map(_scan_chunk, *zip(*chunks)))
+    values = _retrograde(*(np.concatenate(arrays) for arrays in zip(*parts)))
+    temporary = path + '.tmp'
+    with open(temporary, 'wb') as stream:
+        stream.write(HEADER.pack(MAGIC, VERSION, VARIANTS.index(variant), material.name.encode('ascii')))
+        stream.write(values.tobytes())
+    os.replace(temporary, path)
+    return path
+
+
+class Tablebase:
+    """Таблицы варианта игры в каталоге; файлы отображаются в память при первом обращении.
+
+    Атрибуты:
+        directory (str): Каталог таблиц.
+        variant (str): 'chess', 'alice' или 'checkers'.
+    """
+
+    def __init__(self, directory, variant):
+        """Подключает каталог таблиц.
+
+        Исключения:
+            ValueError: Если вариант неизвестен.
+        """
+        if variant not in VARIANTS:
+            raise ValueError(f"Неизвестный вариант: {variant}")
+        self.directory = directory
+        self.variant = variant
+        self._tables = {}
+        self._kinds = {kind: token for token, kind in TOKENS[variant].items()}
+
+    def __getstate__(self):
+        """Для pickle (движок в пуле процессов) передаются только каталог и вариант."""
+        return self.directory, self.variant
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _table(self, name):
+        """Возвращает отображение файла таблицы или None, если таблицы нет."""
+        if name in self._tables:
+            return self._tables[name]
+        table = None
+        path = table_path(self.directory, self.variant, name)
+        if os.path.exists(path):
+            with open(path, 'rb') as stream:
+                table = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, variant, stored = HEADER.unpack_from(table)
+            if (magic != MAGIC or version != VERSION or VARIANTS[variant] != self.variant or
+                    stored.rstrip(b'\0').decode('ascii') != name):
+                table.close()
+                raise ValueError(f"Файл не является таблицей {name} версии {VERSION}: {path}")
+        self._tables[name] = table
+        return table
+
+    def probe(self, board):
+        """Возвращает результат позиции для стороны, которая ходит.
+
+        Аргументы:
+            board (ChessBoard | BitboardChessBoard | CheckersBoard): Доска варианта.
+
+        Возвращает:
+            TableResult: Результат или None, если для материала нет таблицы (или в
+                шахматах остались права на рокировку).
+        """
+        if getattr(board, 'state', 0) & CASTLING_MASK:
+            return None
+        found = []
+        for y in range(8):
+            for x in range(8):
+                piece = board.piece_at((x, y))
+                if piece is not None:
+                    token = self._kinds.get(piece.zobrist_kind())
+                    if token is None or len(found) == MAX_PIECES:
+                        return None
+                    found.append((token, piece.color, (x, y)))
+        side = COLORS.index(board.side_to_move)
+        if not any(color == board.side_to_move for _, color, _ in found):
+            # В шашках сторона без фишек проиграла
+            return TableResult('loss', 0)
+        try:
+            material = Material(self.variant, [(token, color) for token, color, _ in found])
+        except ValueError:
+            return None
+        table = self._table(material.name)
+        if table is None:
+            return None
+        numbers = {square: number for number, square in enumerate(material.squares)}
+        order = list(TOKENS[self.variant])
+        found.sort(key=lambda piece: (COLORS.index(piece[1]), order.index(piece[0])))
+        index = material.index(side, [numbers[square] for _, _, square in found])
+        return TableResult.from_byte(table[HEADER.size + index])
+
+    def best_move(self, board):
+        """Выбирает ход по таблицам: быстрейший выигрыш, иначе ничью, иначе самый долгий проигрыш.
+
+        Аргументы:
+            board (ChessBoard | BitboardChessBoard | CheckersBoard): Доска варианта.
+
+        Возвращает:
+            tuple: (ход, TableResult для стороны, которая ходит) или None, если позиции
+                или одной из позиций после хода нет в таблицах, или ходов нет.
+        """
+        if self.probe(board) is None:
+            return None
+        if self.variant == 'checkers':
+            moves = board.generate_moves(board.side_to_move)
+        else:
+            moves = list(board.generate_legal_moves(board.side_to_move))
+        best = None
+        for move in moves:
+            token = board.make_move(move)
+            result = self.probe(board)
+            board.unmake_move(token)
+            if result is None:
+                return None
+            result = result.after_move()
+            if result.outcome == 'win':
+                rank = (2, -result.dtm)
+            else:
+                rank = (1, 0) if result.outcome == 'draw' else (0, result.dtm)
+            if best is None or rank > best[0]:
+                best = (rank, move, result)
+        return None if best is None else best[1:]
+
+    def close(self):
+        """Закрывает отображения файлов таблиц."""
+        for table in self._tables.values():
+            if table is not None:
+                table.close()
+        self._tables.clear()
+
+
+def main(argv=None):
+    """Строит таблицы эндшпилей из командной строки."""
+    parser = argparse.ArgumentParser(description="Построение таблиц эндшпилей ретроградным анализом.")
+    parser.add_argument('variant', choices=VARIANTS)
+    parser.add_argument('materials', nargs='+', help="материалы, например KQvK KRvK")
+    parser.add_argument('--dir', default='tables', help="каталог таблиц")
+    parser.add_argument('--workers', type=int, help="число процессов (0 — без пула)")
+    args = parser.parse_args(argv)
+    for name in args.materials:
+        print(generate(args.variant, name, args.dir, args.workers))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,55 @@
+"""Проверки согласованности списочной (ChessBoard) и битбордовой (BitboardChessBoard) доски."""
+
+import pytest
+
+import engine
+import pgn
+import perft
+from bitboard import BitboardChessBoard, cross_check_backends
+
+CROSS_CHECK_CASES = [(variant, position, min(depth, 2))
+                     for variant, positions in perft.CROSS_CHECK_DEPTHS.items()
+                     for position, depth in positions.items()]
+CHESS_VARIANTS = [perft.VARIANTS['chess'], perft.VARIANTS['alice']]
+
+
+def _board(variant, position):
+    """Возвращает списочную доску варианта в позиции из perft.POSITIONS (или в начальной)."""
+    return perft.make_board(variant, fen=perft.POSITIONS.get(variant, {}).get(position))
+
+
+@pytest.mark.parametrize('variant, position, depth', CROSS_CHECK_CASES)
+def test_backends_agree_on_legal_moves(variant, position, depth):
+    """Обе доски дают одинаковые ходы, шахи, ключи и состояние на всем дереве ходов."""
+    board = _board(variant, position)
+    assert cross_check_backends(board, perft.VARIANTS[variant].Move, board.side_to_move, depth) > 1
+
+
+@pytest.mark.parametrize('variant, position, depth', CROSS_CHECK_CASES)
+def test_piece_at_matches(variant, position, depth):
+    """piece_at битбордовой доски возвращает те же фигуры, что и списочная доска."""
+    board = _board(variant, position)
+    bitboard = BitboardChessBoard(board, perft.VARIANTS[variant].Move)
+    for y in range(8):
+        for x in range(8):
+            expected, piece = board.piece_at((x, y)), bitboard.piece_at((x, y))
+            if expected is None:
+                assert piece is None
+            else:
+                assert type(piece).__name__ == type(expected).__name__
+                assert piece.zobrist_kind() == expected.zobrist_kind()
+                assert (piece.color, piece.symbol) == (expected.color, expected.symbol)
+    assert engine.evaluate(bitboard) == engine.evaluate(board)
+
+
+@pytest.mark.parametrize('module', CHESS_VARIANTS)
+def test_bitboard_game_with_engine(module):
+    """Компьютерный игрок ходит в партии на битбордовой доске."""
+    player = engine.SearchEngine(max_depth=2)
+    game = module.ChessGame(backend='bitboard', players={'black': player})
+    assert game.apply('e7 e5').ok
+    move = player.choose_move(game.board)
+    assert move is not None
+    san = pgn.move_san(game.board, move)
+    assert pgn.parse_san(game.board, san).end == move.end
+    assert game.apply(game.move_to_notation(move)).ok
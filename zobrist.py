@@ -0,0 +1,79 @@
+"""Ключи Зобриста для хеширования позиций шахмат и шашек.
+
+Каждой тройке (вид фигуры, цвет, клетка) сопоставлено 64-битное число, а ключ
+позиции — это XOR чисел всех фигур на доске, SIDE_KEY, если ходят черные, и для
+шахмат — ключа прав на рокировку и столбца взятия на проходе (см. state_key).
+Числа получаются из BLAKE2b от описания тройки, поэтому ключи одинаковы во всех
+процессах и запусках и их можно хранить в базах партий и кэшах на диске.
+"""
+
+import hashlib
+
+import chess_state
+
+_KEYS = {}
+
+
+def _random64(text):
+    """Возвращает детерминированное 64-битное число для строки text."""
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), 'little')
+
+
+SIDE_KEY = _random64('side:black')
+# Ключи всех 16 сочетаний прав на рокировку (без прав — 0) и столбцов взятия на проходе
+CASTLING_KEYS = (0,) + tuple(_random64(f"castling:{rights}") for rights in range(1, 16))
+EN_PASSANT_KEYS = tuple(_random64(f"en_passant:{column}") for column in range(8))
+
+
+def piece_key(kind, color, square):
+    """Возвращает ключ фигуры на клетке.
+
+    Аргументы:
+        kind (str): Вид фигуры вместе с ее состоянием (см. ChessPiece.zobrist_kind).
+        color (str): Цвет фигуры ('white' или 'black').
+        square (tuple): Кортеж (x, y) с позицией фигуры.
+
+    Возвращает:
+        int: 64-битный ключ.
+    """
+    try:
+        return _KEYS[kind, color, square]
+    except KeyError:
+        key = _KEYS[kind, color, square] = _random64(f"{kind}:{color}:{square[0]}{square[1]}")
+        return key
+
+
+def state_key(state):
+    """Возвращает ключ состояния позиции шахмат (см. chess_state); счетчик полуходов в ключ не входит.
+
+    Аргументы:
+        state (int): Состояние позиции.
+
+    Возвращает:
+        int: 64-битный ключ (0, если нет ни рокировок, ни взятия на проходе).
+    """
+    key = CASTLING_KEYS[state & chess_state.CASTLING_MASK]
+    column = (state & chess_state.EN_PASSANT_MASK) >> chess_state.EN_PASSANT_SHIFT
+    if column:
+        key ^= EN_PASSANT_KEYS[column - 1]
+    return key
+
+
+def board_key(board, side_to_move, state=0):
+    """Вычисляет ключ позиции полным просмотром доски.
+
+    Аргументы:
+        board (list): Двумерный список (8x8) с фигурами или None.
+        side_to_move (str): Цвет стороны, которая ходит ('white' или 'black').
+        state (int, optional): Состояние позиции шахмат (см. chess_state).
+
+    Возвращает:
+        int: 64-битный ключ позиции.
+    """
+    key = (SIDE_KEY if side_to_move == 'black' else 0) ^ state_key(state)
+    for y in range(8):
+        for x in range(8):
+            piece = board[y][x]
+            if piece is not None:
+                key ^= piece_key(piece.zobrist_kind(), piece.color, (x, y))
+    return key